@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Course, Lesson, Enrollment, Category
+from .models import Course, Lesson, Enrollment, Category, Submission, Task
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
@@ -16,3 +16,15 @@ class LessonAdmin(admin.ModelAdmin):
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name',)
+
+@admin.register(Submission)
+class SubmissionAdmin(admin.ModelAdmin):
+    list_display = ('student', 'assignment', 'submitted_at', 'grade')
+    list_select_related = ('student', 'assignment__course')
+    list_filter = ('assignment',)
+    search_fields = ('student__username', 'assignment__title')
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'max_attempts', 'available_at', 'created_at')
+    list_filter = ('status', 'name')
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
+
+    def ready(self):
+        from . import blobs, caching, checks, dashboards, deadlines, pagecache, search  # noqa: F401  (connects their signal receivers and checks)
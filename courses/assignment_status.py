@@ -0,0 +1,49 @@
+from django.db.models import Case, Exists, OuterRef, Value, When
+from django.utils import timezone
+
+from .models import Assignment, Enrollment, Submission
+
+PENDING = 'pending'
+SUBMITTED = 'submitted'
+GRADED = 'graded'
+OVERDUE = 'overdue'
+
+OPEN_STATUSES = (PENDING, OVERDUE)
+DONE_STATUSES = (SUBMITTED, GRADED)
+
+
+def student_assignments_with_status(user, now=None):
+    """
+    Return every assignment in the user's enrolled courses annotated with a
+    ``status`` of pending, submitted, graded or overdue.
+
+    The status is resolved in one query with per-student EXISTS subqueries
+    against the (student, assignment) index, so the cost does not depend on
+    how many submissions classmates have made.
+    """
+    now = now or timezone.now()
+    own_submissions = Submission.objects.filter(student=user, assignment=OuterRef('pk'))
+    return (
+        Assignment.objects.filter(
+            course__in=Enrollment.objects.filter(student=user).values('course')
+        )
+        .annotate(status=Case(
+            When(Exists(own_submissions.filter(grade__isnull=False)), then=Value(GRADED)),
+            When(Exists(own_submissions), then=Value(SUBMITTED)),
+            When(due_date__lt=now, then=Value(OVERDUE)),
+            default=Value(PENDING),
+        ))
+        .select_related('course')
+        .order_by('-due_date')
+    )
+
+
+def split_by_status(assignments):
+    """Split resolved assignments into (open, done) lists in one pass."""
+    open_assignments, done_assignments = [], []
+    for assignment in assignments:
+        if assignment.status in DONE_STATUSES:
+            done_assignments.append(assignment)
+        else:
+            open_assignments.append(assignment)
+    return open_assignments, done_assignments
@@ -0,0 +1,102 @@
+"""
+Authentication with the user's role attached.
+
+Nearly every page checks ``user.profile.is_instructor``, in the view or in
+base.html. ``ProfileBackend`` loads the user and their Profile in one
+joined query, both for the session user on each request and in
+``authenticate()`` for the login views. Reading the role then costs no
+query, and it cannot go stale, because it is read along with the user.
+
+``instructor_required`` and ``student_required`` are the role checks for
+views. They go below ``@login_required``.
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.http import HttpResponseForbidden
+
+UserModel = get_user_model()
+
+
+class ProfileBackend(ModelBackend):
+    """ModelBackend, with ``user.profile`` loaded alongside the user."""
+
+    def _users(self):
+        return UserModel._default_manager.select_related('profile')
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = self._users().get(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # Hash anyway, so an unknown username takes as long to reject
+            # as a wrong password (as ModelBackend does).
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await self._users().aget(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            UserModel().set_password(password)
+            return None
+        if await user.acheck_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        try:
+            user = self._users().get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        try:
+            user = await self._users().aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def is_instructor(user):
+    return user.profile.is_instructor
+
+
+def role_required(instructor, message):
+    """Answer 403 with ``message`` unless the user's role is instructor (or student)."""
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if is_instructor(await request.auser()) != instructor:
+                    return HttpResponseForbidden(message)
+                return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if is_instructor(request.user) != instructor:
+                    return HttpResponseForbidden(message)
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instructor_required(message="You are not an instructor."):
+    return role_required(True, message)
+
+
+def student_required(message="Only students can access this page."):
+    return role_required(False, message)
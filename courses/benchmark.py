@@ -0,0 +1,416 @@
+"""
+End-to-end latency benchmark for the routes in ``courses.urls``.
+
+Every route is requested through the Django test client as the kind of user
+that normally visits it, against the busiest rows in the database (the
+most popular course, the student with the most enrollments, the
+assignment with the most submissions), so the numbers reflect the heavy
+end of the data. Writes made while benchmarking are rolled back.
+
+The whole run is one transaction, so it measures neither read-replica
+routing (courses.routing sends reads inside a transaction to ``default``)
+nor commits. The cache invalidations queued with on_commit are run after
+each request, as a commit would run them, so cached pages are rebuilt
+after writes as they would be in production, and again after the
+rollback, so no page cached from rolled-back rows outlives the run. Other
+on_commit callbacks are dropped with the rollback.
+
+``run`` returns a JSON-serializable dict with p50/p95/p99 latency in
+milliseconds and the query count for each route.
+
+``run_concurrent`` instead serves the async views through the ASGI
+application the way uvicorn does, many simulated students at once on one
+event loop, once with their queries run one after another and once with
+them run concurrently (see courses.concurrency).
+"""
+import asyncio
+import logging
+import re
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver, reverse
+
+from . import urls
+from .caching import bump_versions
+from .dashboards import DASHBOARD_KEY
+from .models import Assignment, Category, Course, Enrollment, Lesson, UploadSession
+
+ANONYMOUS, STUDENT, INSTRUCTOR = 'anonymous', 'student', 'instructor'
+
+_CONVERTER_RE = re.compile(r'<(?:\w+:)?(\w+)>')
+
+NOT_MEASURED = "read-replica routing and commits (the run is one rolled-back transaction)"
+
+
+class Scenario:
+    def __init__(self, user=ANONYMOUS, method='get', query=None, data=None, setup=None):
+        self.user = user
+        self.method = method
+        self.query = query or {}
+        self.data = data
+        # Called before each request with the fixture; returns URL kwargs
+        # that override the fixture's, e.g. a fresh course to delete.
+        self.setup = setup
+
+
+def _fresh_course(fixture):
+    course = Course.objects.create(title='Benchmark course', description='To be deleted', created_by=fixture.instructor)
+    return {'course_id': course.pk}
+
+
+def _fresh_lesson(fixture):
+    return Lesson.objects.create(title='Benchmark lesson', content='', course=fixture.course)
+
+
+SCENARIOS = {
+    'home': Scenario(),
+    'course_list': Scenario(),
+    'course_detail': Scenario(STUDENT),
+    'create_course': Scenario(INSTRUCTOR),
+    'edit_course': Scenario(INSTRUCTOR),
+    'delete_course': Scenario(INSTRUCTOR, setup=_fresh_course),
+    'create_lesson': Scenario(INSTRUCTOR),
+    # The student is already enrolled, so this measures the no-op path.
+    'enroll_course': Scenario(STUDENT),
+    # A heartbeat far enough into the video to complete the lesson. Each
+    # request completes a fresh lesson, so it is buffered rather than
+    # dropped as a duplicate, and the flush finds nothing to write once
+    # the lessons are rolled back.
+    'record_lesson_progress': Scenario(
+        STUDENT, method='post', data={'position': 570, 'duration': 600},
+        setup=lambda fixture: {'lesson_id': _fresh_lesson(fixture).pk},
+    ),
+    'register': Scenario(),
+    'register_student': Scenario(),
+    'register_instructor': Scenario(),
+    'login': Scenario(),
+    'login_student': Scenario(),
+    'login_instructor': Scenario(),
+    'logout': Scenario(STUDENT),
+    'dashboard': Scenario(STUDENT),
+    'instructor_roster': Scenario(INSTRUCTOR, query={'sort': 'activity'}),
+    'courses_by_category': Scenario(),
+    'search': Scenario(query={'q': 'data'}),
+    'assignment_list': Scenario(STUDENT),
+    'create_assignment': Scenario(INSTRUCTOR),
+    'submit_assignment': Scenario(STUDENT),
+    'start_submission_upload': Scenario(STUDENT, method='post', data={'filename': 'answer.pdf', 'size': 1024}),
+    'submission_upload': Scenario(STUDENT),
+    'finish_submission_upload': Scenario(STUDENT, method='post'),
+    'view_submissions': Scenario(INSTRUCTOR),
+    'grade_submissions': Scenario(INSTRUCTOR),
+    'export_submissions': Scenario(INSTRUCTOR),
+    'student_assignments': Scenario(STUDENT),
+    'pending_classes': Scenario(STUDENT),
+}
+
+
+class Fixture:
+    """The rows every route is benchmarked against."""
+
+    def __init__(self):
+        self.course = Course.objects.select_related('created_by').order_by('-student_count', 'pk').first()
+        if self.course is None:
+            raise ValueError("The database has no courses; run `manage.py generate_dataset` first.")
+        self.instructor = self.course.created_by
+        self.student = (
+            User.objects.filter(
+                profile__is_instructor=False,
+                pk__in=Enrollment.objects.filter(course=self.course).values('student'),
+            )
+            .annotate(n=Count('enrollments')).order_by('-n', 'pk').first()
+        )
+        if self.student is None:
+            raise ValueError(f"Course {self.course.pk} has no students.")
+        self.assignment = (
+            Assignment.objects.filter(course=self.course)
+            .annotate(n=Count('submissions')).order_by('-n', 'pk').first()
+        )
+        if self.assignment is None:
+            self.assignment = Assignment.objects.create(
+                course=self.course, title='Benchmark assignment', description='',
+                due_date=self.course.created_at, created_by=self.instructor,
+            )
+        self.lesson = self.course.lessons.order_by('pk').first() or _fresh_lesson(self)
+        self.category = (
+            Category.objects.annotate(n=Count('course')).order_by('-n', 'pk').first()
+            or Category.objects.create(name='Benchmark')
+        )
+        self.upload = UploadSession.objects.create(
+            student=self.student, assignment=self.assignment, filename='answer.pdf', size=1024,
+        )
+        self.kwargs = {
+            'course_id': self.course.pk,
+            'category_id': self.category.pk,
+            'assignment_id': self.assignment.pk,
+            'lesson_id': self.lesson.pk,
+            'upload_id': self.upload.pk,
+        }
+
+    def describe(self):
+        return {
+            'course': self.course.pk,
+            'course_students': self.course.student_count,
+            'instructor': self.instructor.username,
+            'student': self.student.username,
+            'student_enrollments': self.student.n,
+            'assignment': self.assignment.pk,
+            'lesson': self.lesson.pk,
+            'category': self.category.pk,
+        }
+
+
+def course_routes():
+    """``(name, route)`` for every named route in courses.urls, with its mount prefix."""
+    prefix = ''
+    for resolver in get_resolver().url_patterns:
+        if getattr(getattr(resolver, 'urlconf_name', None), '__name__', None) == 'courses.urls':
+            prefix = str(resolver.pattern)
+            break
+    return [
+        (pattern.name, '/' + prefix + str(pattern.pattern))
+        for pattern in urls.urlpatterns
+        if isinstance(pattern, URLPattern) and pattern.name
+    ]
+
+
+def _percentile(samples, percent):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[percent - 1]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _is_invalidation(callback):
+    # caching.invalidate() queues partial(bump_versions, keys).
+    return getattr(callback, 'func', None) is bump_versions
+
+
+def _run_invalidations(fired):
+    # Run the cache invalidations the request queued for commit. The other
+    # callbacks, such as deleting a released blob's file, act on rows the
+    # rollback restores, so they stay queued and are dropped with it.
+    queued = connection.run_on_commit
+    connection.run_on_commit = [entry for entry in queued if not _is_invalidation(entry[1])]
+    for _, callback, _ in queued:
+        if _is_invalidation(callback):
+            callback()
+            fired.append(callback)
+
+
+def run(iterations=50, warmup=5, host='localhost', only=None, stdout=None):
+    # Expected 4xx responses (e.g. finalizing an incomplete upload) would
+    # otherwise log a warning per request.
+    request_logger = logging.getLogger('django.request')
+    level = request_logger.level
+    request_logger.setLevel(logging.ERROR)
+    fired = []
+    try:
+        with transaction.atomic():
+            result = _run(iterations, warmup, host, only, stdout, fired)
+            raise _Rollback
+    except _Rollback:
+        return result
+    finally:
+        request_logger.setLevel(level)
+        # Pages cached from the rolled-back rows were cached under the
+        # versions these bumped; bump past them.
+        for callback in fired:
+            callback()
+
+
+def _run(iterations, warmup, host, only, stdout, fired):
+    fixture = Fixture()
+    clients = {role: Client(HTTP_HOST=host) for role in (ANONYMOUS, STUDENT, INSTRUCTOR)}
+    clients[STUDENT].force_login(fixture.student)
+    clients[INSTRUCTOR].force_login(fixture.instructor)
+
+    routes = {}
+    for name, route in course_routes():
+        if only and name not in only:
+            continue
+        scenario = SCENARIOS.get(name)
+        if scenario is None:
+            scenario = Scenario(STUDENT)
+            if stdout is not None:
+                stdout.write(f"{name}: no scenario defined, requesting it as a student.")
+        routes[name] = stats = _measure(clients, fixture, route, scenario, iterations, warmup, fired)
+        if stdout is None:
+            continue
+        if 'skipped' in stats:
+            stdout.write(f"{name:28} skipped: {stats['skipped']}")
+        else:
+            stdout.write(
+                f"{name:28} {stats['status']:>4} p50 {stats['p50_ms']:8.2f}ms  "
+                f"p95 {stats['p95_ms']:8.2f}ms  p99 {stats['p99_ms']:8.2f}ms  {stats['queries']:>4} queries"
+            )
+    return {'iterations': iterations, 'fixture': fixture.describe(), 'not_measured': NOT_MEASURED, 'routes': routes}
+
+
+def _measure(clients, fixture, route, scenario, iterations, warmup, fired):
+    client = clients[scenario.user]
+    timings, queries, status = [], [], None
+    for iteration in range(warmup + iterations):
+        kwargs = dict(fixture.kwargs, **(scenario.setup(fixture) if scenario.setup else {}))
+        missing = sorted(set(_CONVERTER_RE.findall(route)) - set(kwargs))
+        if missing:
+            return {
+                'path': route,
+                'method': scenario.method.upper(),
+                'user': scenario.user,
+                'skipped': f"no fixture value for {', '.join(missing)}",
+            }
+        path = _CONVERTER_RE.sub(lambda match: str(kwargs[match.group(1)]), route)
+        if scenario.user != ANONYMOUS and '_auth_user_id' not in client.session:
+            # Logging out ends the session, so log back in outside the timing.
+            client.force_login(fixture.student if scenario.user == STUDENT else fixture.instructor)
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            if scenario.method == 'post':
+                response = client.post(path, scenario.data or {})
+            else:
+                response = client.get(path, scenario.query)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        _run_invalidations(fired)
+        if iteration >= warmup:
+            timings.append(elapsed * 1000)
+            queries.append(len(captured))
+            status = response.status_code
+    # The fixture's rows rather than the last fresh one a setup made.
+    shown = dict(kwargs, **fixture.kwargs)
+    return {
+        'path': _CONVERTER_RE.sub(lambda match: str(shown[match.group(1)]), route),
+        'method': scenario.method.upper(),
+        'user': scenario.user,
+        'status': status,
+        'p50_ms': round(_percentile(timings, 50), 3),
+        'p95_ms': round(_percentile(timings, 95), 3),
+        'p99_ms': round(_percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': max(queries),
+    }
+
+
+# Async views whose independent queries run concurrently.
+CONCURRENT_ROUTES = ('dashboard', 'student_assignments')
+
+
+async def _asgi_get(application, path, host, session_key):
+    """GET ``path`` from the ASGI ``application`` as a server would; return the status code."""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', host.encode()), (b'cookie', f'sessionid={session_key}'.encode())],
+        'client': ('127.0.0.1', 50000),
+        'server': (host, 80),
+    }
+    body_sent = False
+    status = None
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client never disconnects; Django stops listening once it
+        # has responded.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application(scope, receive, send)
+    return status
+
+
+async def _simulate(application, path, host, students, requests_per_user):
+    timings, errors = [], 0
+
+    async def student(user, session_key):
+        nonlocal errors
+        for _ in range(requests_per_user):
+            # Every request builds the dashboard rather than hitting its cache.
+            await cache.adelete(DASHBOARD_KEY % user.pk)
+            started = time.perf_counter()
+            status = await _asgi_get(application, path, host, session_key)
+            timings.append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(student(user, session_key) for user, session_key in students))
+    return timings, errors, time.perf_counter() - started
+
+
+def run_concurrent(users=50, requests_per_user=20, host='localhost', only=None, stdout=None):
+    """
+    Serve CONCURRENT_ROUTES to ``users`` simultaneous students, serially
+    and then concurrently, and report latency and throughput for each.
+    """
+    students = list(
+        User.objects.filter(profile__is_instructor=False)
+        .annotate(n=Count('enrollments')).filter(n__gt=0).order_by('-n', 'pk')[:users]
+    )
+    if not students:
+        raise ValueError("The database has no enrolled students; run `manage.py generate_dataset` first.")
+    sessions = []
+    for user in students:
+        client = Client()
+        client.force_login(user)
+        sessions.append((user, client.session.session_key))
+
+    application = ASGIHandler()
+    routes = {}
+    try:
+        for name in CONCURRENT_ROUTES:
+            if only and name not in only:
+                continue
+            path = reverse(name)
+            routes[name] = {}
+            for mode, concurrent in (('serial', False), ('concurrent', True)):
+                with override_settings(CONCURRENT_QUERIES=concurrent):
+                    # One untimed round so connections and caches are warm.
+                    asyncio.run(_simulate(application, path, host, sessions, 1))
+                    timings, errors, elapsed = asyncio.run(
+                        _simulate(application, path, host, sessions, requests_per_user)
+                    )
+                stats = routes[name][mode] = {
+                    'p50_ms': round(_percentile(timings, 50), 3),
+                    'p95_ms': round(_percentile(timings, 95), 3),
+                    'p99_ms': round(_percentile(timings, 99), 3),
+                    'mean_ms': round(statistics.fmean(timings), 3),
+                    'requests_per_second': round(len(timings) / elapsed, 1),
+                    'errors': errors,
+                }
+                if stdout is not None:
+                    stdout.write(
+                        f"{name:20} {mode:10} p50 {stats['p50_ms']:8.2f}ms  p95 {stats['p95_ms']:8.2f}ms  "
+                        f"p99 {stats['p99_ms']:8.2f}ms  {stats['requests_per_second']:8.1f} req/s  "
+                        f"{errors} errors"
+                    )
+    finally:
+        Session.objects.filter(session_key__in=[key for _, key in sessions]).delete()
+    return {'users': len(sessions), 'requests_per_user': requests_per_user, 'routes': routes}
@@ -0,0 +1,85 @@
+"""
+Reference counting for content-addressed submission blobs.
+
+Every Submission pointing at a blob holds one reference. When the last
+reference goes away the Blob row is removed and, once the transaction
+commits, the file itself, unless an identical upload has been handed the
+file in the meantime (see ``courses.storage``).
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Blob, Submission
+from .storage import blob_digest
+
+
+def retain(name, storage):
+    digest = blob_digest(name)
+    if digest is None:
+        return
+    blob, _ = Blob.objects.get_or_create(
+        name=name, defaults={'sha256': digest, 'size': storage.size(name)},
+    )
+    Blob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+    # The reference now protects the file; a reuse marker no longer has to.
+    transaction.on_commit(lambda: storage.reuse_done(name))
+
+
+def release(name, storage):
+    if blob_digest(name) is None:
+        return
+    Blob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+    deleted, _ = Blob.objects.filter(name=name, ref_count=0).delete()
+    if deleted:
+        transaction.on_commit(lambda: _delete_unreferenced(name, storage))
+
+
+def _delete_unreferenced(name, storage):
+    with storage.blob_lock():
+        # An identical upload may have been handed this file since the row
+        # went: it has either committed its reference or left a marker.
+        if Blob.objects.filter(name=name).exists() or storage.reuse_pending(name):
+            return
+        storage.delete(name)
+        storage.reuse_done(name)
+
+
+_UNKNOWN = object()
+
+
+def _stored_name(instance):
+    # Read the raw attribute so tracking never builds a FieldFile. A deferred
+    # field was never loaded, so its current name is unknown.
+    if 'submitted_file' not in instance.__dict__:
+        return _UNKNOWN
+    value = instance.__dict__['submitted_file']
+    return getattr(value, 'name', value)
+
+
+@receiver(post_init, sender=Submission)
+def remember_submission_file(sender, instance, **kwargs):
+    instance._stored_file_name = _stored_name(instance)
+
+
+@receiver(post_save, sender=Submission)
+def retain_submission_file(sender, instance, created, raw=False, **kwargs):
+    if raw or (not created and instance._stored_file_name is _UNKNOWN):
+        return
+    storage = instance.submitted_file.storage
+    old_name = None if created else instance._stored_file_name
+    new_name = instance.submitted_file.name
+    if new_name != old_name:
+        with transaction.atomic():
+            if new_name:
+                retain(new_name, storage)
+            if old_name:
+                release(old_name, storage)
+    instance._stored_file_name = new_name
+
+
+@receiver(post_delete, sender=Submission)
+def release_submission_file(sender, instance, **kwargs):
+    if _stored_name(instance) is not _UNKNOWN and instance.submitted_file.name:
+        release(instance.submitted_file.name, instance.submitted_file.storage)
@@ -0,0 +1,172 @@
+"""
+Batched creation of courses, lessons and enrollments for catalog imports.
+
+Each ``import_*`` function takes a batch of ``(line, row)`` pairs, validates
+the rows with the same form rules as the per-object views, resolves every
+reference in the batch with one query per kind, and writes the valid rows
+with a single bulk_create. bulk_create() skips model signals, so the
+course counters, the search index and cached dashboards are brought up to
+date here. Each function returns ``(created, errors)`` where errors are
+``(line, message)``.
+
+Every kind of row has a natural key (``external_id`` for courses and
+lessons, the (student, course) pair for enrollments), and rows that
+already exist are skipped, so importing a batch twice creates nothing
+the second time.
+"""
+from django.contrib.auth.models import User
+
+from .caching import cached_categories, invalidate
+from .counters import recount_courses
+from .dashboards import USER_VERSION_KEY, invalidate_courses, invalidate_students
+from .forms import CourseForm, LessonForm
+from .models import Course, Enrollment, Lesson
+from .pagecache import invalidate_listings
+from .search import COURSE, LESSON, index_objects
+
+
+def _value(row, key):
+    value = row.get(key)
+    return '' if value is None else str(value).strip()
+
+
+def _form_errors(form):
+    return '; '.join(
+        f"{field}: {' '.join(messages)}" for field, messages in form.errors.items()
+    )
+
+
+def import_courses(rows):
+    keys = {_value(row, 'external_id') for _, row in rows}
+    existing = set(Course.objects.filter(external_id__in=keys).values_list('external_id', flat=True))
+    instructors = dict(
+        User.objects.filter(
+            username__in={_value(row, 'instructor') for _, row in rows},
+            profile__is_instructor=True,
+        ).values_list('username', 'id')
+    )
+    categories = {category.name: category.pk for category in cached_categories()}
+
+    courses, errors = [], []
+    for line, row in rows:
+        key = _value(row, 'external_id')
+        if not key:
+            errors.append((line, "external_id is required."))
+            continue
+        if key in existing:
+            # Already imported (for example by an earlier, interrupted run).
+            continue
+        form = CourseForm(data={'title': _value(row, 'title'), 'description': _value(row, 'description')})
+        # Categories are checked against the cached list below instead of a
+        # ModelChoiceField lookup per row.
+        del form.fields['category']
+        if not form.is_valid():
+            errors.append((line, _form_errors(form)))
+            continue
+        instructor_id = instructors.get(_value(row, 'instructor'))
+        if instructor_id is None:
+            errors.append((line, f"Unknown instructor '{_value(row, 'instructor')}'."))
+            continue
+        category_name = _value(row, 'category')
+        if category_name and category_name not in categories:
+            errors.append((line, f"Unknown category '{category_name}'."))
+            continue
+        course = form.save(commit=False)
+        course.external_id = key
+        course.created_by_id = instructor_id
+        course.category_id = categories.get(category_name)
+        courses.append(course)
+        existing.add(key)
+
+    created = Course.objects.bulk_create(courses)
+    index_objects(COURSE, [(c.pk, c.title, c.description, c.pk) for c in created])
+    invalidate(*{USER_VERSION_KEY % c.created_by_id for c in created})
+    invalidate_listings({c.category_id for c in created})
+    return len(created), errors
+
+
+def _resolve_courses(rows):
+    return dict(
+        Course.objects.filter(external_id__in={_value(row, 'course') for _, row in rows})
+        .values_list('external_id', 'id')
+    )
+
+
+def import_lessons(rows):
+    courses = _resolve_courses(rows)
+    keys = {_value(row, 'external_id') for _, row in rows}
+    existing = set(Lesson.objects.filter(external_id__in=keys).values_list('external_id', flat=True))
+
+    lessons, errors = [], []
+    for line, row in rows:
+        key = _value(row, 'external_id')
+        if not key:
+            errors.append((line, "external_id is required."))
+            continue
+        if key in existing:
+            continue
+        course_id = courses.get(_value(row, 'course'))
+        if course_id is None:
+            errors.append((line, f"Unknown course '{_value(row, 'course')}'."))
+            continue
+        form = LessonForm(data={field: _value(row, field) for field in ('title', 'content', 'video_url')})
+        if not form.is_valid():
+            errors.append((line, _form_errors(form)))
+            continue
+        lesson = form.save(commit=False)
+        lesson.external_id = key
+        lesson.course_id = course_id
+        lessons.append(lesson)
+        existing.add(key)
+
+    created = Lesson.objects.bulk_create(lessons)
+    index_objects(LESSON, [(lesson.pk, lesson.title, lesson.content, lesson.course_id) for lesson in created])
+    touched = {lesson.course_id for lesson in created}
+    recount_courses(Course.objects.filter(pk__in=touched))
+    invalidate_courses(touched)
+    return len(created), errors
+
+
+def import_enrollments(rows):
+    courses = _resolve_courses(rows)
+    students = dict(
+        User.objects.filter(username__in={_value(row, 'student') for _, row in rows})
+        .values_list('username', 'id')
+    )
+
+    pairs, errors = set(), []
+    for line, row in rows:
+        course_id = courses.get(_value(row, 'course'))
+        student_id = students.get(_value(row, 'student'))
+        if course_id is None:
+            errors.append((line, f"Unknown course '{_value(row, 'course')}'."))
+        elif student_id is None:
+            errors.append((line, f"Unknown student '{_value(row, 'student')}'."))
+        else:
+            pairs.add((student_id, course_id))
+
+    # Drop the pairs already enrolled, so what bulk_create() returns is
+    # what was created. The import's transaction holds the write lock, and
+    # ignore_conflicts only covers a writer on another database backend.
+    existing = set(
+        Enrollment.objects.filter(
+            student__in={student for student, _ in pairs}, course__in={course for _, course in pairs},
+        ).values_list('student', 'course')
+    )
+    created = Enrollment.objects.bulk_create(
+        [Enrollment(student_id=student, course_id=course) for student, course in pairs - existing],
+        ignore_conflicts=True,
+    )
+    touched = {e.course_id for e in created}
+    recount_courses(Course.objects.filter(pk__in=touched))
+    invalidate_courses(touched)
+    invalidate_students({e.student_id for e in created})
+    invalidate_listings(Course.objects.filter(pk__in=touched).values_list('category_id', flat=True))
+    return len(created), errors
+
+
+IMPORTERS = {
+    'course': import_courses,
+    'lesson': import_lessons,
+    'enrollment': import_enrollments,
+}
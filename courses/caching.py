@@ -0,0 +1,118 @@
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .metrics import record_cache
+from .models import Category
+
+CATEGORIES_VERSION_KEY = 'courses:categories:version'
+CATEGORIES_KEY = 'courses:categories:v%s'
+# Bumped whenever anything shown about a course changes: its fields, its
+# lessons, assignments or enrollments (see courses.dashboards).
+COURSE_VERSION_KEY = 'courses:course:%s:version'
+# When a version key was last bumped, as a Unix time, for Last-Modified.
+MODIFIED_KEY = '%s:modified'
+
+# (version, list) pair for this process, so a steady-state read costs one
+# cache.get of the version key and no unpickling of the category list.
+_local_categories = (None, None)
+
+
+def _initial_version():
+    # Seed from the clock rather than 1, so a version key that was evicted
+    # never comes back with a value some process has already cached under.
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _get_many_seeded(defaults):
+    # cache.get_many(), adding whatever is missing with its default first.
+    values = cache.get_many(list(defaults))
+    missing = [key for key in defaults if key not in values]
+    if missing:
+        for key in missing:
+            cache.add(key, defaults[key], timeout=None)
+        values.update(cache.get_many(missing))
+    return values
+
+
+def get_versions(keys):
+    """Return ``{key: version}`` for several version keys in one cache round trip."""
+    return _get_many_seeded(dict.fromkeys(keys, _initial_version()))
+
+
+def get_versions_modified(keys):
+    """
+    Return ``({key: version}, last modified)`` in one cache round trip, the
+    last modified time being the latest bump of any of ``keys``.
+    """
+    now = time.time()
+    defaults = dict.fromkeys(keys, int(now * 1000))
+    # A key that has never been bumped, or whose time was evicted, counts
+    # as modified now: too recent is safe, too old is not.
+    defaults.update((MODIFIED_KEY % key, int(now)) for key in keys)
+    values = _get_many_seeded(defaults)
+    return {key: values[key] for key in keys}, max(values[MODIFIED_KEY % key] for key in keys)
+
+
+def bump_version(key):
+    # The time first: a reader between the two sees a new time with the old
+    # version, never the new version with the old time.
+    cache.set(MODIFIED_KEY % key, int(time.time()), timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+
+
+def bump_versions(keys):
+    for key in keys:
+        bump_version(key)
+
+
+def invalidate(*keys):
+    """Bump version keys once the current transaction commits."""
+    # After commit, so a concurrent rebuild cannot cache the old rows under
+    # the new versions.
+    transaction.on_commit(partial(bump_versions, keys))
+
+
+def cached_categories():
+    """Return all categories, served from the cache until a Category changes."""
+    global _local_categories
+    version = get_version(CATEGORIES_VERSION_KEY)
+    local_version, categories = _local_categories
+    if local_version == version:
+        record_cache('categories', hit=True)
+        return categories
+
+    key = CATEGORIES_KEY % version
+    categories = cache.get(key)
+    record_cache('categories', hit=categories is not None)
+    if categories is None:
+        categories = list(Category.objects.all())
+        cache.set(key, categories)
+    _local_categories = (version, categories)
+    return categories
+
+
+def get_cached_category(category_id):
+    """Return the Category with ``category_id`` from the cached list, or None."""
+    return next((c for c in cached_categories() if c.id == category_id), None)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    invalidate(CATEGORIES_VERSION_KEY)
@@ -0,0 +1,48 @@
+"""
+System checks for what the caching layers assume about the deployment.
+
+Cache versions, cached pages, throttles and buffered events are only
+coherent if every process sees the same cache. A process-local cache is
+accepted only when ``SINGLE_PROCESS`` says there is one process.
+"""
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.checks import Error, Tags, register
+
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def is_process_local(alias):
+    return settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_BACKENDS
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if getattr(settings, 'SINGLE_PROCESS', False) or not is_process_local(DEFAULT_CACHE_ALIAS):
+        return []
+    return [Error(
+        "The default cache is local to each process.",
+        hint=(
+            "Version bumps, page cache validators, login throttles and buffered progress events "
+            "would not reach the other processes. Configure a shared cache (set REDIS_URL), or set "
+            "SINGLE_PROCESS = True if every request and command runs in one process."
+        ),
+        id='courses.E001',
+    )]
+
+
+@register(Tags.caches)
+def check_shared_session_cache(app_configs, **kwargs):
+    if settings.SESSION_ENGINE != 'courses.sessions' or getattr(settings, 'SINGLE_PROCESS', False):
+        return []
+    if not is_process_local(settings.SESSION_CACHE_ALIAS):
+        return []
+    return [Error(
+        "The session cache (SESSION_CACHE_ALIAS) is local to each process.",
+        hint=(
+            "courses.sessions serves sessions from the cache, so a logout in one process would not "
+            "reach the others, and their delayed database writes could restore an older session. "
+            "Point SESSION_CACHE_ALIAS at a shared cache."
+        ),
+        id='courses.E002',
+    )]
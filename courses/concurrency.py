@@ -0,0 +1,74 @@
+"""
+Run independent ORM queries concurrently from async views.
+
+Django's async ORM (``aget``, ``acount``, ``async for`` ...) hands every
+query to ``sync_to_async(thread_sensitive=True)``: one thread per request,
+one query after another, so ``asyncio.gather`` over them buys nothing.
+``gather_queries`` instead runs each query on a small pool of worker
+threads, each with its own connection. In WAL mode SQLite readers do not
+block each other and the sqlite3 module releases the GIL while a statement
+runs, so the queries really do overlap.
+
+Worker connections follow the usual request lifecycle (kept for
+``CONN_MAX_AGE``, closed when broken). The workers run in the request's
+context, so the read-only routing of the calling view still applies and
+its statement hooks (metrics, query budget; see courses.instrumentation)
+still count the queries. Inside a transaction, as in a test case, only
+the request's own connection can see the uncommitted rows, so the queries
+run on it one after another.
+
+It is off unless ``CONCURRENT_QUERIES`` is set: every worker holds a
+connection of its own, and whether the overlap pays for that depends on
+the workload (``run_concurrency_benchmark`` measures it).
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+DEFAULT_WORKERS = 8
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'CONCURRENT_QUERY_WORKERS', DEFAULT_WORKERS),
+            thread_name_prefix='concurrent-queries',
+        )
+    return _executor
+
+
+def _in_transaction():
+    return connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+def _run_serially(queries):
+    return [query() for query in queries]
+
+
+def _run_in_worker(query):
+    close_old_connections()
+    try:
+        return query()
+    finally:
+        close_old_connections()
+
+
+async def gather_queries(*queries):
+    """
+    Call the zero-argument functions ``queries``, each running its own
+    queries, concurrently where possible; return their results in order.
+    """
+    serial = not getattr(settings, 'CONCURRENT_QUERIES', False) or len(queries) < 2
+    if serial or await sync_to_async(_in_transaction)():
+        return await sync_to_async(_run_serially)(queries)
+    executor = _get_executor()
+    return list(await asyncio.gather(*(
+        sync_to_async(_run_in_worker, thread_sensitive=False, executor=executor)(query)
+        for query in queries
+    )))
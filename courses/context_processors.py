@@ -1,7 +1,13 @@
-from .models import Category
+from django.utils.functional import SimpleLazyObject
+
+from .caching import cached_categories
 
 def categories(request):
-    """Make categories available in all templates."""
+    """Make categories available in all templates.
+
+    The list is resolved lazily, so responses that never render it do no
+    cache or database work.
+    """
     return {
-        'categories': Category.objects.all()
+        'categories': SimpleLazyObject(cached_categories)
     }
@@ -0,0 +1,23 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Enrollment, Lesson
+
+
+def count_subquery(model):
+    """COUNT(*) of ``model`` rows per course, for use in Course annotations and updates."""
+    return Coalesce(Subquery(
+        model.objects.filter(course=OuterRef('pk'))
+        .order_by()
+        .values('course')
+        .annotate(n=Count('pk'))
+        .values('n')
+    ), 0)
+
+
+def recount_courses(courses):
+    """Recompute the stored counters of every course in the ``courses`` queryset."""
+    return courses.update(
+        student_count=count_subquery(Enrollment),
+        lesson_count=count_subquery(Lesson),
+    )
@@ -0,0 +1,229 @@
+"""
+Dashboard context, cached per user.
+
+A cached dashboard is stored with the versions of everything it was built
+from: the user, each course it shows, each roster student's enrollments
+and the category list. A repeat load reads the entry and those versions in
+two cache round trips and no database queries; if any version has moved
+on, the dashboard is rebuilt. The signal receivers below bump exactly the
+versions a write affects, so one enrollment invalidates the student, the
+course and its instructor's roster, not every dashboard.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .assignment_status import PENDING, student_assignments_with_status
+from .caching import CATEGORIES_VERSION_KEY, COURSE_VERSION_KEY, get_versions, invalidate
+from .concurrency import gather_queries
+from .metrics import record_cache
+from .models import Assignment, Course, Enrollment, Lesson, Profile, Submission
+from .progress import enrollment_progress
+from .roster import recently_active, student_count
+
+DASHBOARD_KEY = 'courses:dashboard:%s'
+USER_VERSION_KEY = 'courses:dashboard:user:%s:version'
+# An instructor's roster summary: bumped by submissions to their
+# assignments (enrollments already bump the course).
+ROSTER_VERSION_KEY = 'courses:dashboard:roster:%s:version'
+DASHBOARD_TIMEOUT = 60 * 60
+
+
+def _instructor_queries(user):
+    # A summary of the roster; the full roster is its own paginated page.
+    return {
+        'courses': lambda: list(Course.objects.filter(created_by=user)),
+        'student_count': lambda: student_count(user),
+        'recent_students': lambda: recently_active(user),
+    }
+
+
+def _instructor_context(results):
+    return {'is_instructor': True, **results}
+
+
+def _student_queries(user):
+    return {
+        'enrollments': lambda: enrollment_progress(user),
+        'pending_assignments': lambda: list(student_assignments_with_status(user).filter(status=PENDING)),
+    }
+
+
+def _student_context(results):
+    enrollments = results['enrollments']
+    pending_assignments = results['pending_assignments']
+    return {
+        'is_instructor': False,
+        'enrollments': enrollments,
+        'pending_assignments': pending_assignments,
+        'pending_count': len(pending_assignments),
+        'remaining_classes': sum(en.remaining_lessons for en in enrollments),
+    }
+
+
+def instructor_dashboard(user):
+    return _instructor_context({name: query() for name, query in _instructor_queries(user).items()})
+
+
+def student_dashboard(user):
+    return _student_context({name: query() for name, query in _student_queries(user).items()})
+
+
+def _dependencies(user, is_instructor):
+    keys = [USER_VERSION_KEY % user.pk]
+    if is_instructor:
+        keys.extend(COURSE_VERSION_KEY % pk for pk in Course.objects.filter(created_by=user).values_list('pk', flat=True))
+        keys.append(ROSTER_VERSION_KEY % user.pk)
+    else:
+        keys.extend(COURSE_VERSION_KEY % pk for pk in Enrollment.objects.filter(student=user).values_list('course', flat=True))
+        keys.append(CATEGORIES_VERSION_KEY)
+    return keys
+
+
+def _timeout(context):
+    # A pending assignment turns overdue at its due date, so the entry must
+    # not outlive the earliest one.
+    timeout = DASHBOARD_TIMEOUT
+    for assignment in context.get('pending_assignments', ()):
+        timeout = min(timeout, (assignment.due_date - timezone.now()).total_seconds())
+    return max(int(timeout), 1)
+
+
+def _cached_context(user):
+    entry = cache.get(DASHBOARD_KEY % user.pk)
+    if entry is not None:
+        versions, context = entry
+        if get_versions(list(versions)) == versions:
+            record_cache('dashboard', hit=True)
+            return context
+    record_cache('dashboard', hit=False)
+    return None
+
+
+def _versions(user):
+    # Versions are read before the data, so a write that lands while the
+    # dashboard is being built leaves the entry already out of date.
+    return get_versions(_dependencies(user, user.profile.is_instructor))
+
+
+def _store(user, versions, context):
+    cache.set(DASHBOARD_KEY % user.pk, (versions, context), _timeout(context))
+
+
+def dashboard_context(user):
+    """Return the dashboard context for ``user``, from the cache when nothing it shows has changed."""
+    context = _cached_context(user)
+    if context is None:
+        versions = _versions(user)
+        context = instructor_dashboard(user) if user.profile.is_instructor else student_dashboard(user)
+        _store(user, versions, context)
+    return context
+
+
+async def adashboard_context(user):
+    """
+    Async dashboard_context(): on a cache miss the dashboard's independent
+    queries run concurrently.
+    """
+    context = await sync_to_async(_cached_context)(user)
+    if context is not None:
+        return context
+    # The user comes from courses.auth.ProfileBackend with the profile loaded.
+    versions = await sync_to_async(_versions)(user)
+    if user.profile.is_instructor:
+        queries, build = _instructor_queries(user), _instructor_context
+    else:
+        queries, build = _student_queries(user), _student_context
+    context = build(dict(zip(queries, await gather_queries(*queries.values()))))
+    await sync_to_async(_store)(user, versions, context)
+    return context
+
+
+def invalidate_courses(course_ids):
+    invalidate(*(COURSE_VERSION_KEY % pk for pk in course_ids))
+
+
+def invalidate_students(student_ids):
+    invalidate(*(USER_VERSION_KEY % pk for pk in student_ids))
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def enrollment_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_students([instance.student_id])
+        invalidate_courses([instance.course_id])
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=Assignment)
+@receiver(post_delete, sender=Assignment)
+def course_content_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_courses([instance.course_id])
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate(COURSE_VERSION_KEY % instance.pk, USER_VERSION_KEY % instance.created_by_id)
+
+
+@receiver(post_save, sender=Profile)
+def profile_changed(sender, instance, raw=False, **kwargs):
+    # The role decides which dashboard is shown.
+    if not raw:
+        invalidate(USER_VERSION_KEY % instance.user_id)
+
+
+def _instructor_ids(submissions):
+    # From the loaded assignment and course where the caller has them,
+    # with one query for the rest.
+    instructor_ids, assignment_ids = set(), set()
+    for submission in submissions:
+        if Submission.assignment.is_cached(submission) and Assignment.course.is_cached(submission.assignment):
+            instructor_ids.add(submission.assignment.course.created_by_id)
+        else:
+            assignment_ids.add(submission.assignment_id)
+    if assignment_ids:
+        instructor_ids.update(
+            Assignment.objects.filter(pk__in=assignment_ids).values_list('course__created_by', flat=True)
+        )
+    return instructor_ids
+
+
+def invalidate_submissions(submissions):
+    """Invalidate the dashboards showing ``submissions``, for bulk writes that send no signals."""
+    submissions = list(submissions)
+    invalidate(
+        *(USER_VERSION_KEY % pk for pk in {submission.student_id for submission in submissions}),
+        *(ROSTER_VERSION_KEY % pk for pk in _instructor_ids(submissions)),
+    )
+
+
+@receiver(post_save, sender=Submission)
+@receiver(post_delete, sender=Submission)
+def submission_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_submissions([instance])
+
+
+@receiver(m2m_changed, sender=Enrollment.completed_lessons.through)
+def completed_lessons_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate(USER_VERSION_KEY % instance.student_id)
+    elif pk_set:
+        # lesson.enrollment_set.add(...): pk_set holds enrollment ids.
+        students = Enrollment.objects.filter(pk__in=pk_set).values_list('student', flat=True)
+        invalidate(*(USER_VERSION_KEY % pk for pk in students))
+    else:
+        # lesson.enrollment_set.clear() does not say which enrollments it
+        # touched; every student of the course may have lost a completion.
+        students = Enrollment.objects.filter(course=instance.course_id).values_list('student', flat=True)
+        invalidate(*(USER_VERSION_KEY % pk for pk in students))
@@ -0,0 +1,219 @@
+"""
+Reproducible synthetic data for benchmarks.
+
+``generate`` fills the database with instructors, students, courses,
+lessons, enrollments, completed lessons, assignments and submissions whose
+sizes scale linearly with ``scale``. The same ``seed`` always yields the
+same rows. Popularity is skewed the way real catalogs are: course demand
+follows a Zipf curve, so a few courses hold most of the enrollments, and
+enrollments per student are Pareto distributed, so a handful of heavy
+students are enrolled in dozens of courses.
+
+Every generated username starts with ``PREFIX`` so the data can be told
+apart from real accounts and removed with ``flush``.
+"""
+import bisect
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.db.models import F
+from django.utils import timezone
+
+from .counters import recount_courses
+from .models import Assignment, Blob, Category, Course, Enrollment, Lesson, Profile, Submission
+from .search import COURSE, LESSON, index_objects
+from .storage import blob_digest
+
+PREFIX = 'bench-'
+PASSWORD = 'bench-password'
+
+# Per unit of scale.
+STUDENTS = 1000
+INSTRUCTORS = 20
+COURSES = 100
+
+CATEGORIES = ('Math', 'Science', 'History', 'Languages', 'Programming', 'Art', 'Business', 'Music')
+COURSE_ZIPF_EXPONENT = 1.1
+MAX_ENROLLMENTS_PER_STUDENT = 60
+SUBMISSION_FILES = 16
+BATCH_SIZE = 2000
+
+WORDS = (
+    'introduction advanced applied modern practical theory foundations analysis design systems '
+    'data history science art language music business algebra geometry statistics physics '
+    'chemistry biology writing reading culture economics management networks databases python '
+    'painting drawing composition harmony marketing finance ethics logic calculus probability'
+).split()
+
+
+def _words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+class _WeightedSampler:
+    """Draws distinct items with probability proportional to fixed weights."""
+
+    def __init__(self, rng, items, weights):
+        self.rng = rng
+        self.items = items
+        self.cumulative = list(itertools.accumulate(weights))
+
+    def sample(self, count):
+        count = min(count, len(self.items))
+        chosen = set()
+        total = self.cumulative[-1]
+        while len(chosen) < count:
+            chosen.add(bisect.bisect(self.cumulative, self.rng.random() * total))
+        return [self.items[index] for index in sorted(chosen)]
+
+
+def generate(scale=1.0, seed=0, stdout=None):
+    """Create the dataset and return the number of rows created per model."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    counts = {}
+
+    def report(model, rows):
+        counts[model.__name__] = len(rows)
+        if stdout is not None:
+            stdout.write(f"{model.__name__}: {len(rows)}")
+        return rows
+
+    password = make_password(PASSWORD)
+    instructors = _create_users('instructor', max(1, round(INSTRUCTORS * scale)), password, True)
+    students = _create_users('student', max(1, round(STUDENTS * scale)), password, False)
+    report(User, instructors + students)
+
+    categories = [Category.objects.get_or_create(name=name)[0] for name in CATEGORIES]
+
+    courses = report(Course, Course.objects.bulk_create([
+        Course(
+            title=_words(rng, 3).title(),
+            description=_words(rng, rng.randint(20, 60)),
+            category=rng.choice(categories + [None]),
+            created_by=rng.choice(instructors),
+        )
+        for _ in range(max(1, round(COURSES * scale)))
+    ], batch_size=BATCH_SIZE))
+
+    lessons = report(Lesson, Lesson.objects.bulk_create([
+        Lesson(
+            course=course,
+            title=_words(rng, 4).capitalize(),
+            content=_words(rng, rng.randint(50, 200)),
+            video_url=f'https://video.example.com/{course.pk}/{number}' if rng.random() < 0.5 else None,
+        )
+        for course in courses
+        for number in range(rng.randint(3, 30))
+    ], batch_size=BATCH_SIZE))
+    lessons_by_course = {}
+    for lesson in lessons:
+        lessons_by_course.setdefault(lesson.course_id, []).append(lesson.pk)
+
+    # Course popularity is independent of creation order.
+    ranked = rng.sample(courses, len(courses))
+    sampler = _WeightedSampler(rng, ranked, [1 / (rank + 1) ** COURSE_ZIPF_EXPONENT for rank in range(len(ranked))])
+    enrollments = []
+    for student in students:
+        wanted = min(int(rng.paretovariate(1.2)), MAX_ENROLLMENTS_PER_STUDENT)
+        for course in sampler.sample(wanted):
+            enrollments.append(Enrollment(
+                student=student, course=course, enrolled_at=now - timedelta(days=rng.randint(0, 365)),
+            ))
+    enrollments = report(Enrollment, Enrollment.objects.bulk_create(enrollments, batch_size=BATCH_SIZE))
+
+    Completion = Enrollment.completed_lessons.through
+    completions = []
+    for enrollment in enrollments:
+        course_lessons = lessons_by_course.get(enrollment.course_id, [])
+        done = rng.randint(0, len(course_lessons))
+        completions.extend(
+            Completion(enrollment_id=enrollment.pk, lesson_id=lesson_id)
+            for lesson_id in course_lessons[:done]
+        )
+    counts['CompletedLesson'] = len(Completion.objects.bulk_create(completions, batch_size=BATCH_SIZE))
+
+    assignments = report(Assignment, Assignment.objects.bulk_create([
+        Assignment(
+            course=course,
+            title=f'Assignment {number + 1}: {_words(rng, 2)}',
+            description=_words(rng, rng.randint(10, 40)),
+            due_date=now + timedelta(days=rng.randint(-60, 60)),
+            created_by=course.created_by,
+        )
+        for course in courses
+        for number in range(rng.randint(0, 6))
+    ], batch_size=BATCH_SIZE))
+
+    files = _submission_files(rng)
+    students_by_course = {}
+    for enrollment in enrollments:
+        students_by_course.setdefault(enrollment.course_id, []).append(enrollment.student_id)
+    submissions = []
+    for assignment in assignments:
+        rate = 0.8 if assignment.due_date < now else 0.3
+        for student_id in students_by_course.get(assignment.course_id, []):
+            if rng.random() < rate:
+                name, original = rng.choice(files)
+                graded = assignment.due_date < now and rng.random() < 0.7
+                submissions.append(Submission(
+                    assignment=assignment,
+                    student_id=student_id,
+                    submitted_file=name,
+                    original_filename=original,
+                    grade=rng.randint(40, 100) if graded else None,
+                ))
+    submissions = report(Submission, Submission.objects.bulk_create(submissions, batch_size=BATCH_SIZE))
+
+    # bulk_create() skips signals: bring the counters, blob references and
+    # search index up to date the way bulk_import does.
+    recount_courses(Course.objects.filter(created_by__in=generated_users()))
+    references = {}
+    for submission in submissions:
+        name = submission.submitted_file.name
+        references[name] = references.get(name, 0) + 1
+    storage = Submission._meta.get_field('submitted_file').storage
+    for name, count in references.items():
+        blob, _ = Blob.objects.get_or_create(
+            name=name, defaults={'sha256': blob_digest(name), 'size': storage.size(name)},
+        )
+        Blob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + count)
+    index_objects(COURSE, [(c.pk, c.title, c.description, c.pk) for c in courses])
+    index_objects(LESSON, [(lesson.pk, lesson.title, lesson.content, lesson.course_id) for lesson in lessons])
+    return counts
+
+
+def _create_users(role, count, password, is_instructor):
+    users = User.objects.bulk_create([
+        User(username=f'{PREFIX}{role}-{number:06d}', password=password)
+        for number in range(count)
+    ], batch_size=BATCH_SIZE)
+    Profile.objects.bulk_create(
+        [Profile(user=user, is_instructor=is_instructor) for user in users], batch_size=BATCH_SIZE,
+    )
+    return users
+
+
+def _submission_files(rng):
+    """Store a few small PDFs and return their ``(blob name, original name)`` pairs."""
+    storage = Submission._meta.get_field('submitted_file').storage
+    files = []
+    for number in range(SUBMISSION_FILES):
+        content = b'%PDF-1.4\n' + _words(rng, 200).encode() + b'\n%%EOF\n'
+        name = storage.save('submissions/generated.pdf', ContentFile(content))
+        files.append((name, f'answer-{number + 1}.pdf'))
+    return files
+
+
+def generated_users():
+    return User.objects.filter(username__startswith=PREFIX)
+
+
+def flush():
+    """Delete every generated account together with its courses and submissions."""
+    Course.objects.filter(created_by__in=generated_users()).delete()
+    return generated_users().delete()[0]
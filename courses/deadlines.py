@@ -0,0 +1,150 @@
+"""
+Assignment deadlines: due-date reminders and closing.
+
+The `run_deadline_scheduler` command calls ``process`` whenever a deadline
+boundary passes. An assignment enters the reminder window
+``ASSIGNMENT_REMINDER_HOURS`` before it is due; its enrolled students who
+have not submitted are found in one set-based query and their reminder
+emails queued as background tasks in batches. At the due date the
+assignment is closed, which ``submit_assignment`` and the upload views
+check on the row they have already loaded.
+
+Both steps read partial (due_date, course) indexes that only hold the
+assignments still waiting for that step, so each wake-up costs the same
+however many assignments have come and gone.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .dashboards import invalidate_courses
+from .models import Assignment, Enrollment, Submission
+from .taskqueue import absolute_url, enqueue, task
+
+DEFAULT_REMINDER_HOURS = 24
+REMINDER_BATCH_SIZE = 200
+
+
+def reminder_window():
+    return timedelta(hours=getattr(settings, 'ASSIGNMENT_REMINDER_HOURS', DEFAULT_REMINDER_HOURS))
+
+
+def _unsubmitted(assignment_ids):
+    """``(assignment id, student id)`` for every enrolled student of the assignments who has not submitted."""
+    return (
+        Enrollment.objects.filter(course__assignments__in=assignment_ids)
+        .annotate(assignment_id=F('course__assignments'))
+        .exclude(Exists(Submission.objects.filter(student=OuterRef('student'), assignment=OuterRef('assignment_id'))))
+        .exclude(student__email='')
+        .values_list('assignment_id', 'student_id')
+        .order_by('assignment_id', 'student_id')
+    )
+
+
+@task(max_attempts=8)
+def send_reminders(assignment_id, student_ids):
+    """Email one batch of students that ``assignment_id`` is due soon."""
+    assignment = Assignment.objects.select_related('course').filter(pk=assignment_id).first()
+    if assignment is None or assignment.closed_at is not None:
+        return
+    # Someone may have submitted since the reminder was queued.
+    students = (
+        Enrollment.objects.filter(course=assignment.course_id, student__in=student_ids)
+        .exclude(Exists(Submission.objects.filter(student=OuterRef('student'), assignment=assignment)))
+        .values_list('student__username', 'student__email')
+    )
+    subject = f"Reminder: {assignment.title} is due {assignment.due_date:%Y-%m-%d %H:%M} UTC"
+    link = absolute_url('submit_assignment', assignment.pk)
+    send_mass_mail([
+        (subject, f"Hi {username},\n\n{assignment.title} ({assignment.course.title}) is due "
+                  f"{assignment.due_date:%Y-%m-%d %H:%M} UTC and you have not submitted yet.\n\n"
+                  f"Submit: {link}\n",
+         getattr(settings, 'DEFAULT_FROM_EMAIL', None), [email])
+        for username, email in students
+    ])
+
+
+def send_due_reminders(now):
+    """Queue reminders for the assignments entering the reminder window; return how many students."""
+    with transaction.atomic():
+        entering = list(
+            Assignment.objects.filter(reminded_at__isnull=True, due_date__lte=now + reminder_window())
+            .values_list('pk', 'due_date')
+        )
+        if not entering:
+            return 0
+        # An assignment found already past due (the scheduler was down) is
+        # closing, not due soon: mark it without reminding anyone.
+        upcoming = [pk for pk, due_date in entering if due_date > now]
+        batch, queued = [], 0
+        current = None
+        for assignment_id, student_id in _unsubmitted(upcoming) if upcoming else ():
+            if assignment_id != current or len(batch) == REMINDER_BATCH_SIZE:
+                if batch:
+                    enqueue(send_reminders, assignment_id=current, student_ids=batch)
+                current, batch = assignment_id, []
+            batch.append(student_id)
+            queued += 1
+        if batch:
+            enqueue(send_reminders, assignment_id=current, student_ids=batch)
+        Assignment.objects.filter(pk__in=[pk for pk, _ in entering]).update(reminded_at=now)
+    return queued
+
+
+def close_due_assignments(now):
+    """Close every assignment whose due date has passed; return how many."""
+    due = list(Assignment.objects.filter(closed_at__isnull=True, due_date__lte=now).values_list('pk', 'course_id'))
+    if not due:
+        return 0
+    closed = Assignment.objects.filter(pk__in=[pk for pk, _ in due], closed_at__isnull=True).update(closed_at=now)
+    # update() sends no post_save, so the course pages and dashboards
+    # showing these assignments are invalidated here.
+    invalidate_courses({course_id for _, course_id in due})
+    return closed
+
+
+def process(now=None):
+    """Run both steps; return ``(students reminded, assignments closed)``."""
+    now = now or timezone.now()
+    return send_due_reminders(now), close_due_assignments(now)
+
+
+def next_boundary(now=None):
+    """When ``process`` next has something to do, or None if nothing is scheduled."""
+    now = now or timezone.now()
+    boundaries = []
+    reminder = (
+        Assignment.objects.filter(reminded_at__isnull=True)
+        .order_by('due_date').values_list('due_date', flat=True).first()
+    )
+    if reminder is not None:
+        boundaries.append(reminder - reminder_window())
+    closing = (
+        Assignment.objects.filter(closed_at__isnull=True)
+        .order_by('due_date').values_list('due_date', flat=True).first()
+    )
+    if closing is not None:
+        boundaries.append(closing)
+    return max(min(boundaries), now) if boundaries else None
+
+
+@receiver(pre_save, sender=Assignment)
+def reschedule(sender, instance, raw=False, **kwargs):
+    # Moving the due date (say, an extension) puts the assignment back on
+    # the scheduler's lists for what it has not reached yet.
+    if raw or instance.pk is None:
+        return
+    previous = Assignment.objects.filter(pk=instance.pk).values_list('due_date', flat=True).first()
+    if previous is None or previous == instance.due_date:
+        return
+    now = timezone.now()
+    if instance.due_date > now:
+        instance.closed_at = None
+    if instance.due_date - reminder_window() > now:
+        instance.reminded_at = None
@@ -47,3 +47,18 @@ class SubmissionForm(forms.ModelForm):
     class Meta:
         model = Submission
         fields = ['submitted_file']
+
+class GradeForm(forms.Form):
+    submission_id = forms.IntegerField(widget=forms.HiddenInput)
+    grade = forms.DecimalField(max_digits=5, decimal_places=2, min_value=0, required=False)
+    feedback = forms.CharField(widget=forms.Textarea(attrs={'rows': 2}), required=False)
+
+
+GradeFormSet = forms.formset_factory(GradeForm, extra=0)
+
+
+class GradeImportForm(forms.Form):
+    grades_file = forms.FileField(
+        label="Grades CSV",
+        help_text="Columns: student (username), grade, and optionally feedback.",
+    )
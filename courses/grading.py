@@ -0,0 +1,113 @@
+"""
+Bulk grading for an assignment's submissions.
+
+Grades from the grading page or a CSV import are validated together and
+written with one bulk_update inside a single transaction, so grading a
+whole class costs a handful of queries rather than one per submission.
+"""
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .dashboards import invalidate_submissions
+from .models import Submission
+
+GRADE_FIELDS = ['grade', 'feedback']
+MAX_GRADE = Decimal('999.99')
+
+
+class GradeImportError(Exception):
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def apply_grades(submissions, changes):
+    """
+    Set ``(grade, feedback)`` from ``changes`` (keyed by submission id) on
+    ``submissions`` and save the ones that changed with a single
+    bulk_update. Return the number of submissions updated.
+    """
+    changed = []
+    for submission in submissions:
+        if submission.pk not in changes:
+            continue
+        grade, feedback = changes[submission.pk]
+        feedback = feedback or None
+        if submission.grade != grade or submission.feedback != feedback:
+            submission.grade = grade
+            submission.feedback = feedback
+            changed.append(submission)
+    if changed:
+        with transaction.atomic():
+            Submission.objects.bulk_update(changed, GRADE_FIELDS)
+            # bulk_update() sends no post_save.
+            invalidate_submissions(changed)
+    return len(changed)
+
+
+def parse_grade(value):
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        grade = Decimal(value).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"'{value}' is not a number")
+    if not grade.is_finite():
+        raise ValueError(f"'{value}' is not a number")
+    if grade < 0 or grade > MAX_GRADE:
+        raise ValueError(f"{value} is out of range")
+    return grade
+
+
+def import_grades_csv(assignment, uploaded_file):
+    """
+    Apply a CSV of ``student,grade[,feedback]`` rows to the assignment.
+
+    Each student's latest submission is graded. All students and their
+    submissions are resolved with one query, and nothing is written unless
+    every row is valid and names a different student. Return the number of submissions updated.
+    """
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    try:
+        fieldnames, records = reader.fieldnames, list(reader)
+    except UnicodeDecodeError:
+        raise GradeImportError(["The file must be UTF-8 CSV."])
+    if not fieldnames or not {'student', 'grade'} <= {f.strip().lower() for f in fieldnames}:
+        raise GradeImportError(["The CSV needs 'student' and 'grade' columns."])
+
+    rows, lines, errors = {}, {}, []
+    for line, row in enumerate(records, start=2):
+        row = {(key or '').strip().lower(): (value or '') for key, value in row.items()}
+        username = row.get('student', '').strip()
+        lines.setdefault(username, []).append(line)
+        try:
+            rows[username] = (parse_grade(row.get('grade')), row.get('feedback', '').strip())
+        except ValueError as error:
+            errors.append(f"Line {line}: {error}.")
+    # A second row for a student would silently override the first.
+    for username, numbers in lines.items():
+        if len(numbers) > 1:
+            errors.append(f"'{username}' appears more than once (lines {', '.join(map(str, numbers))}).")
+
+    latest = {}
+    submissions = (
+        assignment.submissions.filter(student__username__in=rows)
+        .select_related('student')
+        .order_by('submitted_at', 'pk')
+    )
+    for submission in submissions:
+        latest[submission.student.username] = submission
+
+    for username in rows:
+        if username not in latest:
+            errors.append(f"No submission from '{username}'.")
+    if errors:
+        raise GradeImportError(errors)
+
+    changes = {latest[username].pk: values for username, values in rows.items()}
+    return apply_grades(latest.values(), changes)
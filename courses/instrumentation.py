@@ -0,0 +1,50 @@
+"""
+SQL statement hooks that follow the request rather than the thread.
+
+``connection.execute_wrapper()`` only sees the statements of one thread's
+connection, but a request can run its queries on several threads: the
+sync_to_async thread of an async view and the workers of
+courses.concurrency. ``observe(hook)`` instead puts ``hook`` in a context
+variable, which asyncio and sync_to_async carry along with the request,
+and a single wrapper installed on every connection passes each statement
+through the hooks of whichever request is running it.
+
+A hook has the signature of an execute wrapper. It may be called from
+several threads at once and has to lock what it updates.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_hooks = ContextVar('courses_sql_hooks', default=())
+
+
+def _dispatch(execute, sql, params, many, context):
+    hooks = _hooks.get()
+    for hook in reversed(hooks):
+        execute = partial(hook, execute)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install(sender, connection, **kwargs):
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch)
+
+
+@contextmanager
+def observe(hook):
+    """Pass every statement run in this context, on any thread, through ``hook``."""
+    # Connections opened before this module was imported never sent
+    # connection_created to install().
+    for connection in connections.all(initialized_only=True):
+        install(None, connection)
+    token = _hooks.set(_hooks.get() + (hook,))
+    try:
+        yield hook
+    finally:
+        _hooks.reset(token)
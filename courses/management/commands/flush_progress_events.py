@@ -0,0 +1,45 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from courses import progress_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Write buffered lesson progress events to the database every few seconds. Only useful "
+        "with a cache shared between processes; each web process also flushes its own buffer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help="Seconds between flushes (default: PROGRESS_FLUSH_INTERVAL).",
+        )
+        parser.add_argument('--once', action='store_true', help="Flush once and exit.")
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or progress_events.flush_interval()
+        if interval <= 0:
+            raise CommandError("--interval must be positive.")
+        self.wake = threading.Event()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.stopping = False
+
+        while True:
+            close_old_connections()
+            flushed = progress_events.flush()
+            if flushed:
+                self.stdout.write(f"Flushed {flushed} progress event(s).")
+            # A stop request still gets one last flush, above.
+            if options['once'] or self.stopping:
+                break
+            self.wake.wait(interval)
+        close_old_connections()
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        self.wake.set()
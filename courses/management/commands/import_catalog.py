@@ -0,0 +1,137 @@
+import csv
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from courses.bulk_import import IMPORTERS
+
+# Courses first, so lessons and enrollments in the same batch can refer to them.
+TYPE_ORDER = ('course', 'lesson', 'enrollment')
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import courses, lessons and enrollments from a JSONL or CSV file, "
+        "in batched transactions that can be resumed after a failure."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSONL or CSV file to import.")
+        parser.add_argument(
+            '--type', choices=TYPE_ORDER,
+            help="Row type. Required for CSV; JSONL rows may carry their own 'type'.",
+        )
+        parser.add_argument('--format', choices=('jsonl', 'csv'), help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per transaction (default: 2000).")
+        parser.add_argument(
+            '--resume', action='store_true',
+            help="Skip the rows already committed according to the checkpoint file.",
+        )
+        parser.add_argument('--checkpoint', help="Checkpoint file (default: <path>.checkpoint).")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist.")
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        if file_format == 'csv' and not options['type']:
+            raise CommandError("--type is required for CSV input.")
+        checkpoint_path = options['checkpoint'] or f"{path}.checkpoint"
+
+        start_line = 0
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as checkpoint:
+                start_line = json.load(checkpoint)['line']
+            self.stdout.write(f"Resuming after line {start_line}.")
+
+        self.created = dict.fromkeys(TYPE_ORDER, 0)
+        self.errors = 0
+        self.rows = 0
+        self.started = time.monotonic()
+
+        with open(path, newline='', encoding='utf-8-sig') as source:
+            rows = self.read_csv(source) if file_format == 'csv' else self.read_jsonl(source)
+            batch = []
+            for line, row in rows:
+                if line <= start_line:
+                    continue
+                batch.append((line, row))
+                if len(batch) >= options['batch_size']:
+                    self.import_batch(batch, options['type'], checkpoint_path)
+                    batch = []
+            if batch:
+                self.import_batch(batch, options['type'], checkpoint_path)
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        summary = ', '.join(f"{count} {kind}(s)" for kind, count in self.created.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {self.rows} row(s) read, created {summary}, {self.errors} error(s) "
+            f"in {time.monotonic() - self.started:.1f}s."
+        ))
+
+    def read_csv(self, source):
+        reader = csv.DictReader(source)
+        for row in reader:
+            yield reader.line_num, row
+
+    def read_jsonl(self, source):
+        for line, text in enumerate(source, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as error:
+                row = {'_error': f"Invalid JSON: {error}"}
+            yield line, row
+
+    def import_batch(self, batch, default_type, checkpoint_path):
+        by_type = {kind: [] for kind in TYPE_ORDER}
+        errors = []
+        for line, row in batch:
+            if not isinstance(row, dict):
+                errors.append((line, "Expected a JSON object."))
+                continue
+            kind = row.get('type') or default_type
+            if '_error' in row:
+                errors.append((line, row['_error']))
+            elif kind not in by_type:
+                errors.append((line, f"Unknown row type '{kind}'."))
+            else:
+                by_type[kind].append((line, row))
+
+        with transaction.atomic():
+            for kind in TYPE_ORDER:
+                if by_type[kind]:
+                    created, kind_errors = IMPORTERS[kind](by_type[kind])
+                    self.created[kind] += created
+                    errors.extend(kind_errors)
+
+        # Only record progress once the batch is committed. A crash in
+        # between only means the batch is read again, and every row kind
+        # skips what already exists.
+        last_line = batch[-1][0]
+        self.write_checkpoint(checkpoint_path, last_line)
+
+        for line, message in sorted(errors):
+            self.stderr.write(f"Line {line}: {message}")
+        self.errors += len(errors)
+        self.rows += len(batch)
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f"Line {last_line}: {self.rows} row(s), {sum(self.created.values())} created, "
+            f"{self.errors} error(s), {self.rows / elapsed if elapsed else 0:.0f} rows/s"
+        )
+
+    def write_checkpoint(self, checkpoint_path, line):
+        # Through a temporary file, so a crash mid-write leaves the previous
+        # checkpoint rather than a truncated one.
+        temp_path = f"{checkpoint_path}.tmp"
+        with open(temp_path, 'w') as checkpoint:
+            json.dump({'line': line}, checkpoint)
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(temp_path, checkpoint_path)
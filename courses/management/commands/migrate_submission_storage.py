@@ -0,0 +1,91 @@
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from courses.models import Blob, Submission
+from courses.storage import blob_digest
+
+
+class Command(BaseCommand):
+    help = (
+        "Move legacy submission files into content-addressed storage, "
+        "deduplicating identical files, and recount blob references."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report what would change without touching files or rows.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        storage = Submission._meta.get_field('submitted_file').storage
+
+        legacy = [
+            (pk, name, original)
+            for pk, name, original in Submission.objects.order_by('pk')
+            .values_list('pk', 'submitted_file', 'original_filename').iterator()
+            if name and blob_digest(name) is None
+        ]
+        converted, missing, old_names = 0, 0, set()
+        for pk, name, original in legacy:
+            if not storage.exists(name):
+                missing += 1
+                self.stderr.write(f"Submission {pk}: file {name} is missing, skipped.")
+                continue
+            if dry_run:
+                converted += 1
+                continue
+            with storage.open(name, 'rb') as legacy_file:
+                new_name = storage.save(name, File(legacy_file, name=os.path.basename(name)))
+            Submission.objects.filter(pk=pk).update(
+                submitted_file=new_name,
+                original_filename=original or os.path.basename(name),
+            )
+            old_names.add(name)
+            converted += 1
+
+        if not dry_run:
+            still_referenced = set(
+                Submission.objects.filter(submitted_file__in=old_names)
+                .values_list('submitted_file', flat=True)
+            )
+            for name in old_names - still_referenced:
+                storage.delete(name)
+
+        recounted, removed = (0, 0) if dry_run else self.recount_blobs(storage)
+        self.stdout.write(self.style.SUCCESS(
+            f"{converted} file(s) {'to convert' if dry_run else 'converted'}, "
+            f"{missing} missing, {recounted} blob count(s) fixed, {removed} unreferenced blob(s) removed."
+        ))
+
+    def recount_blobs(self, storage):
+        references = {
+            name: count
+            for name, count in Submission.objects.order_by()
+            .values('submitted_file').annotate(n=Count('pk'))
+            .values_list('submitted_file', 'n')
+            if blob_digest(name)
+        }
+        recounted = 0
+        with transaction.atomic():
+            blobs = {blob.name: blob for blob in Blob.objects.all()}
+            for name, count in references.items():
+                blob = blobs.pop(name, None)
+                if blob is None:
+                    Blob.objects.create(
+                        name=name, sha256=blob_digest(name), size=storage.size(name), ref_count=count,
+                    )
+                    recounted += 1
+                elif blob.ref_count != count:
+                    Blob.objects.filter(pk=blob.pk).update(ref_count=count)
+                    recounted += 1
+            unreferenced = list(blobs)
+            Blob.objects.filter(name__in=unreferenced).delete()
+        for name in unreferenced:
+            storage.delete(name)
+        return recounted, len(unreferenced)
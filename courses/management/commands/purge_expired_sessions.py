@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.sessions import PURGE_BATCH_SIZE, purge_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions from the database in batches, pausing in between so "
+        "requests waiting to write are not held up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=PURGE_BATCH_SIZE,
+            help=f"Sessions deleted per transaction (default: {PURGE_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help="Seconds to wait between batches (default: 0.1).",
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        purged = purge_expired(options['batch_size'], options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} expired session(s)."))
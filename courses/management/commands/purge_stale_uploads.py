@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from courses.models import UploadSession
+from courses.uploads import discard_upload
+
+
+class Command(BaseCommand):
+    help = "Delete chunked upload sessions, and their partial files, that have been idle too long."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=24,
+            help="Idle time after which a session is discarded (default: 24).",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        purged = 0
+        for upload in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+            discard_upload(upload)
+            purged += 1
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} stale upload session(s)."))
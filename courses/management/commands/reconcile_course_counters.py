@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from courses.counters import count_subquery, recount_courses
+from courses.models import Course, Enrollment, Lesson
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Recompute Course.student_count and Course.lesson_count from the source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only report courses whose counters have drifted.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = Course.objects.annotate(
+                actual_students=count_subquery(Enrollment),
+                actual_lessons=count_subquery(Lesson),
+            ).filter(
+                ~Q(student_count=F('actual_students')) | ~Q(lesson_count=F('actual_lessons'))
+            )
+            rows = list(drifted.values_list(
+                'id', 'student_count', 'actual_students', 'lesson_count', 'actual_lessons'
+            ))
+            for course_id, students, actual_students, lessons, actual_lessons in rows:
+                self.stdout.write(
+                    f"Course {course_id}: students {students} -> {actual_students}, "
+                    f"lessons {lessons} -> {actual_lessons}"
+                )
+
+            if not options['dry_run']:
+                ids = [row[0] for row in rows]
+                for start in range(0, len(ids), BATCH_SIZE):
+                    recount_courses(Course.objects.filter(id__in=ids[start:start + BATCH_SIZE]))
+
+        verb = "found" if options['dry_run'] else "repaired"
+        self.stdout.write(self.style.SUCCESS(f"{len(rows)} course(s) with drifted counters {verb}."))
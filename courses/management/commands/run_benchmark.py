@@ -0,0 +1,101 @@
+import json
+import subprocess
+import sys
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from courses import benchmark
+from courses.models import Course, Enrollment, Submission
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every route in courses.urls through the test client and report "
+        "p50/p95/p99 latency and query counts as JSON. The run is one rolled-back "
+        "transaction, so read-replica routing and commits are not measured."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help="Timed requests per route (default: 50).")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per route (default: 5).")
+        parser.add_argument(
+            '--route', action='append', dest='routes', metavar='NAME',
+            help="Only benchmark this URL name. May be repeated.",
+        )
+        parser.add_argument('--host', default='localhost', help="Host header to send (default: localhost).")
+        parser.add_argument('--output', help="Write the JSON report here instead of to stdout.")
+        parser.add_argument('--compare', metavar='REPORT', help="An earlier JSON report to compare against.")
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        known = {name for name, _ in benchmark.course_routes()}
+        unknown = set(options['routes'] or ()) - known
+        if unknown:
+            raise CommandError(f"Unknown route(s): {', '.join(sorted(unknown))}.")
+
+        # Progress goes to stderr when the report itself is printed to stdout.
+        progress = self.stdout if options['output'] else self.stderr
+        try:
+            results = benchmark.run(
+                iterations=options['iterations'], warmup=options['warmup'],
+                host=options['host'], only=options['routes'], stdout=progress,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        progress.write(f"Not measured: {benchmark.NOT_MEASURED}.")
+
+        report = {
+            'commit': self.git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'python': sys.version.split()[0],
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+            'rows': {
+                'courses': Course.objects.count(),
+                'enrollments': Enrollment.objects.count(),
+                'submissions': Submission.objects.count(),
+            },
+            **results,
+        }
+        if options['compare']:
+            self.compare(report, options['compare'], progress)
+
+        text = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(text + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}."))
+        else:
+            self.stdout.write(text)
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def compare(self, report, path, out):
+        try:
+            with open(path) as baseline_file:
+                baseline = json.load(baseline_file)['routes']
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f"Cannot read {path}: {error}")
+        out.write(f"Compared with {path}:")
+        for name, stats in report['routes'].items():
+            before = baseline.get(name)
+            if not before or 'skipped' in before or 'skipped' in stats:
+                continue
+            change = (stats['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0
+            out.write(
+                f"{name:28} p50 {before['p50_ms']:8.2f} -> {stats['p50_ms']:8.2f}ms ({change:+.0f}%)  "
+                f"queries {before['queries']} -> {stats['queries']}"
+            )
@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the async dashboard and student_assignments views through the ASGI application "
+        "to many concurrent students, with their queries run serially and then concurrently, "
+        "and report latency and throughput as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help="Concurrent students (default: 50).")
+        parser.add_argument('--requests', type=int, default=20, help="Timed requests per student (default: 20).")
+        parser.add_argument(
+            '--route', action='append', dest='routes', metavar='NAME', choices=benchmark.CONCURRENT_ROUTES,
+            help="Only benchmark this URL name. May be repeated.",
+        )
+        parser.add_argument('--host', default='localhost', help="Host header to send (default: localhost).")
+        parser.add_argument('--output', help="Write the JSON report here instead of to stdout.")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['requests'] < 1:
+            raise CommandError("--users and --requests must be at least 1.")
+
+        progress = self.stdout if options['output'] else self.stderr
+        try:
+            report = benchmark.run_concurrent(
+                users=options['users'], requests_per_user=options['requests'],
+                host=options['host'], only=options['routes'], stdout=progress,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        text = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(text + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}."))
+        else:
+            self.stdout.write(text)
@@ -0,0 +1,47 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from courses import deadlines
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue due-date reminders and close assignments at their due date, sleeping until "
+        "the next deadline boundary in between."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-sleep', type=float, default=300,
+            help="Longest sleep, in seconds, so new or moved deadlines are noticed (default: 300).",
+        )
+        parser.add_argument('--once', action='store_true', help="Process the current deadlines and exit.")
+
+    def handle(self, *args, **options):
+        if options['max_sleep'] <= 0:
+            raise CommandError("--max-sleep must be positive.")
+        self.wake = threading.Event()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.stopping = False
+
+        while not self.stopping:
+            close_old_connections()
+            reminded, closed = deadlines.process()
+            if reminded or closed:
+                self.stdout.write(f"Queued reminders for {reminded} student(s), closed {closed} assignment(s).")
+            if options['once']:
+                break
+            now = timezone.now()
+            boundary = deadlines.next_boundary(now)
+            sleep = options['max_sleep'] if boundary is None else (boundary - now).total_seconds()
+            self.wake.wait(min(max(sleep, 0), options['max_sleep']))
+        close_old_connections()
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        self.wake.set()
@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+# This module is imported by the spawned worker processes before Django is
+# set up, so it must not import models at import time.
+
+WORKER_DIED = "The worker process died while this task was running (or the pool it ran in broke)."
+
+
+def _start_worker():
+    # Spawned processes start from scratch: set Django up once per process.
+    django.setup()
+    # Ctrl-C goes to the whole process group; let the parent decide when
+    # the children stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _execute(name, payload):
+    from courses.taskqueue import execute
+    return execute(name, payload)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background tasks (courses.taskqueue) in a pool of worker processes, "
+        "retrying failures with backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help="Worker processes (default: one per CPU).",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help="Seconds to wait between polls when the queue is empty (default: 1).",
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help="Exit once no task is due instead of waiting for more.",
+        )
+
+    def handle(self, *args, **options):
+        from courses import taskqueue
+
+        processes = options['processes']
+        if processes < 1:
+            raise CommandError("--processes must be at least 1.")
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        ran = failed = 0
+        pool = self.start_pool(processes)
+        running = {}
+        try:
+            while running or not self.stopping:
+                close_old_connections()
+                broken = False
+                if not self.stopping and len(running) < processes:
+                    for pk, token, name, payload in taskqueue.claim(processes - len(running)):
+                        try:
+                            running[pool.submit(_execute, name, payload)] = (pk, token, name)
+                        except BrokenProcessPool:
+                            # Give the claim back for a retry.
+                            taskqueue.complete(pk, token, WORKER_DIED)
+                            broken = True
+                if not running and not broken:
+                    if options['burst']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    pk, token, name = running.pop(future)
+                    try:
+                        error = future.result()
+                    except BrokenProcessPool:
+                        # A worker was killed (out of memory, a crash in a
+                        # parser): the task is retried with backoff, and
+                        # fails for good if it keeps taking workers down.
+                        error = WORKER_DIED
+                        broken = True
+                    taskqueue.complete(pk, token, error)
+                    ran += 1
+                    if error is not None:
+                        failed += 1
+                        self.stderr.write(f"Task {pk} ({name}) failed.")
+                if broken:
+                    # Every task still in the broken pool is lost with it.
+                    for pk, token, name in running.values():
+                        taskqueue.complete(pk, token, WORKER_DIED)
+                        self.stderr.write(f"Task {pk} ({name}) was lost with its worker; it will be retried.")
+                    running.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self.stderr.write("A worker process died; starting a new pool.")
+                    pool = self.start_pool(processes)
+        finally:
+            pool.shutdown()
+        close_old_connections()
+        self.stdout.write(self.style.SUCCESS(f"Ran {ran} task(s), {failed} failed."))
+
+    def start_pool(self, processes):
+        # 'spawn' rather than fork, so no child inherits the parent's
+        # database connections.
+        return ProcessPoolExecutor(
+            processes, mp_context=multiprocessing.get_context('spawn'), initializer=_start_worker,
+        )
+
+    def stop(self, signum, frame):
+        # Finish the tasks in hand, claim no more.
+        self.stopping = True
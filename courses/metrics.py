@@ -0,0 +1,292 @@
+"""
+In-process runtime metrics, exposed in the Prometheus text format.
+
+``MetricsMiddleware`` times every request and the SQL it runs, labelled by
+URL name. The template backend below times each top-level template render,
+and the cache, upload, progress and login code report hits, misses, bytes
+and events through ``record_cache``, ``record_upload``, ``record_progress``
+and ``record_login``. Everything is aggregated in one registry shared by
+all threads of the process; each update takes a single uncontended lock,
+which keeps recording to a few microseconds per request. Each process
+exposes its own numbers, which Prometheus sums across processes.
+"""
+import bisect
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.template.backends.django import DjangoTemplates
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from .instrumentation import observe
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# name -> (type, help, label names, histogram buckets)
+METRICS = {
+    'minimoodle_http_requests_total': (
+        'counter', 'Requests handled.', ('view', 'method', 'status'), None),
+    'minimoodle_http_request_duration_seconds': (
+        'histogram', 'Time from the first middleware to the response.', ('view', 'method'), LATENCY_BUCKETS),
+    'minimoodle_db_queries_per_request': (
+        'histogram', 'SQL statements run per request.', ('view',), QUERY_COUNT_BUCKETS),
+    'minimoodle_db_query_duration_seconds_total': (
+        'counter', 'Time spent executing SQL.', ('view',), None),
+    'minimoodle_template_render_duration_seconds': (
+        'histogram', 'Time to render a top-level template.', ('template',), LATENCY_BUCKETS),
+    'minimoodle_cache_requests_total': (
+        'counter', 'Cache lookups by result (hit or miss).', ('cache', 'result'), None),
+    'minimoodle_upload_bytes_total': (
+        'counter', 'Bytes of submission files received.', ('kind',), None),
+    'minimoodle_progress_events_total': (
+        'counter', 'Lesson progress events by outcome (buffered, coalesced, flushed).', ('result',), None),
+    'minimoodle_login_attempts_total': (
+        'counter', 'Password checks by outcome (hashed, queued, throttled, rejected).', ('result',), None),
+}
+
+
+class _Histogram:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (metric name, label values) -> number or _Histogram
+        self._values = {}
+
+    def _histogram(self, name, labels):
+        histogram = self._values.get((name, labels))
+        if histogram is None:
+            histogram = self._values[(name, labels)] = _Histogram(METRICS[name][3])
+        return histogram
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            self._histogram(name, labels).observe(value)
+
+    def record_request(self, view, method, status, seconds, queries, db_seconds):
+        requests_key = ('minimoodle_http_requests_total', (view, method, status))
+        db_key = ('minimoodle_db_query_duration_seconds_total', (view,))
+        with self._lock:
+            self._values[requests_key] = self._values.get(requests_key, 0) + 1
+            self._values[db_key] = self._values.get(db_key, 0) + db_seconds
+            self._histogram('minimoodle_http_request_duration_seconds', (view, method)).observe(seconds)
+            self._histogram('minimoodle_db_queries_per_request', (view,)).observe(queries)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: (_copy_histogram(value) if isinstance(value, _Histogram) else value)
+                for key, value in self._values.items()
+            }
+
+
+def _copy_histogram(histogram):
+    copy = _Histogram(histogram.bounds)
+    copy.counts = list(histogram.counts)
+    copy.sum = histogram.sum
+    return copy
+
+
+registry = Registry()
+
+
+def record_cache(cache_name, hit):
+    registry.inc('minimoodle_cache_requests_total', (cache_name, 'hit' if hit else 'miss'))
+
+
+def record_upload(kind, size):
+    if size:
+        registry.inc('minimoodle_upload_bytes_total', (kind,), size)
+
+
+def record_progress(result, count=1):
+    registry.inc('minimoodle_progress_events_total', (result,), count)
+
+
+def record_login(result):
+    registry.inc('minimoodle_login_attempts_total', (result,))
+
+
+class _QueryTimer:
+    """A statement hook (courses.instrumentation) that only counts and times statements."""
+
+    __slots__ = ('count', 'duration', '_lock')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # Async views can run their queries on several threads at once.
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.duration += elapsed
+                self.count += 1
+
+
+class MetricsMiddleware:
+    """Install first in MIDDLEWARE so the latency covers the whole stack."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with observe(_QueryTimer()) as timer:
+            response = self.get_response(request)
+        self.record(request, response, started, timer)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with observe(_QueryTimer()) as timer:
+            response = await self.get_response(request)
+        self.record(request, response, started, timer)
+        return response
+
+    def record(self, request, response, started, timer):
+        match = request.resolver_match
+        registry.record_request(
+            (match.url_name or 'unnamed') if match else 'unresolved',
+            request.method,
+            str(response.status_code),
+            time.perf_counter() - started,
+            timer.count,
+            timer.duration,
+        )
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            registry.observe(
+                'minimoodle_template_render_duration_seconds',
+                (self.template.origin.template_name or 'unknown',),
+                time.perf_counter() - started,
+            )
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing every template it renders."""
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+def _url_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if getattr(pattern.urlconf_name, '__name__', None) in ('courses.urls', 'minimoodle.urls'):
+                yield from _url_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern.name
+
+
+_known_views = None
+
+
+def known_views():
+    """Every URL name in courses.urls and minimoodle.urls."""
+    global _known_views
+    if _known_views is None:
+        _known_views = sorted(set(_url_names(get_resolver().url_patterns)))
+    return _known_views
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(values=None):
+    values = registry.snapshot() if values is None else values
+    # Every known view gets a series, so a view that has not been hit yet
+    # reads as zero rather than missing.
+    for view in known_views():
+        key = ('minimoodle_http_request_duration_seconds', (view, 'GET'))
+        if key not in values:
+            values[key] = _Histogram(LATENCY_BUCKETS)
+
+    by_metric = {}
+    for (name, labels), value in values.items():
+        by_metric.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, (kind, help_text, label_names, _) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(by_metric.get(name, ())):
+            if kind == 'histogram':
+                cumulative = 0
+                for bound, count in zip(value.bounds + (float('inf'),), value.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _number(float(bound))
+                    lines.append(f'{name}_bucket{_labels(label_names, labels, [("le", le)])} {cumulative}')
+                lines.append(f'{name}_sum{_labels(label_names, labels)} {_number(value.sum)}')
+                lines.append(f'{name}_count{_labels(label_names, labels)} {cumulative}')
+            else:
+                lines.append(f'{name}{_labels(label_names, labels)} {_number(value)}')
+
+    # Hit ratios derived from the cache counters, for dashboards that
+    # cannot compute them.
+    lines.append('# HELP minimoodle_cache_hit_ratio Share of cache lookups that were hits.')
+    lines.append('# TYPE minimoodle_cache_hit_ratio gauge')
+    lookups = {}
+    for (cache_name, result), count in by_metric.get('minimoodle_cache_requests_total', ()):
+        lookups.setdefault(cache_name, {})[result] = count
+    for cache_name, counts in sorted(lookups.items()):
+        total = counts.get('hit', 0) + counts.get('miss', 0)
+        lines.append(f'minimoodle_cache_hit_ratio{_labels(("cache",), (cache_name,))} '
+                     f'{_number(counts.get("hit", 0) / total if total else 0.0)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:57
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count_subquery(model, course_field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{course_field: OuterRef('pk')})
+        .order_by()
+        .values(course_field)
+        .annotate(n=Count('pk'))
+        .values('n')
+    ), 0)
+
+
+def populate_counters(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Lesson = apps.get_model('courses', 'Lesson')
+    Course.objects.update(
+        student_count=_count_subquery(Enrollment, 'course'),
+        lesson_count=_count_subquery(Lesson, 'course'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_assignment_submission'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='student_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['student_count'], name='course_student_count_idx'),
+        ),
+    ]
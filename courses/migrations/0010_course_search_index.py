@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS courses_search USING fts5("
+        "title, body, course_id UNINDEXED, tokenize = 'porter unicode61')"
+    )
+    # Rank titles well above bodies; ORDER BY rank then uses this weighting.
+    schema_editor.execute(
+        "INSERT INTO courses_search (courses_search, rank) VALUES ('rank', 'bm25(10.0, 1.0, 0.0)')"
+    )
+    schema_editor.execute(
+        "INSERT INTO courses_search (rowid, title, body, course_id) "
+        "SELECT id * 2, title, description, id FROM courses_course"
+    )
+    schema_editor.execute(
+        "INSERT INTO courses_search (rowid, title, body, course_id) "
+        "SELECT id * 2 + 1, title, content, course_id FROM courses_lesson"
+    )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS courses_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_course_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:14
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def merge_duplicate_enrollments(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Completed = Enrollment.completed_lessons.through
+
+    duplicates = (
+        Enrollment.objects.values('student', 'course')
+        .annotate(n=Count('id'), keep=Min('id'))
+        .filter(n__gt=1)
+    )
+    affected_courses = set()
+    for row in duplicates:
+        extra = Enrollment.objects.filter(student=row['student'], course=row['course']).exclude(id=row['keep'])
+        lesson_ids = set(Completed.objects.filter(enrollment__in=extra).values_list('lesson_id', flat=True))
+        lesson_ids -= set(Completed.objects.filter(enrollment_id=row['keep']).values_list('lesson_id', flat=True))
+        Completed.objects.bulk_create([Completed(enrollment_id=row['keep'], lesson_id=pk) for pk in lesson_ids])
+        extra.delete()
+        affected_courses.add(row['course'])
+
+    Course.objects.filter(pk__in=affected_courses).update(student_count=Coalesce(Subquery(
+        Enrollment.objects.filter(course=OuterRef('pk')).order_by().values('course')
+        .annotate(n=Count('pk')).values('n')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_upload_session'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='external_id',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True, unique=True),
+        ),
+        migrations.RunPython(merge_duplicate_enrollments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='enrollment',
+            constraint=models.UniqueConstraint(fields=('student', 'course'), name='unique_enrollment'),
+        ),
+    ]
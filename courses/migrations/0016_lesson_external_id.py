@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_assignment_deadlines'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='external_id',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True, unique=True),
+        ),
+    ]
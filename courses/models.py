@@ -1,9 +1,14 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
+from .storage import submission_storage
+
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -29,20 +34,37 @@ class Course(models.Model):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Stable key from an external catalog, set by `manage.py import_catalog`.
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True, editable=False)
+    # Denormalized counters, maintained by the Enrollment/Lesson signals below.
+    # Run `manage.py reconcile_course_counters` to repair any drift.
+    student_count = models.PositiveIntegerField(default=0, editable=False)
+    lesson_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student_count'], name='course_student_count_idx'),
+            models.Index(fields=['created_at'], name='course_created_at_idx'),
+            models.Index(fields=['category', 'student_count'], name='course_cat_student_count_idx'),
+            models.Index(fields=['category', 'created_at'], name='course_cat_created_at_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
-    @property
-    def student_count(self):
-        return self.enrollment_set.count()  
-
 
 class Lesson(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     video_url = models.URLField(blank=True, null=True)
     course = models.ForeignKey(Course, related_name='lessons', on_delete=models.CASCADE)
+    # Stable key from an external catalog, set by `manage.py import_catalog`.
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        # One transaction with the course counter update (see below).
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -53,9 +75,60 @@ class Enrollment(models.Model):
     completed_lessons = models.ManyToManyField(Lesson, blank=True)
     enrolled_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'course'], name='unique_enrollment'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # One transaction with the course counter update (see below).
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.student.username} - {self.course.title}"
 
+# Course counter for each counted model.
+COURSE_COUNTERS = {'enrollment': 'student_count', 'lesson': 'lesson_count'}
+
+
+def _bump_course_counter(course_id, field, delta):
+    # A single UPDATE ... SET n = n + delta is atomic and race free. It runs
+    # in the transaction of the write that triggered it: save() above opens
+    # one, and deletes always run in one.
+    courses = Course.objects.filter(pk=course_id)
+    if delta < 0:
+        courses = courses.filter(**{f'{field}__gt': 0})
+    courses.update(**{field: F(field) + delta})
+
+@receiver(pre_save, sender=Enrollment)
+@receiver(pre_save, sender=Lesson)
+def remember_counted_course(sender, instance, raw=False, **kwargs):
+    # An update may move the row to another course, which then has to
+    # take the count along.
+    if not raw and not instance._state.adding:
+        instance._counted_course_id = (
+            sender.objects.filter(pk=instance.pk).values_list('course_id', flat=True).first()
+        )
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_save, sender=Lesson)
+def count_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    field = COURSE_COUNTERS[sender._meta.model_name]
+    previous_course_id = instance.__dict__.pop('_counted_course_id', None)
+    if created:
+        _bump_course_counter(instance.course_id, field, 1)
+    elif previous_course_id is not None and previous_course_id != instance.course_id:
+        _bump_course_counter(previous_course_id, field, -1)
+        _bump_course_counter(instance.course_id, field, 1)
+
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_delete, sender=Lesson)
+def count_deleted(sender, instance, **kwargs):
+    _bump_course_counter(instance.course_id, COURSE_COUNTERS[sender._meta.model_name], -1)
+
 class Assignment(models.Model):
     course = models.ForeignKey(Course, related_name='assignments', on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
@@ -63,6 +136,25 @@ class Assignment(models.Model):
     due_date = models.DateTimeField()
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set by the deadline scheduler (courses.deadlines): when due-date
+    # reminders went out, and when the assignment stopped taking submissions.
+    reminded_at = models.DateTimeField(null=True, blank=True, editable=False)
+    closed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['course', 'due_date'], name='assignment_course_due_idx'),
+            # The scheduler's work lists. Partial, so they only hold the
+            # assignments it has yet to act on however long the history.
+            models.Index(
+                fields=['due_date', 'course'], name='assignment_unreminded_due_idx',
+                condition=models.Q(reminded_at__isnull=True),
+            ),
+            models.Index(
+                fields=['due_date', 'course'], name='assignment_open_due_idx',
+                condition=models.Q(closed_at__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.course.title})"
@@ -71,10 +163,86 @@ class Assignment(models.Model):
 class Submission(models.Model):
     assignment = models.ForeignKey(Assignment, related_name='submissions', on_delete=models.CASCADE)
     student = models.ForeignKey(User, related_name='submissions', on_delete=models.CASCADE)
-    submitted_file = models.FileField(upload_to='submissions/')
+    submitted_file = models.FileField(upload_to='submissions/', storage=submission_storage, max_length=255)
+    original_filename = models.CharField(max_length=255, blank=True)
     submitted_at = models.DateTimeField(auto_now_add=True)
     grade = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     feedback = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'assignment'], name='submission_student_asgmt_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.username} - {self.assignment.title}"
+
+
+class Blob(models.Model):
+    """A content-addressed file shared by every Submission with the same bytes."""
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class UploadSession(models.Model):
+    """A resumable, chunked upload that becomes a Submission once finalized."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    assignment = models.ForeignKey(Assignment, related_name='upload_sessions', on_delete=models.CASCADE)
+    student = models.ForeignKey(User, related_name='upload_sessions', on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    submission = models.OneToOneField(Submission, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+
+class SubmissionAnalysis(models.Model):
+    """What post-submission processing (courses.tasks) found out about a submitted file."""
+    submission = models.OneToOneField(Submission, related_name='analysis', on_delete=models.CASCADE)
+    sha256 = models.CharField(max_length=64, blank=True)
+    # Whether the stored bytes still hash to the digest they were filed under.
+    checksum_ok = models.BooleanField(null=True)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    # Extracted for plagiarism checks.
+    text = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Analysis of submission {self.submission_id}"
+
+
+class Task(models.Model):
+    """A unit of background work, run by the `run_task_worker` command (see courses.taskqueue)."""
+    QUEUED = 'queued'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # A queued task is claimable from this time on; claiming pushes it out
+    # by the visibility timeout, so a task whose worker died reappears.
+    available_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.UUIDField(null=True, blank=True, editable=False)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='task_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status}, attempt {self.attempts}/{self.max_attempts})"
@@ -0,0 +1,165 @@
+"""
+Full-page cache for anonymous visitors to the catalog pages.
+
+Every cached page names the version keys it was rendered from (the
+catalog, a category's courses, a course, the category list). The ETag is
+a hash of the path and those versions, and Last-Modified is the latest
+time any of them was bumped, so both can be computed, and a conditional
+request answered with 304, without rendering anything. A page whose
+versions have not moved is served from the cache; the signal receivers
+below, and those in courses.dashboards and courses.caching, bump the
+versions on Course, Lesson, Assignment, Category and Enrollment writes,
+and when an instructor's username changes.
+
+Only requests without a session or messages cookie are cached, so nothing
+personal can leak between visitors.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .caching import CATEGORIES_VERSION_KEY, COURSE_VERSION_KEY, get_versions_modified, invalidate
+from .metrics import record_cache
+from .models import Course, Enrollment
+
+PAGE_KEY = 'courses:page:%s'
+# Every listing of courses: the home pages and the full catalog.
+CATALOG_VERSION_KEY = 'courses:catalog:version'
+CATEGORY_VERSION_KEY = 'courses:category:%s:version'
+PAGE_TIMEOUT = 60 * 60
+MESSAGES_COOKIE = 'messages'
+
+
+def catalog_dependencies(request, **kwargs):
+    return [CATALOG_VERSION_KEY, CATEGORIES_VERSION_KEY]
+
+
+def category_dependencies(request, category_id, **kwargs):
+    return [CATEGORY_VERSION_KEY % category_id, CATEGORIES_VERSION_KEY]
+
+
+def course_dependencies(request, course_id, **kwargs):
+    return [COURSE_VERSION_KEY % course_id, CATEGORIES_VERSION_KEY]
+
+
+def _cacheable(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and MESSAGES_COOKIE not in request.COOKIES
+    )
+
+
+def _finish(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Browsers revalidate every time; a 304 costs one cache round trip.
+    response['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def anonymous_page_cache(dependencies):
+    """
+    Cache the view's page for anonymous visitors. ``dependencies(request,
+    **view_kwargs)`` returns the version keys the page is rendered from.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _cacheable(request):
+                return view(request, *args, **kwargs)
+
+            full_path = request.get_full_path()
+            # Versions are read before rendering, so a write that lands
+            # while the page renders leaves the stored copy already stale.
+            versions, last_modified = get_versions_modified(dependencies(request, **kwargs))
+            digest = hashlib.sha256(full_path.encode())
+            for key in sorted(versions):
+                digest.update(f'|{key}={versions[key]}'.encode())
+            etag = '"%s"' % digest.hexdigest()[:32]
+            key = PAGE_KEY % hashlib.sha256(full_path.encode()).hexdigest()
+
+            conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if conditional is not None:
+                record_cache('page', hit=True)
+                return _finish(conditional, etag, last_modified)
+
+            entry = cache.get(key)
+            if entry is not None and entry[0] == etag:
+                record_cache('page', hit=True)
+                _, _, content, content_type = entry
+                return _finish(HttpResponse(content, content_type=content_type), etag, last_modified)
+            record_cache('page', hit=False)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming or response.cookies:
+                return response
+            cache.set(key, (etag, last_modified, response.content, response['Content-Type']), PAGE_TIMEOUT)
+            return _finish(response, etag, last_modified)
+        return wrapper
+    return decorator
+
+
+def invalidate_listings(category_ids):
+    """Invalidate the course listings: the catalog and the pages of ``category_ids``."""
+    invalidate(CATALOG_VERSION_KEY, *(CATEGORY_VERSION_KEY % pk for pk in set(category_ids) if pk is not None))
+
+
+@receiver(pre_save, sender=Course)
+def remember_course_category(sender, instance, raw=False, **kwargs):
+    # A course moved to another category must drop off its old category's page.
+    if not raw and instance.pk is not None:
+        instance._previous_category_id = (
+            Course.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_listings([instance.category_id, getattr(instance, '_previous_category_id', None)])
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def enrollment_changed(sender, instance, raw=False, **kwargs):
+    # Enrollment counts are shown on, and order, every course listing.
+    if raw:
+        return
+    if Enrollment.course.is_cached(instance):
+        category_id = instance.course.category_id
+    else:
+        category_id = Course.objects.filter(pk=instance.course_id).values_list('category_id', flat=True).first()
+    invalidate_listings([category_id])
+
+
+@receiver(pre_save, sender=get_user_model())
+def remember_username(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Skips saves that cannot change it, like the last_login update on every login.
+    if raw or instance.pk is None or (update_fields is not None and 'username' not in update_fields):
+        return
+    instance._previous_username = (
+        sender.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=get_user_model())
+def username_changed(sender, instance, created=False, raw=False, **kwargs):
+    # Course pages and listings show the instructor's username.
+    previous = instance.__dict__.pop('_previous_username', None)
+    if raw or created or previous is None or previous == instance.username:
+        return
+    courses = list(Course.objects.filter(created_by=instance).values_list('pk', 'category_id'))
+    if courses:
+        invalidate(*(COURSE_VERSION_KEY % pk for pk, _ in courses))
+        invalidate_listings(category_id for _, category_id in courses)
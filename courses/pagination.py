@@ -0,0 +1,132 @@
+import base64
+import binascii
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from .metrics import record_cache
+
+APPROXIMATE_COUNT_TIMEOUT = 60
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator:
+    """
+    Keyset pagination over a queryset ordered by ``ordering``.
+
+    ``ordering`` is a sequence like ``('-student_count', '-id')`` whose last
+    field is unique, so every row has a stable position. Pages are fetched
+    with ``WHERE (key, id) < (last_key, last_id) ORDER BY ... LIMIT n``,
+    which an index on the sort key answers without a COUNT or an OFFSET scan,
+    however deep the page is. Cursors are opaque base64 strings.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.per_page = per_page
+
+    def get_page(self, cursor):
+        """Return the page for ``cursor``, falling back to the first page if it is invalid."""
+        try:
+            backwards, values = self.decode_cursor(cursor)
+        except InvalidCursor:
+            backwards, values = False, None
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._after(values, backwards))
+        queryset = queryset.order_by(*self._ordering(backwards))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1], False) if rows and has_next else None,
+            previous_cursor=self.encode_cursor(rows[0], True) if rows and has_previous else None,
+        )
+
+    def encode_cursor(self, obj, backwards):
+        # isoformat() keeps microseconds, which DjangoJSONEncoder would drop
+        # and so skip rows created within the same millisecond.
+        values = [getattr(obj, name) for name, _ in self.fields]
+        values = [v.isoformat() if hasattr(v, 'isoformat') else v for v in values]
+        payload = json.dumps([int(backwards), values])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            raise InvalidCursor
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            backwards, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise InvalidCursor
+            model_fields = self.queryset.model._meta
+            values = [
+                model_fields.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            raise InvalidCursor
+        # Sort keys are never null, and a null cannot be compared against.
+        if None in values:
+            raise InvalidCursor
+        return bool(backwards), values
+
+    def _ordering(self, backwards):
+        return [
+            ('-' if descending != backwards else '') + name
+            for name, descending in self.fields
+        ]
+
+    def _after(self, values, backwards):
+        # Lexicographic "row comes after (v1, v2, ...)" in the current direction.
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self.fields, values):
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+
+def approximate_count(queryset, cache_key):
+    """Return ``queryset.count()``, cached for a short while so it is only approximate."""
+    count = cache.get(cache_key)
+    record_cache('approximate_count', hit=count is not None)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, APPROXIMATE_COUNT_TIMEOUT)
+    return count
@@ -0,0 +1,43 @@
+"""
+Page counting and text extraction for submitted PDFs, with pypdf.
+
+pypdf is an optional dependency (``pip install pypdf``). Without it, or
+for files over ``MAX_PDF_SIZE``, ``analyze`` only checks that the file is
+a PDF; the checksum task covers the rest. Parsing runs in the task
+worker's processes, so a PDF that takes the parser down costs a worker,
+which ``run_task_worker`` replaces, and not a web process.
+"""
+import os
+
+try:
+    from pypdf import PdfReader
+    from pypdf.errors import PyPdfError
+except ImportError:
+    PdfReader = None
+
+MAX_TEXT_LENGTH = 1_000_000
+MAX_PDF_SIZE = 100 * 1024 * 1024
+
+
+def analyze(path):
+    """
+    Return ``(page count, text)`` for the PDF at ``path``, or ``(None, '')``
+    if it is not parsed; raise ValueError if it is not a readable PDF.
+    """
+    with open(path, 'rb') as pdf:
+        if not pdf.read(5).startswith(b'%PDF'):
+            raise ValueError(f"{path} is not a PDF.")
+    if PdfReader is None or os.path.getsize(path) > MAX_PDF_SIZE:
+        return None, ''
+    try:
+        reader = PdfReader(path)
+        parts, length = [], 0
+        for page in reader.pages:
+            text = page.extract_text() or ''
+            parts.append(text)
+            length += len(text)
+            if length >= MAX_TEXT_LENGTH:
+                break
+        return len(reader.pages), '\n'.join(parts)[:MAX_TEXT_LENGTH].strip()
+    except PyPdfError as error:
+        raise ValueError(f"{path} could not be read: {error}") from error
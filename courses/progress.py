@@ -0,0 +1,50 @@
+from django.db.models import Count, Exists, F, OuterRef, Q
+
+from .models import Enrollment, Lesson
+
+
+def enrollment_progress(user):
+    """
+    Return the user's enrollments annotated with lesson progress.
+
+    Each enrollment gets ``total_lessons``, ``completed_count``,
+    ``remaining_lessons`` and ``progress`` (a 0-100 percentage). Totals come
+    from the denormalized ``Course.lesson_count`` and completions from one
+    grouped COUNT, so this is a single query however many courses the user
+    is enrolled in.
+    """
+    enrollments = list(
+        Enrollment.objects.filter(student=user)
+        .select_related('course', 'course__category', 'course__created_by')
+        .annotate(completed_count=Count(
+            'completed_lessons',
+            filter=Q(completed_lessons__course=F('course')),
+        ))
+        .order_by('enrolled_at', 'id')
+    )
+    for enrollment in enrollments:
+        total = enrollment.course.lesson_count
+        completed = min(enrollment.completed_count, total)
+        enrollment.total_lessons = total
+        enrollment.remaining_lessons = total - completed
+        enrollment.progress = int((completed / total) * 100) if total > 0 else 0
+    return enrollments
+
+
+def pending_lessons(user):
+    """
+    Return ``{'course': ..., 'lesson': ...}`` items for every lesson the user
+    has not completed in the courses they are enrolled in, in one query.
+    """
+    completed = Enrollment.completed_lessons.through.objects.filter(
+        enrollment__student=user,
+        enrollment__course=OuterRef('course'),
+        lesson=OuterRef('pk'),
+    )
+    lessons = (
+        Lesson.objects.filter(course__in=Enrollment.objects.filter(student=user).values('course'))
+        .exclude(Exists(completed))
+        .select_related('course')
+        .order_by('course_id', 'id')
+    )
+    return [{'course': lesson.course, 'lesson': lesson} for lesson in lessons]
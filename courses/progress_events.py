@@ -0,0 +1,220 @@
+"""
+Write-behind ingestion of lesson progress events.
+
+Students post "mark complete" clicks and video heartbeats every few
+seconds, and only completions are stored (``Enrollment.completed_lessons``
+is the one progress store). Recording an event never touches the
+database:
+
+- ``record_completion`` drops the event after one cache read if a
+  short-lived "seen" key for the (student, lesson) pair says it is a
+  duplicate of one that is buffered or already written.
+- Otherwise it takes the next slot number from a cache counter, stores
+  the pair under that slot, and only then sets the seen key, so an event
+  whose slot was never written can be posted again.
+
+``flush`` takes a lock in the cache, so only one flusher runs at a time
+across all processes. It reads the slots after the last flushed one and
+resolves the pairs to enrollments in one query, inserts them with
+``bulk_create(ignore_conflicts=True)``, then advances the cursor and drops
+the slots. A flusher that dies after the insert but before moving the
+cursor leaves the slots to be written again, which the unique
+(enrollment, lesson) pair makes harmless.
+
+Each process that buffers an event starts a background thread that flushes
+``PROGRESS_FLUSH_INTERVAL`` seconds later, and again every interval until
+nothing is left, so the last events of a burst are written without waiting
+for another one. The process flushes once more when it exits. The
+``flush_progress_events`` command flushes on a timer for caches shared
+between processes.
+
+Delivery is at least once only while the cache keeps the slots: the cache
+has to be shared by every process (courses.E001) and, to survive a
+restart, persistent, such as Redis with persistence on. With the
+per-process development cache, a process that is killed loses whatever it
+had not flushed yet, at most one interval's worth.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+
+from .caching import invalidate
+from .dashboards import USER_VERSION_KEY
+from .metrics import record_progress
+from .models import Enrollment
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE_KEY = 'courses:progress:sequence'
+CURSOR_KEY = 'courses:progress:flushed'
+SLOT_KEY = 'courses:progress:slot:%s'
+SEEN_KEY = 'courses:progress:seen:%s:%s'
+FLUSH_LOCK_KEY = 'courses:progress:flush-lock'
+
+DEFAULT_FLUSH_INTERVAL = 5
+DEFAULT_SEEN_TIMEOUT = 60 * 60
+FLUSH_BATCH_SIZE = 1000
+# Longer than any flush takes, so the lock only expires on a flusher that died.
+FLUSH_LOCK_TIMEOUT = 5 * 60
+# A video counts as watched once this much of it has played.
+COMPLETION_RATIO = 0.9
+# A slot number handed out but still empty after this long belongs to a
+# writer that died between taking the number and storing the event.
+ABANDONED_SLOT_SECONDS = 30
+
+_flusher = None
+_flusher_lock = threading.Lock()
+# Set whenever this process has buffered an event the flusher has not seen.
+_wake = threading.Event()
+# (slot, first seen empty at): where this process's last flush stopped.
+_waiting_on = (None, None)
+
+
+def flush_interval():
+    return getattr(settings, 'PROGRESS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+
+
+def is_completion(position, duration):
+    """Whether a heartbeat at ``position`` seconds into a ``duration`` second video completes it."""
+    return duration > 0 and position >= duration * COMPLETION_RATIO
+
+
+def _next_slot():
+    try:
+        return cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        cache.add(SEQUENCE_KEY, 0, timeout=None)
+        return cache.incr(SEQUENCE_KEY)
+
+
+def record_completion(student_id, lesson_id):
+    """Buffer that the student completed the lesson; return False if it was a duplicate."""
+    seen_key = SEEN_KEY % (student_id, lesson_id)
+    if cache.get(seen_key) is not None:
+        record_progress('coalesced')
+        return False
+    cache.set(SLOT_KEY % _next_slot(), (student_id, lesson_id), timeout=None)
+    # Only once the event is buffered: a failed slot write must not stop
+    # the student from posting it again.
+    seen_timeout = getattr(settings, 'PROGRESS_SEEN_TIMEOUT', DEFAULT_SEEN_TIMEOUT)
+    cache.set(seen_key, 1, timeout=seen_timeout)
+    record_progress('buffered')
+    _schedule_flush()
+    return True
+
+
+def pending():
+    """Whether any buffered event has yet to be flushed."""
+    return cache.get(SEQUENCE_KEY, 0) != cache.get(CURSOR_KEY, 0)
+
+
+def _schedule_flush():
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_periodically, name='progress-flush', daemon=True)
+            _flusher.start()
+            atexit.register(_background_flush)
+    _wake.set()
+
+
+def _flush_periodically():
+    while True:
+        _wake.wait()
+        _wake.clear()
+        time.sleep(flush_interval())
+        _background_flush()
+        if pending():
+            # Events arrived during the flush, another process holds the
+            # lock, or a slot is still being written: go round again.
+            _wake.set()
+
+
+def _background_flush():
+    close_old_connections()
+    try:
+        flush()
+    except Exception:
+        logger.exception("Flushing progress events failed")
+    finally:
+        close_old_connections()
+
+
+def _write(events):
+    """Insert the (student, lesson) completions whose student is enrolled in the lesson's course."""
+    through = Enrollment.completed_lessons.through
+    wanted = set(events)
+    rows = (
+        Enrollment.objects
+        .filter(student__in={student for student, _ in wanted}, course__lessons__in={lesson for _, lesson in wanted})
+        .values_list('pk', 'student', 'course__lessons')
+    )
+    completions = [
+        through(enrollment_id=enrollment, lesson_id=lesson)
+        for enrollment, student, lesson in rows
+        if (student, lesson) in wanted
+    ]
+    with transaction.atomic():
+        through.objects.bulk_create(completions, ignore_conflicts=True)
+        # bulk_create sends no m2m_changed, so invalidate the dashboards
+        # that show this progress here.
+        invalidate(*{USER_VERSION_KEY % student for student, _ in wanted})
+
+
+def flush():
+    """
+    Write every buffered completion to the database; return how many events
+    were flushed. Return 0 at once if another flush holds the lock.
+    """
+    # One flusher at a time, across processes: two would read the same
+    # cursor, write the same batch and could store their cursors out of
+    # order, moving it backwards.
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_TIMEOUT):
+        return 0
+    try:
+        return _flush()
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+
+def _flush():
+    global _waiting_on
+    written = 0
+    while True:
+        last = cache.get(CURSOR_KEY, 0)
+        newest = cache.get(SEQUENCE_KEY, 0)
+        if newest < last:
+            # The counter was evicted and started again; so did the slots.
+            last = 0
+        if newest == last:
+            return written
+        numbers = range(last + 1, min(newest, last + FLUSH_BATCH_SIZE) + 1)
+        slots = cache.get_many([SLOT_KEY % number for number in numbers])
+        events, upto = [], last
+        for number in numbers:
+            event = slots.get(SLOT_KEY % number)
+            if event is None:
+                # Taken but not written yet: stop here unless the writer
+                # has been gone for too long.
+                slot, since = _waiting_on
+                if slot != number:
+                    _waiting_on = (number, time.monotonic())
+                    break
+                if time.monotonic() - since < ABANDONED_SLOT_SECONDS:
+                    break
+            else:
+                events.append(tuple(event))
+            upto = number
+        if upto == last:
+            return written
+        if events:
+            _write(events)
+            written += len(events)
+            record_progress('flushed', len(events))
+        cache.set(CURSOR_KEY, upto, timeout=None)
+        cache.delete_many([SLOT_KEY % number for number in range(last + 1, upto + 1)])
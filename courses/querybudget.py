@@ -0,0 +1,201 @@
+"""
+Per-request SQL recording, N+1 detection and query budgets.
+
+``QueryBudgetMiddleware`` records every statement a request runs and groups
+them by shape (the SQL with literals and IN lists collapsed). A shape
+repeated ``QUERY_BUDGET_REPEAT_THRESHOLD`` times or more is reported as a
+likely N+1, together with the template line or the application code that
+issued it. Views declare how many queries they may run with
+``@query_budget(n)`` (or ``settings.QUERY_BUDGETS`` by URL name); going
+over raises QueryBudgetExceeded when ``QUERY_BUDGET_STRICT`` is on, as it
+is in ``minimoodle.test_settings``, and is only logged otherwise.
+
+``assert_query_budget`` applies the same checks to any block of code in a
+test.
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import instrumentation, metrics
+from .instrumentation import observe
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPEAT_THRESHOLD = 5
+
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SAVEPOINT_RE = re.compile(r'"s\d+_x\d+"')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# The hooks' own frames, which sit between every statement and the code that ran it.
+_HOOK_FILES = {os.path.abspath(path) for path in (__file__, instrumentation.__file__, metrics.__file__)}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(max_queries):
+    """Declare the most queries a view may run per request."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def statement_shape(sql):
+    sql = _SAVEPOINT_RE.sub('"savepoint"', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', _WHITESPACE_RE.sub(' ', sql))
+    return _LITERAL_RE.sub('?', sql)
+
+
+def _query_origin():
+    """The template line, or failing that the application code, that ran the current query."""
+    frame = sys._getframe(2)
+    base_dir = str(settings.BASE_DIR)
+    code_location = None
+    while frame is not None:
+        node = frame.f_locals.get('self') if frame.f_code.co_name == 'render_annotated' else None
+        token = getattr(node, 'token', None)
+        origin = getattr(node, 'origin', None)
+        if token is not None and origin is not None:
+            return f'{origin.template_name or origin.name}:{token.lineno}'
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (code_location is None and filename.startswith(base_dir) and filename not in _HOOK_FILES
+                and 'site-packages' not in filename):
+            code_location = f'{os.path.relpath(filename, base_dir)}:{frame.f_lineno}'
+        frame = frame.f_back
+    return code_location
+
+
+class QueryRecorder:
+    """A statement hook (courses.instrumentation) that groups statements by shape."""
+
+    def __init__(self, repeat_threshold=None):
+        self.repeat_threshold = repeat_threshold or getattr(
+            settings, 'QUERY_BUDGET_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD,
+        )
+        self.count = 0
+        self.duration = 0.0
+        # shape -> [count, total seconds, example sql, origin]
+        self.shapes = {}
+        # Async views can run their queries on several threads at once.
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            shape = statement_shape(sql)
+            with self._lock:
+                self.count += 1
+                self.duration += elapsed
+                entry = self.shapes.get(shape)
+                if entry is None:
+                    self.shapes[shape] = entry = [1, elapsed, sql, None]
+                    find_origin = False
+                else:
+                    entry[0] += 1
+                    entry[1] += elapsed
+                    # Only look up the origin once a shape repeats, so
+                    # one-off statements cost no stack walk.
+                    find_origin = entry[3] is None
+            if find_origin:
+                entry[3] = _query_origin()
+
+    def repeated(self):
+        """``(count, shape, origin)`` for every shape at or over the repeat threshold, worst first."""
+        return sorted(
+            ((count, shape, origin) for shape, (count, _, _, origin) in self.shapes.items()
+             if count >= self.repeat_threshold),
+            reverse=True, key=lambda item: item[0],
+        )
+
+    def report(self, label, budget=None):
+        lines = [f"{label}: {self.count} queries in {self.duration * 1000:.1f}ms"
+                 + (f" (budget {budget})" if budget is not None else "")]
+        for count, shape, origin in self.repeated():
+            lines.append(f"  possible N+1: {count}x from {origin or 'unknown'}: {shape[:300]}")
+        return '\n'.join(lines)
+
+
+def recording(recorder):
+    """Send the statements run in this context, on every database alias and thread, through ``recorder``."""
+    return observe(recorder)
+
+
+def _strict():
+    return getattr(settings, 'QUERY_BUDGET_STRICT', False)
+
+
+def check(recorder, label, budget=None, strict=None):
+    """Log N+1 patterns and enforce ``budget``; raise instead of logging when strict."""
+    strict = _strict() if strict is None else strict
+    over_budget = budget is not None and recorder.count > budget
+    if not over_budget and not recorder.repeated():
+        return
+    message = recorder.report(label, budget)
+    if over_budget and strict:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with recording(QueryRecorder()) as recorder:
+            response = self.get_response(request)
+        self.check(request, recorder)
+        return response
+
+    async def __acall__(self, request):
+        with recording(QueryRecorder()) as recorder:
+            response = await self.get_response(request)
+        self.check(request, recorder)
+        return response
+
+    def check(self, request, recorder):
+        # Streaming responses run most of their queries after this point
+        # and are only checked for what ran while building the response.
+        match = request.resolver_match
+        budget = None
+        if match is not None:
+            budget = self.budgets.get(match.url_name, getattr(match.func, 'query_budget', None))
+        label = f"{request.method} {request.path} ({match.view_name if match else 'unresolved'})"
+        check(recorder, label, budget)
+
+
+@contextmanager
+def assert_query_budget(max_queries=None, repeat_threshold=None, allow_repeats=False):
+    """
+    Fail if the block runs more than ``max_queries`` queries or, unless
+    ``allow_repeats``, repeats any statement shape ``repeat_threshold`` times.
+    """
+    recorder = QueryRecorder(repeat_threshold)
+    with recording(recorder):
+        yield recorder
+    if max_queries is not None and recorder.count > max_queries:
+        raise QueryBudgetExceeded(recorder.report("Block", max_queries))
+    if not allow_repeats and recorder.repeated():
+        raise QueryBudgetExceeded(recorder.report("Block", max_queries))
@@ -0,0 +1,66 @@
+"""
+An instructor's roster: every student enrolled in any of their courses.
+
+``roster`` is one grouped query over the instructor's enrollments, one row
+per student, with how many of the instructor's courses they take, when
+they were last active and their submission stats for the instructor's
+assignments (correlated subqueries on the (student, assignment) index, so
+submissions never multiply the enrollment rows). Sorting and pagination
+happen in the database; nothing is loaded per student.
+"""
+from django.db.models import Avg, Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Enrollment, Submission
+
+ROSTER_SORTS = {
+    'name': ('username', 'student'),
+    'courses': ('-enrolled_courses', 'username', 'student'),
+    'activity': ('-last_activity', 'username', 'student'),
+    'submissions': ('-submission_count', 'username', 'student'),
+    'grade': (F('average_grade').desc(nulls_last=True), 'username', 'student'),
+}
+ROSTER_PER_PAGE = 50
+SUMMARY_STUDENTS = 6
+
+
+def roster(instructor, course=None):
+    """
+    Return the instructor's students, one dict per student with
+    ``student``, ``username``, ``email``, ``enrolled_courses``,
+    ``last_activity``, ``submission_count``, ``graded_count`` and
+    ``average_grade``; restricted to one of their courses if ``course`` is
+    given. Order it with ROSTER_SORTS.
+    """
+    enrollments = Enrollment.objects.filter(course__created_by=instructor)
+    submissions = Submission.objects.filter(student=OuterRef('student'), assignment__course__created_by=instructor)
+    if course is not None:
+        enrollments = enrollments.filter(course=course)
+        submissions = submissions.filter(assignment__course=course)
+
+    def per_student(aggregate):
+        return Subquery(submissions.order_by().values('student').annotate(value=aggregate).values('value'))
+
+    return (
+        enrollments
+        .values('student', username=F('student__username'), email=F('student__email'))
+        .annotate(
+            enrolled_courses=Count('pk'),
+            last_enrolled=Max('enrolled_at'),
+            last_submitted=per_student(Max('submitted_at')),
+            submission_count=Coalesce(per_student(Count('pk')), 0),
+            graded_count=Coalesce(per_student(Count('grade')), 0),
+            average_grade=per_student(Avg('grade')),
+        )
+        .annotate(last_activity=Greatest('last_enrolled', Coalesce('last_submitted', 'last_enrolled')))
+        .order_by(*ROSTER_SORTS['name'])
+    )
+
+
+def student_count(instructor):
+    return Enrollment.objects.filter(course__created_by=instructor).values('student').distinct().count()
+
+
+def recently_active(instructor, limit=SUMMARY_STUDENTS):
+    """The dashboard's roster summary: the most recently active students."""
+    return list(roster(instructor).order_by(*ROSTER_SORTS['activity'])[:limit])
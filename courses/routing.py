@@ -0,0 +1,88 @@
+"""
+Read/write routing for the SQLite production setup.
+
+Views marked ``@read_only_view`` (or listed in ``settings.READ_ONLY_VIEWS``)
+read through the ``readonly`` database alias: a separate connection to the
+same file opened with ``mode=ro``. In WAL mode those readers work from a
+snapshot and never wait for the writer, so uploads and enrollments no
+longer stall catalog pages. Writes always go to ``default``.
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+READ_ONLY_ALIAS = 'readonly'
+
+_read_only = ContextVar('courses_read_only_view', default=False)
+
+
+def read_only_view(view):
+    """Mark a view as only reading, so its queries can use the read-only connection."""
+    view.read_only = True
+    return view
+
+
+class ReadOnlyRouter:
+    def db_for_read(self, model, **hints):
+        if not _read_only.get():
+            return None
+        # Inside a transaction on the writer (a test case, or a view that
+        # has already written) only the writer can see its own changes.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return READ_ONLY_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database file.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != READ_ONLY_ALIAS
+
+
+class ReadOnlyRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.views = set(getattr(settings, 'READ_ONLY_VIEWS', ()))
+        self.enabled = READ_ONLY_ALIAS in settings.DATABASES
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django calls process_view in the mode of the whole stack;
+            # matching it saves a thread switch per request.
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _read_only.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            _read_only.reset(token)
+
+    async def __acall__(self, request):
+        token = _read_only.set(False)
+        try:
+            return await self.get_response(request)
+        finally:
+            _read_only.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.route(request, view_func)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.route(request, view_func)
+
+    def route(self, request, view_func):
+        if self.enabled and request.method in ('GET', 'HEAD') and (
+            getattr(view_func, 'read_only', False) or request.resolver_match.url_name in self.views
+        ):
+            _read_only.set(True)
@@ -0,0 +1,223 @@
+"""
+Full-text search over courses and lessons, backed by an SQLite FTS5 table.
+
+Every course and lesson has one row in ``courses_search``. The rowid encodes
+the kind of object (even for courses, odd for lessons), so a save or delete
+touches its row by primary key instead of scanning the index.
+
+Results are ordered by bm25 rank in SQLite, and further pages continue
+after the (rank, rowid) of the last result shown.
+"""
+import base64
+import binascii
+import json
+import re
+
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Course, Lesson
+from .pagination import CursorPage, InvalidCursor
+
+SEARCH_TABLE = 'courses_search'
+COURSE = 'course'
+LESSON = 'lesson'
+
+SNIPPET_WIDTH = 160
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# Connections (by database name) known to have the index table.
+_indexed_databases = set()
+
+
+def search_available():
+    """Whether the database has the FTS5 index: SQLite, migrated past 0010."""
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _indexed_databases:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SEARCH_TABLE])
+            if cursor.fetchone() is None:
+                return False
+        _indexed_databases.add(name)
+    return True
+
+
+def _rowid(kind, pk):
+    return pk * 2 + (1 if kind == LESSON else 0)
+
+
+def _from_rowid(rowid):
+    return (LESSON if rowid % 2 else COURSE), rowid // 2
+
+
+def build_match_query(text):
+    """
+    Turn free text into an FTS5 query in which every word must match. Words
+    are quoted, so user input can never be parsed as FTS5 syntax.
+    """
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    return ' '.join('"%s"' % token for token in tokens)
+
+
+def index_object(kind, pk, title, body, course_id):
+    if not search_available():
+        return
+    rowid = _rowid(kind, pk)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, body, course_id) VALUES (%s, %s, %s, %s)',
+            [rowid, title, body, course_id],
+        )
+
+
+def index_objects(kind, rows):
+    """Index many ``(pk, title, body, course_id)`` rows at once, e.g. after bulk_create()."""
+    if not search_available() or not rows:
+        return
+    rows = [(_rowid(kind, pk), title, body, course_id) for pk, title, body, course_id in rows]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, body, course_id) VALUES (%s, %s, %s, %s)', rows,
+        )
+
+
+def unindex_object(kind, pk):
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [_rowid(kind, pk)])
+
+
+def rebuild_index():
+    """Repopulate the whole index from the course and lesson tables."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, body, course_id) '
+            f'SELECT id * 2, title, description, id FROM {Course._meta.db_table}'
+        )
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, body, course_id) '
+            f'SELECT id * 2 + 1, title, content, course_id FROM {Lesson._meta.db_table}'
+        )
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT COUNT(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def make_snippet(body, tokens, width=SNIPPET_WIDTH):
+    """Return about ``width`` characters of ``body`` around the first query word."""
+    lowered = body.lower()
+    positions = [lowered.find(token.lower()) for token in tokens]
+    hit = min((p for p in positions if p >= 0), default=0)
+    start = max(hit - width // 2, 0)
+    excerpt = body[start:start + width]
+    return ('…' if start else '') + excerpt + ('…' if start + width < len(body) else '')
+
+
+class SearchResult:
+    def __init__(self, kind, obj, course, rank, snippet):
+        self.kind = kind
+        self.object = obj
+        self.course = course
+        self.rank = rank
+        self.snippet = snippet
+
+    @property
+    def is_lesson(self):
+        return self.kind == LESSON
+
+
+def encode_cursor(rank, rowid):
+    return base64.urlsafe_b64encode(json.dumps([rank, rowid]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        rank, rowid = json.loads(base64.urlsafe_b64decode((cursor + '=' * (-len(cursor) % 4)).encode()))
+        return float(rank), int(rowid)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor
+
+
+def search(text, category=None, limit=20, cursor=None):
+    """
+    Return a CursorPage of up to ``limit`` SearchResults for ``text``, best
+    bm25 match first (titles weigh ten times more than bodies, see migration
+    0010), optionally within a category. Pass the page's ``next_cursor`` as
+    ``cursor`` for the following page; an invalid cursor gives the first.
+    """
+    query = build_match_query(text)
+    if query is None or not search_available():
+        return CursorPage([])
+
+    # Ties go to the newest object.
+    sql = f'SELECT rowid, course_id, rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s'
+    params = [query]
+    if category is not None:
+        sql += f' AND course_id IN (SELECT id FROM {Course._meta.db_table} WHERE category_id = %s)'
+        params.append(category.pk)
+    if cursor:
+        try:
+            last_rank, last_rowid = decode_cursor(cursor)
+        except InvalidCursor:
+            pass
+        else:
+            sql += ' AND (rank > %s OR (rank = %s AND rowid < %s))'
+            params.extend([last_rank, last_rank, last_rowid])
+    sql += ' ORDER BY rank, rowid DESC LIMIT %s'
+    params.append(limit + 1)
+
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        rows = db_cursor.fetchall()
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    hits = [(_from_rowid(rowid), course_id, rank) for rowid, course_id, rank in rows]
+    courses = Course.objects.select_related('category').in_bulk({course_id for _, course_id, _ in hits})
+    lessons = Lesson.objects.in_bulk([pk for (kind, pk), _, _ in hits if kind == LESSON])
+
+    tokens = _TOKEN_RE.findall(text)
+    results = []
+    for (kind, pk), course_id, rank in hits:
+        course = courses.get(course_id)
+        obj = course if kind == COURSE else lessons.get(pk)
+        if course is None or obj is None:
+            continue
+        body = obj.content if kind == LESSON else obj.description
+        results.append(SearchResult(kind, obj, course, rank, make_snippet(body, tokens)))
+    # Continue after the last row read, even one dropped above.
+    next_cursor = encode_cursor(rows[-1][2], rows[-1][0]) if has_next else None
+    return CursorPage(results, next_cursor=next_cursor)
+
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(COURSE, instance.pk, instance.title, instance.description, instance.pk)
+
+
+@receiver(post_delete, sender=Course)
+def unindex_course(sender, instance, **kwargs):
+    unindex_object(COURSE, instance.pk)
+
+
+@receiver(post_save, sender=Lesson)
+def index_lesson(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(LESSON, instance.pk, instance.title, instance.content, instance.course_id)
+
+
+@receiver(post_delete, sender=Lesson)
+def unindex_lesson(sender, instance, **kwargs):
+    unindex_object(LESSON, instance.pk)
@@ -0,0 +1,153 @@
+"""
+Session engine: the cache in front of the database, with coalesced writes.
+
+Set as ``SESSION_ENGINE``. Like Django's ``cached_db`` engine, sessions
+are read from ``SESSION_CACHE_ALIAS`` and only fall back to
+``django_session`` when the cache does not have them. A logged-in page
+therefore reads its session without a query.
+
+Every save still goes to the cache, but the database row is only
+rewritten when it matters:
+
+- when the session is created;
+- when the login it carries changes (login, logout, password change);
+- otherwise, at most once every ``SESSION_DB_WRITE_INTERVAL`` seconds.
+
+The row is only there for when the cache loses the session. At worst it
+is missing the last few seconds of non-login changes, never the login.
+The cache entry records what the row holds and when it was written, so
+every process makes the same decision.
+
+The cache entry is the session, so ``SESSION_CACHE_ALIAS`` must be a cache
+every process shares: with one per process, a logout would only reach the
+process that served it. The courses.E002 system check enforces this.
+
+Expired rows are removed by ``manage.py purge_expired_sessions`` (or
+``clearsessions``), in batches, so the purge never holds the SQLite write
+lock for long; run it from cron. Expired cache entries time out by
+themselves.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_WRITE_INTERVAL = 60
+PURGE_BATCH_SIZE = 1000
+_AUTH_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+
+
+def _login_state(data):
+    return tuple(data.get(key) for key in _AUTH_KEYS)
+
+
+def db_write_interval():
+    return getattr(settings, 'SESSION_DB_WRITE_INTERVAL', DEFAULT_DB_WRITE_INTERVAL)
+
+
+class SessionStore(CachedDBStore):
+    # Cache entries are (data, synced) pairs, not cached_db's bare dicts.
+    cache_key_prefix = 'courses.sessions'
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # (login state, time) of the last database write, or None if this
+        # session may not have a row yet.
+        self._synced = None
+
+    def _from_db(self, row):
+        data = self.decode(row.session_data)
+        self._synced = (_login_state(data), time.time())
+        return data
+
+    def load(self):
+        try:
+            entry = self._cache.get(self.cache_key)
+        except Exception:
+            entry = None
+        if entry is not None:
+            data, self._synced = entry
+            return data
+        row = self._get_session_from_db()
+        if row is None:
+            return {}
+        data = self._from_db(row)
+        self._cache.set(self.cache_key, (data, self._synced), self.get_expiry_age(expiry=row.expire_date))
+        return data
+
+    async def aload(self):
+        try:
+            entry = await self._cache.aget(await self.acache_key())
+        except Exception:
+            entry = None
+        if entry is not None:
+            data, self._synced = entry
+            return data
+        row = await self._aget_session_from_db()
+        if row is None:
+            return {}
+        data = self._from_db(row)
+        await self._cache.aset(
+            await self.acache_key(), (data, self._synced), await self.aget_expiry_age(expiry=row.expire_date),
+        )
+        return data
+
+    def _needs_db_write(self, data, must_create):
+        if must_create or self._synced is None:
+            return True
+        login_state, written_at = self._synced
+        return login_state != _login_state(data) or time.time() - written_at >= db_write_interval()
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        if self._needs_db_write(data, must_create):
+            DBStore.save(self, must_create)
+            self._synced = (_login_state(data), time.time())
+        try:
+            self._cache.set(self.cache_key, (data, self._synced), self.get_expiry_age())
+        except Exception:
+            logger.exception("Error saving session to cache (%s)", self._cache)
+
+    async def asave(self, must_create=False):
+        if self.session_key is None:
+            return await self.acreate()
+        data = await self._aget_session(no_load=must_create)
+        if self._needs_db_write(data, must_create):
+            await DBStore.asave(self, must_create)
+            self._synced = (_login_state(data), time.time())
+        try:
+            await self._cache.aset(await self.acache_key(), (data, self._synced), await self.aget_expiry_age())
+        except Exception:
+            logger.exception("Error saving session to cache (%s)", self._cache)
+
+    @classmethod
+    def clear_expired(cls):
+        purge_expired()
+
+
+def purge_expired(batch_size=PURGE_BATCH_SIZE, pause=0):
+    """Delete expired session rows ``batch_size`` at a time; return how many."""
+    now = timezone.now()
+    purged = 0
+    while True:
+        keys = list(
+            Session.objects.filter(expire_date__lt=now)
+            .order_by('expire_date').values_list('pk', flat=True)[:batch_size]
+        )
+        if not keys:
+            return purged
+        purged += Session.objects.filter(pk__in=keys).delete()[0]
+        if len(keys) < batch_size:
+            return purged
+        if pause:
+            # Let waiting writers in between batches.
+            time.sleep(pause)
@@ -0,0 +1,153 @@
+"""
+Content-addressed storage for uploaded submission files.
+
+Uploads are hashed while they stream to disk and stored once under
+``<upload_to>/<h[0:2]>/<h[2:4]>/<sha256><ext>``, so identical files share
+one blob and no directory ever holds more than a few hundred entries.
+Blobs are reference-counted across rows by ``courses.blobs``.
+
+Handing out an existing blob and deleting an unreferenced one both happen
+under ``blob_lock()``, a lock file shared by every process. A blob handed
+out again gets a "reused" marker until the new reference is committed, so
+a delete racing with an identical upload leaves the file alone.
+"""
+import fcntl
+import hashlib
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+MAX_EXTENSION_LENGTH = 10
+INCOMING_DIR = '.incoming'
+LOCK_FILE = '.blobs.lock'
+REUSED_SUFFIX = '.reused'
+# A reuse marker older than this belongs to an upload that never saved its
+# reference.
+REUSE_TIMEOUT = 60 * 60
+
+_BLOB_NAME_RE = re.compile(r'(?:^|/)[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(?:\.[\w]+)?$')
+
+
+def blob_name(directory, digest, extension=''):
+    return '/'.join(filter(None, [directory, digest[:2], digest[2:4], digest + extension]))
+
+
+def blob_digest(name):
+    """Return the sha256 encoded in a content-addressed ``name``, or None."""
+    match = _BLOB_NAME_RE.search(name or '')
+    return match.group(1) if match else None
+
+
+def clean_extension(name):
+    extension = os.path.splitext(name)[1].lower()
+    if not re.fullmatch(r'\.\w{1,%d}' % (MAX_EXTENSION_LENGTH - 1), extension):
+        return ''
+    return extension
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save(), so there is
+        # nothing to disambiguate here.
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        extension = clean_extension(name)
+        if hasattr(content, 'temporary_file_path'):
+            return self._save_from_path(directory, extension, content.temporary_file_path())
+
+        incoming = self.path(os.path.join(directory, INCOMING_DIR))
+        os.makedirs(incoming, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=incoming)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            return self._commit(directory, extension, digest.hexdigest(), temp_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def _save_from_path(self, directory, extension, path):
+        # The upload is already on disk (a large Django upload or an
+        # assembled chunked upload): hash it in place and move it rather
+        # than copying it. The caller remains responsible for ``path`` when
+        # the blob already existed.
+        digest = hashlib.sha256()
+        with open(path, 'rb') as source:
+            for chunk in iter(lambda: source.read(self.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return self._commit(directory, extension, digest.hexdigest(), path, move_only=True)
+
+    @contextmanager
+    def blob_lock(self):
+        """Hold the lock, shared by every process, that orders reusing and deleting blobs."""
+        os.makedirs(self.location, exist_ok=True)
+        with open(os.path.join(self.location, LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def reuse_pending(self, name):
+        """Whether ``name`` was handed out to an upload that has not committed its reference yet."""
+        try:
+            return time.time() - os.path.getmtime(self.path(name + REUSED_SUFFIX)) < REUSE_TIMEOUT
+        except FileNotFoundError:
+            return False
+
+    def reuse_done(self, name):
+        try:
+            os.unlink(self.path(name + REUSED_SUFFIX))
+        except FileNotFoundError:
+            pass
+
+    def _commit(self, directory, extension, digest, temp_path, move_only=False):
+        name = blob_name(directory, digest, extension)
+        full_path = self.path(name)
+        with self.blob_lock():
+            if os.path.exists(full_path):
+                with open(full_path + REUSED_SUFFIX, 'a'):
+                    os.utime(full_path + REUSED_SUFFIX)
+                if not move_only:
+                    os.unlink(temp_path)
+                return name
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            try:
+                # Atomic on POSIX, so readers never see a partial blob.
+                os.replace(temp_path, full_path)
+                return name
+            except OSError:
+                if not move_only:
+                    raise
+        # Different filesystem: fall back to a copy through a temp file.
+        with open(temp_path, 'rb') as source:
+            return self._save(os.path.join(directory, 'upload' + extension), File(source))
+
+
+_submission_storage = None
+
+
+def submission_storage():
+    global _submission_storage
+    if _submission_storage is None:
+        _submission_storage = ContentAddressedStorage()
+    return _submission_storage
@@ -0,0 +1,157 @@
+"""
+A small background task queue stored in the application database.
+
+Functions decorated with ``@task`` are queued with ``enqueue(func, **kwargs)``,
+which only inserts a Task row: inside the caller's transaction, so the work
+is queued if and only if the data it is about is committed. The
+``run_task_worker`` command claims due tasks and runs them in a process
+pool.
+
+Claiming a task pushes its ``available_at`` out by the visibility timeout
+and gives it a fresh claim token. A finished task is deleted; a failed one
+is put back with exponential backoff until it runs out of attempts and is
+left as ``failed`` for inspection. If a worker dies, or a task outlives
+its visibility timeout, the task becomes claimable again, and a late
+result from the earlier claim is ignored. Delivery is therefore
+at-least-once and tasks must be idempotent.
+"""
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SITE_URL = 'http://localhost:8000'
+DEFAULT_VISIBILITY_TIMEOUT = 5 * 60
+DEFAULT_RETRY_DELAY = 10
+MAX_RETRY_DELAY = 60 * 60
+
+# Dotted path -> function, for every function decorated with @task.
+TASKS = {}
+
+
+class UnknownTask(Exception):
+    pass
+
+
+def task(max_attempts=5):
+    """Register a function, called with JSON-serializable keyword arguments, as a background task."""
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.max_attempts = max_attempts
+        TASKS[func.task_name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, delay=0, **kwargs):
+    """Queue ``func(**kwargs)`` to run in a worker, ``delay`` seconds from now at the earliest."""
+    if TASKS.get(getattr(func, 'task_name', None)) is not func:
+        raise UnknownTask(f"{func!r} is not decorated with @task.")
+    return Task.objects.create(
+        name=func.task_name,
+        payload=kwargs,
+        max_attempts=func.max_attempts,
+        available_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def absolute_url(viewname, *args):
+    """The full URL of a view, for links in emails: tasks run outside any request to take the host from."""
+    return getattr(settings, 'SITE_URL', DEFAULT_SITE_URL).rstrip('/') + reverse(viewname, args=args)
+
+
+def visibility_timeout():
+    return getattr(settings, 'TASK_VISIBILITY_TIMEOUT', DEFAULT_VISIBILITY_TIMEOUT)
+
+
+def retry_delay(attempts):
+    """Seconds before attempt ``attempts + 1``: exponential, capped, with jitter so retries spread out."""
+    base = getattr(settings, 'TASK_RETRY_DELAY', DEFAULT_RETRY_DELAY)
+    delay = min(base * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim(limit):
+    """Claim up to ``limit`` due tasks; return ``(id, claim token, name, payload)`` for each."""
+    now = timezone.now()
+    due = Task.objects.filter(status=Task.QUEUED, available_at__lte=now)
+    # An idle worker polls with a plain read rather than taking the write lock.
+    if not due.exists():
+        return []
+    # Transactions take the write lock up front (transaction_mode
+    # IMMEDIATE), so concurrent workers never claim the same task.
+    with transaction.atomic():
+        rows = list(due.order_by('available_at', 'pk').values_list('pk', 'name', 'payload')[:limit])
+        claimed = []
+        for pk, name, payload in rows:
+            token = uuid.uuid4()
+            Task.objects.filter(pk=pk).update(
+                attempts=F('attempts') + 1,
+                claim_token=token,
+                available_at=now + timedelta(seconds=visibility_timeout()),
+            )
+            claimed.append((pk, token, name, payload))
+    return claimed
+
+
+def execute(name, payload):
+    """
+    Run one task; return None, or the traceback if it failed. Called in the
+    worker processes, so it never raises.
+    """
+    try:
+        import_module(name.rsplit('.', 1)[0])  # registers the module's tasks
+        func = TASKS.get(name)
+        if func is None:
+            raise UnknownTask(f"No task named {name!r}.")
+        func(**payload)
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+def complete(pk, token, error=None):
+    """Record the outcome of a claimed task. A task that has since been claimed again is left alone."""
+    claimed = Task.objects.filter(pk=pk, claim_token=token)
+    if error is None:
+        return claimed.delete()[0] > 0
+    with transaction.atomic():
+        current = claimed.values_list('attempts', 'max_attempts').first()
+        if current is None:
+            return False
+        attempts, max_attempts = current
+        if attempts >= max_attempts:
+            logger.error("Task %s failed for good after %s attempts:\n%s", pk, attempts, error)
+            claimed.update(status=Task.FAILED, last_error=error, claim_token=None)
+        else:
+            logger.warning("Task %s failed (attempt %s of %s); retrying:\n%s", pk, attempts, max_attempts, error)
+            claimed.update(
+                last_error=error, claim_token=None,
+                available_at=timezone.now() + timedelta(seconds=retry_delay(attempts)),
+            )
+    return True
+
+
+def run_pending(limit=None):
+    """Run due tasks in this process until none are left; return how many ran. Meant for tests and scripts."""
+    ran = 0
+    while limit is None or ran < limit:
+        claimed = claim(1)
+        if not claimed:
+            break
+        pk, token, name, payload = claimed[0]
+        complete(pk, token, execute(name, payload))
+        ran += 1
+    return ran
@@ -0,0 +1,94 @@
+"""
+Background processing of new submissions, run by the task worker.
+
+Each step is its own task so that one failing (a mail server that is
+down, a PDF that cannot be read) is retried without redoing the others,
+and each is idempotent, since the queue delivers at least once.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.mail import send_mail
+
+from .models import Submission, SubmissionAnalysis
+from .pdf import analyze
+from .storage import blob_digest
+from .taskqueue import absolute_url, enqueue, task
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _submission(submission_id):
+    # A submission deleted before its turn came needs no processing.
+    return Submission.objects.select_related('assignment__created_by', 'student').filter(pk=submission_id).first()
+
+
+@task(max_attempts=3)
+def verify_checksum(submission_id):
+    """Hash the stored file and check it still matches the digest it was stored under."""
+    submission = _submission(submission_id)
+    if submission is None:
+        return
+    digest = hashlib.sha256()
+    with submission.submitted_file.open('rb') as stored:
+        for chunk in iter(lambda: stored.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    sha256 = digest.hexdigest()
+    expected = blob_digest(submission.submitted_file.name)
+    checksum_ok = None if expected is None else sha256 == expected
+    if checksum_ok is False:
+        logger.error(
+            "Submission %s: %s hashes to %s, not %s.", submission.pk, submission.submitted_file.name, sha256, expected,
+        )
+    SubmissionAnalysis.objects.update_or_create(
+        submission=submission, defaults={'sha256': sha256, 'checksum_ok': checksum_ok},
+    )
+
+
+@task(max_attempts=3)
+def extract_pdf(submission_id):
+    """Record the page count and text of a PDF submission, for plagiarism checks."""
+    submission = _submission(submission_id)
+    if submission is None or not submission.submitted_file.name.lower().endswith('.pdf'):
+        return
+    try:
+        page_count, text = analyze(submission.submitted_file.path)
+    except ValueError as error:
+        # Not actually a PDF; retrying will not change that.
+        logger.warning("Submission %s: %s", submission.pk, error)
+        return
+    if page_count is None:
+        return
+    SubmissionAnalysis.objects.update_or_create(
+        submission=submission, defaults={'page_count': page_count, 'text': text},
+    )
+
+
+@task(max_attempts=8)
+def notify_instructor(submission_id):
+    submission = _submission(submission_id)
+    if submission is None:
+        return
+    assignment = submission.assignment
+    instructor = assignment.created_by
+    if not instructor.email:
+        return
+    send_mail(
+        subject=f"New submission for {assignment.title}",
+        message=(
+            f"{submission.student.username} submitted {submission.original_filename or 'a file'} "
+            f"for {assignment.title}.\n\n"
+            f"Review submissions: {absolute_url('view_submissions', assignment.pk)}\n"
+        ),
+        from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None),
+        recipient_list=[instructor.email],
+    )
+
+
+def enqueue_submission_processing(submission):
+    """Queue the post-processing of a new submission. Call inside the transaction that saves it."""
+    for step in (verify_checksum, extract_pdf, notify_instructor):
+        enqueue(step, submission_id=submission.pk)
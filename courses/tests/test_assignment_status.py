@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from courses.assignment_status import (
+    GRADED, OVERDUE, PENDING, SUBMITTED, split_by_status, student_assignments_with_status,
+)
+from courses.models import Assignment, Course, Enrollment, Submission
+
+
+class AssignmentStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('instructor')
+        cls.student = User.objects.create_user('student')
+        classmate = User.objects.create_user('classmate')
+        course = Course.objects.create(title='Course', description='...', created_by=instructor)
+        Enrollment.objects.create(student=cls.student, course=course)
+        now = timezone.now()
+
+        def assignment(title, due):
+            return Assignment.objects.create(
+                course=course, title=title, description='...', due_date=due, created_by=instructor,
+            )
+
+        cls.open = assignment('Open', now + timedelta(days=1))
+        cls.closed = assignment('Closed', now - timedelta(days=1))
+        cls.submitted = assignment('Submitted', now - timedelta(days=2))
+        cls.graded = assignment('Graded', now - timedelta(days=3))
+        Submission.objects.create(assignment=cls.submitted, student=cls.student, submitted_file='a.pdf')
+        Submission.objects.create(assignment=cls.graded, student=cls.student, submitted_file='b.pdf', grade=75)
+        # A classmate's graded work does not change this student's status.
+        Submission.objects.create(assignment=cls.open, student=classmate, submitted_file='c.pdf', grade=90)
+        other = Course.objects.create(title='Other', description='...', created_by=instructor)
+        Assignment.objects.create(
+            course=other, title='Not enrolled', description='...', due_date=now, created_by=instructor,
+        )
+
+    def test_statuses(self):
+        with self.assertNumQueries(1):
+            statuses = {a.pk: a.status for a in student_assignments_with_status(self.student)}
+        self.assertEqual(statuses, {
+            self.open.pk: PENDING,
+            self.closed.pk: OVERDUE,
+            self.submitted.pk: SUBMITTED,
+            self.graded.pk: GRADED,
+        })
+
+    def test_split_by_status(self):
+        open_assignments, done = split_by_status(student_assignments_with_status(self.student))
+        self.assertEqual({a.pk for a in open_assignments}, {self.open.pk, self.closed.pk})
+        self.assertEqual({a.pk for a in done}, {self.submitted.pk, self.graded.pk})
@@ -0,0 +1,60 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from courses.auth import instructor_required, student_required
+
+
+@instructor_required("Instructors only.")
+def instructor_view(request):
+    return HttpResponse('ok')
+
+
+@student_required()
+def student_view(request):
+    return HttpResponse('ok')
+
+
+@instructor_required("Instructors only.")
+async def async_instructor_view(request):
+    return HttpResponse('ok')
+
+
+@student_required()
+async def async_student_view(request):
+    return HttpResponse('ok')
+
+
+class RoleRequiredTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('instructor')
+        cls.instructor.profile.is_instructor = True
+        cls.instructor.profile.save()
+        cls.student = User.objects.create_user('student')
+
+    def request(self, user):
+        request = RequestFactory().get('/')
+        request.user = User.objects.select_related('profile').get(pk=user.pk)
+
+        async def auser():
+            return request.user
+        request.auser = auser
+        return request
+
+    def test_sync(self):
+        self.assertEqual(instructor_view(self.request(self.instructor)).status_code, 200)
+        response = instructor_view(self.request(self.student))
+        self.assertEqual((response.status_code, response.content), (403, b'Instructors only.'))
+        self.assertEqual(student_view(self.request(self.student)).status_code, 200)
+        self.assertEqual(student_view(self.request(self.instructor)).status_code, 403)
+
+    def test_async(self):
+        def call(view, request):
+            return async_to_sync(view)(request)
+        self.assertEqual(call(async_instructor_view, self.request(self.instructor)).status_code, 200)
+        response = call(async_instructor_view, self.request(self.student))
+        self.assertEqual((response.status_code, response.content), (403, b'Instructors only.'))
+        self.assertEqual(call(async_student_view, self.request(self.student)).status_code, 200)
+        self.assertEqual(call(async_student_view, self.request(self.instructor)).status_code, 403)
@@ -0,0 +1,50 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from courses import benchmark, progress_events
+from courses.caching import COURSE_VERSION_KEY, get_version
+from courses.models import Course, Enrollment, Lesson
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('instructor')
+        instructor.profile.is_instructor = True
+        instructor.profile.save()
+        student = User.objects.create_user('student')
+        course = Course.objects.create(title='Course', description='...', created_by=instructor)
+        Lesson.objects.create(title='Lesson', content='...', course=course)
+        Enrollment.objects.create(student=student, course=course)
+
+    # The flusher thread would outlive the test.
+    @mock.patch.object(progress_events, '_schedule_flush')
+    def test_record_lesson_progress(self, schedule_flush):
+        result = benchmark.run(iterations=2, warmup=0, host='testserver', only=['record_lesson_progress'])
+        stats = result['routes']['record_lesson_progress']
+        self.assertEqual(stats['status'], 202)
+        self.assertEqual(stats['method'], 'POST')
+        # The lessons the requests completed were rolled back.
+        self.assertEqual(Lesson.objects.count(), 1)
+
+    def test_route_without_fixture_value_is_skipped(self):
+        fixture = benchmark.Fixture()
+        clients = {benchmark.STUDENT: Client()}
+        scenario = benchmark.Scenario(benchmark.STUDENT)
+        stats = benchmark._measure(clients, fixture, '/widgets/<int:widget_id>/', scenario, 1, 0, [])
+        self.assertEqual(stats['skipped'], "no fixture value for widget_id")
+
+    def test_invalidations_run_after_each_request(self):
+        fixture = benchmark.Fixture()
+        clients = {benchmark.INSTRUCTOR: Client()}
+        scenario = benchmark.Scenario(
+            benchmark.INSTRUCTOR, method='post', data={'title': 'Renamed', 'description': '...'},
+        )
+        version = get_version(COURSE_VERSION_KEY % fixture.course.pk)
+        fired = []
+        benchmark._measure(clients, fixture, reverse('edit_course', args=[fixture.course.pk]), scenario, 1, 0, fired)
+        self.assertTrue(fired)
+        self.assertNotEqual(get_version(COURSE_VERSION_KEY % fixture.course.pk), version)
@@ -0,0 +1,63 @@
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from courses.models import Assignment, Blob, Course, Submission
+from courses.storage import submission_storage
+
+
+class BlobReferenceTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        instructor = User.objects.create_user('instructor')
+        self.student = User.objects.create_user('student')
+        course = Course.objects.create(title='Course', description='...', created_by=instructor)
+        self.assignment = Assignment.objects.create(
+            course=course, title='Essay', description='...', due_date=timezone.now() + timedelta(days=1),
+            created_by=instructor,
+        )
+        self.storage = submission_storage()
+
+    def submit(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Submission.objects.create(assignment=self.assignment, student=self.student, submitted_file=name)
+
+    def delete(self, submission):
+        with self.captureOnCommitCallbacks(execute=True):
+            submission.delete()
+
+    def test_last_reference_deletes_the_file(self):
+        name = self.storage.save('submissions/essay.pdf', ContentFile(b'%PDF-1.4 essay'))
+        first, second = self.submit(name), self.submit(name)
+        self.assertEqual(Blob.objects.get(name=name).ref_count, 2)
+
+        self.delete(first)
+        self.assertTrue(self.storage.exists(name))
+        self.delete(second)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(Blob.objects.filter(name=name).exists())
+
+    def test_identical_upload_racing_the_delete_keeps_the_file(self):
+        name = self.storage.save('submissions/essay.pdf', ContentFile(b'%PDF-1.4 essay'))
+        submission = self.submit(name)
+
+        # An identical upload is handed the existing blob, then the last
+        # reference goes before the upload has saved its own.
+        self.assertEqual(self.storage.save('submissions/copy.pdf', ContentFile(b'%PDF-1.4 essay')), name)
+        self.delete(submission)
+        self.assertTrue(self.storage.exists(name))
+
+        reused = self.submit(name)
+        self.assertFalse(self.storage.reuse_pending(name))
+        self.delete(reused)
+        self.assertFalse(self.storage.exists(name))
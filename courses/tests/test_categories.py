@@ -0,0 +1,33 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from courses import caching
+from courses.caching import cached_categories, get_cached_category
+from courses.models import Category
+
+
+class CategoryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caching._local_categories = (None, None)
+        self.category = Category.objects.create(name='Science')
+
+    def test_served_from_cache(self):
+        self.assertEqual([c.name for c in cached_categories()], ['Science'])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_category(self.category.pk).name, 'Science')
+
+    def test_edit_invalidates(self):
+        cached_categories()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Physics'
+            self.category.save()
+        self.assertEqual([c.name for c in cached_categories()], ['Physics'])
+
+    def test_delete_invalidates(self):
+        cached_categories()
+        pk = self.category.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        self.assertEqual(cached_categories(), [])
+        self.assertIsNone(get_cached_category(pk))
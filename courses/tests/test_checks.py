@@ -0,0 +1,34 @@
+from django.test import SimpleTestCase, override_settings
+
+from courses.checks import check_shared_cache, check_shared_session_cache
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379'}}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES=LOCMEM, SINGLE_PROCESS=False)
+    def test_process_local_cache_is_an_error(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['courses.E001'])
+
+    @override_settings(CACHES=LOCMEM, SINGLE_PROCESS=True)
+    def test_process_local_cache_in_a_single_process(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(CACHES=REDIS, SINGLE_PROCESS=False)
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+
+class SharedSessionCacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES=LOCMEM, SINGLE_PROCESS=False)
+    def test_process_local_session_cache_is_an_error(self):
+        self.assertEqual([error.id for error in check_shared_session_cache(None)], ['courses.E002'])
+
+    @override_settings(CACHES=LOCMEM, SINGLE_PROCESS=False, SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_other_session_engines(self):
+        self.assertEqual(check_shared_session_cache(None), [])
+
+    @override_settings(CACHES=REDIS, SINGLE_PROCESS=False)
+    def test_shared_session_cache(self):
+        self.assertEqual(check_shared_session_cache(None), [])
@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save
+from django.test import TestCase
+
+from courses.models import Course, Enrollment, Lesson
+
+
+class CourseCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('instructor')
+        cls.student = User.objects.create_user('student')
+        cls.first = Course.objects.create(title='First', description='...', created_by=instructor)
+        cls.second = Course.objects.create(title='Second', description='...', created_by=instructor)
+
+    def counts(self, field):
+        return list(Course.objects.filter(pk__in=[self.first.pk, self.second.pk]).order_by('pk').values_list(field, flat=True))
+
+    def test_lessons(self):
+        lesson = Lesson.objects.create(title='Lesson', content='...', course=self.first)
+        self.assertEqual(self.counts('lesson_count'), [1, 0])
+        lesson.title = 'Renamed'
+        lesson.save()
+        self.assertEqual(self.counts('lesson_count'), [1, 0])
+        lesson.course = self.second
+        lesson.save()
+        self.assertEqual(self.counts('lesson_count'), [0, 1])
+        lesson.delete()
+        self.assertEqual(self.counts('lesson_count'), [0, 0])
+
+    def test_enrollments(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.first)
+        self.assertEqual(self.counts('student_count'), [1, 0])
+        enrollment.course = self.second
+        enrollment.save()
+        self.assertEqual(self.counts('student_count'), [0, 1])
+        Enrollment.objects.filter(pk=enrollment.pk).delete()
+        self.assertEqual(self.counts('student_count'), [0, 0])
+
+    def test_failed_save_leaves_the_counter(self):
+        def fail(sender, **kwargs):
+            raise RuntimeError
+
+        post_save.connect(fail, sender=Lesson)
+        self.addCleanup(post_save.disconnect, fail, sender=Lesson)
+        with self.assertRaises(RuntimeError):
+            Lesson.objects.create(title='Lesson', content='...', course=self.first)
+        self.assertFalse(Lesson.objects.exists())
+        self.assertEqual(self.counts('lesson_count'), [0, 0])
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from courses.caching import COURSE_VERSION_KEY, get_version
+from courses.deadlines import close_due_assignments
+from courses.models import Assignment, Course
+
+
+class CloseDueAssignmentsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        instructor = User.objects.create_user('instructor')
+        self.now = timezone.now()
+        self.courses = [
+            Course.objects.create(title=f'Course {n}', description='...', created_by=instructor) for n in range(2)
+        ]
+        for course, due in zip(self.courses, (self.now - timedelta(hours=1), self.now + timedelta(hours=1))):
+            Assignment.objects.create(course=course, title='Essay', description='...', due_date=due, created_by=instructor)
+
+    def test_invalidates_courses_of_closed_assignments(self):
+        due, later = (get_version(COURSE_VERSION_KEY % course.pk) for course in self.courses)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(close_due_assignments(self.now), 1)
+        self.assertNotEqual(get_version(COURSE_VERSION_KEY % self.courses[0].pk), due)
+        self.assertEqual(get_version(COURSE_VERSION_KEY % self.courses[1].pk), later)
+        self.assertIsNotNone(Assignment.objects.get(course=self.courses[0]).closed_at)
+
+    def test_nothing_due(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(close_due_assignments(self.now - timedelta(days=1)), 0)
@@ -0,0 +1,68 @@
+import csv
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from courses.models import Assignment, Course, Submission
+from courses.storage import submission_storage
+
+
+class SubmissionExportTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.instructor = User.objects.create_user('instructor')
+        self.instructor.profile.is_instructor = True
+        self.instructor.profile.save()
+        course = Course.objects.create(title='Course', description='...', created_by=self.instructor)
+        self.assignment = Assignment.objects.create(
+            course=course, title='Essay', description='...', due_date=timezone.now() + timedelta(days=1),
+            created_by=self.instructor,
+        )
+        storage = submission_storage()
+        self.alice = Submission.objects.create(
+            assignment=self.assignment, student=User.objects.create_user('alice'), grade=88,
+            submitted_file=storage.save('submissions/essay.pdf', ContentFile(b'%PDF-1.4 alice')),
+            original_filename='my essay.pdf',
+        )
+        self.bob = Submission.objects.create(
+            assignment=self.assignment, student=User.objects.create_user('bob'),
+            submitted_file='submissions/gone.pdf', original_filename='gone.pdf',
+        )
+
+    def export(self):
+        self.client.force_login(self.instructor)
+        response = self.client.get(reverse('export_submissions', args=[self.assignment.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_entries_and_manifest(self):
+        archive = self.export()
+        alice_entry = f'alice/{self.alice.pk}-my_essay.pdf'
+        self.assertEqual(archive.namelist(), [alice_entry, 'manifest.csv'])
+        self.assertEqual(archive.read(alice_entry), b'%PDF-1.4 alice')
+
+        manifest = list(csv.reader(io.StringIO(archive.read('manifest.csv').decode())))
+        self.assertEqual(manifest[0], ['submission_id', 'student', 'submitted_at', 'grade', 'file'])
+        self.assertEqual(
+            [(row[0], row[1], row[3], row[4]) for row in manifest[1:]],
+            [(str(self.alice.pk), 'alice', '88.00', alice_entry), (str(self.bob.pk), 'bob', '', 'MISSING')],
+        )
+
+    def test_only_the_instructor(self):
+        self.client.force_login(User.objects.get(username='alice'))
+        response = self.client.get(reverse('export_submissions', args=[self.assignment.pk]))
+        self.assertEqual(response.status_code, 403)
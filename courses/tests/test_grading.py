@@ -0,0 +1,79 @@
+import io
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from courses.caching import get_version
+from courses.dashboards import ROSTER_VERSION_KEY, USER_VERSION_KEY
+from courses.grading import GradeImportError, apply_grades, import_grades_csv
+from courses.models import Assignment, Course, Submission
+
+
+class GradingTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('instructor')
+        cls.student = User.objects.create_user('student')
+        course = Course.objects.create(title='Course', description='...', created_by=cls.instructor)
+        cls.assignment = Assignment.objects.create(
+            course=course, title='Essay', description='...', due_date=timezone.now() + timedelta(days=1),
+            created_by=cls.instructor,
+        )
+        cls.submission = Submission.objects.create(assignment=cls.assignment, student=cls.student, submitted_file='essay.pdf')
+
+
+class GradeInvalidationTests(GradingTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def versions(self):
+        return get_version(ROSTER_VERSION_KEY % self.instructor.pk), get_version(USER_VERSION_KEY % self.student.pk)
+
+    def test_apply_grades_invalidates_roster_and_student(self):
+        before = self.versions()
+        assignment = Assignment.objects.select_related('course').get(pk=self.assignment.pk)
+        submissions = list(assignment.submissions.all())
+        # The update and its savepoint; the instructor comes from the loaded course.
+        with self.assertNumQueries(3), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(apply_grades(submissions, {self.submission.pk: (90, '')}), 1)
+        roster, student = self.versions()
+        self.assertNotEqual(roster, before[0])
+        self.assertNotEqual(student, before[1])
+
+    def test_save_without_loaded_course_queries_it(self):
+        before = self.versions()
+        submission = Submission.objects.get(pk=self.submission.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            submission.save()
+        self.assertNotEqual(self.versions()[0], before[0])
+
+
+class ImportGradesCSVTests(GradingTestCase):
+    def test_duplicate_usernames_rejected(self):
+        csv_file = io.BytesIO(b'student,grade\nstudent,80\nstudent,90\n')
+        with self.assertRaises(GradeImportError) as raised:
+            import_grades_csv(self.assignment, csv_file)
+        self.assertEqual(raised.exception.errors, ["'student' appears more than once (lines 2, 3)."])
+        self.submission.refresh_from_db()
+        self.assertIsNone(self.submission.grade)
+
+    def test_import(self):
+        csv_file = io.BytesIO(b'student,grade,feedback\nstudent,80,Good\n')
+        self.assertEqual(import_grades_csv(self.assignment, csv_file), 1)
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.grade, 80)
+
+    def test_nan_grade_rejected(self):
+        csv_file = io.BytesIO(b'student,grade\nstudent,NaN\n')
+        with self.assertRaises(GradeImportError) as raised:
+            import_grades_csv(self.assignment, csv_file)
+        self.assertEqual(raised.exception.errors, ["Line 2: 'NaN' is not a number."])
+
+    def test_non_utf8_rejected(self):
+        csv_file = io.BytesIO('student,grade,feedback\nstudent,80,Très bien\n'.encode('latin-1'))
+        with self.assertRaises(GradeImportError) as raised:
+            import_grades_csv(self.assignment, csv_file)
+        self.assertEqual(raised.exception.errors, ["The file must be UTF-8 CSV."])
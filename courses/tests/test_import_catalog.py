@@ -0,0 +1,66 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from courses.models import Course, Enrollment, Lesson
+
+ROWS = [
+    {'type': 'course', 'external_id': 'c1', 'title': 'Course', 'description': '...', 'instructor': 'instructor'},
+    {'type': 'lesson', 'external_id': 'l1', 'course': 'c1', 'title': 'One', 'content': '...'},
+    {'type': 'lesson', 'external_id': 'l2', 'course': 'c1', 'title': 'Two', 'content': '...'},
+    {'type': 'enrollment', 'course': 'c1', 'student': 'first'},
+    {'type': 'enrollment', 'course': 'c1', 'student': 'second'},
+    {'type': 'enrollment', 'course': 'c1', 'student': 'second'},
+]
+
+
+class ImportCatalogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('instructor')
+        instructor.profile.is_instructor = True
+        instructor.profile.save()
+        User.objects.create_user('first')
+        User.objects.create_user('second')
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'catalog.jsonl')
+        with open(self.path, 'w') as source:
+            source.writelines(json.dumps(row) + '\n' for row in ROWS)
+
+    def run_import(self, *args):
+        stdout = StringIO()
+        call_command('import_catalog', self.path, *args, stdout=stdout, stderr=StringIO())
+        return stdout.getvalue()
+
+    def test_import(self):
+        output = self.run_import()
+        self.assertIn("created 1 course(s), 2 lesson(s), 2 enrollment(s)", output)
+        course = Course.objects.get(external_id='c1')
+        self.assertEqual((course.lesson_count, course.student_count), (2, 2))
+        self.assertFalse(os.path.exists(f"{self.path}.checkpoint"))
+
+    def test_replayed_batch_creates_nothing(self):
+        self.run_import()
+        # As after a crash between the commit and the checkpoint write.
+        with open(f"{self.path}.checkpoint", 'w') as checkpoint:
+            json.dump({'line': 1}, checkpoint)
+        output = self.run_import('--resume')
+        self.assertIn("created 0 course(s), 0 lesson(s), 0 enrollment(s)", output)
+        self.assertEqual(Lesson.objects.count(), 2)
+        self.assertEqual(Enrollment.objects.count(), 2)
+
+    def test_created_enrollments_exclude_existing(self):
+        self.run_import('--batch-size', '1')
+        Enrollment.objects.filter(student__username='second').delete()
+        output = self.run_import()
+        self.assertIn("created 0 course(s), 0 lesson(s), 1 enrollment(s)", output)
+        self.assertEqual(Course.objects.get(external_id='c1').student_count, 2)
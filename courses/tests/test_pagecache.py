@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from courses.models import Category, Course
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('instructor')
+        cls.course = Course.objects.create(
+            title='Course', description='...', category=Category.objects.create(name='Category'),
+            created_by=cls.instructor,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('course_detail', args=[self.course.pk])
+
+    def test_last_modified_is_the_latest_bump(self):
+        with mock.patch('courses.caching.time.time', return_value=1_000_000_000):
+            first = self.client.get(self.url)
+        with mock.patch('courses.caching.time.time', return_value=1_000_000_500):
+            again = self.client.get(self.url)
+        self.assertEqual(again['Last-Modified'], first['Last-Modified'])
+        self.assertEqual(again['ETag'], first['ETag'])
+
+        bumped_at = mock.patch('courses.caching.time.time', return_value=1_000_001_000)
+        with bumped_at, self.captureOnCommitCallbacks(execute=True):
+            self.course.title = 'Renamed'
+            self.course.save()
+        changed = self.client.get(self.url)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+        self.assertEqual(changed['Last-Modified'], 'Sun, 09 Sep 2001 02:03:20 GMT')
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        conditional = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(conditional.status_code, 304)
+        self.assertEqual(conditional['Last-Modified'], response['Last-Modified'])
+
+    def test_username_change_invalidates_course_pages(self):
+        detail = self.client.get(self.url)
+        listing = self.client.get(reverse('course_list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.instructor.username = 'renamed'
+            self.instructor.save()
+        self.assertNotEqual(self.client.get(self.url)['ETag'], detail['ETag'])
+        response = self.client.get(reverse('course_list'))
+        self.assertNotEqual(response['ETag'], listing['ETag'])
+        self.assertContains(response, 'renamed')
+
+    def test_last_login_does_not_invalidate(self):
+        detail = self.client.get(self.url)
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            self.instructor.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(self.url)['ETag'], detail['ETag'])
@@ -0,0 +1,43 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from courses.models import Course, Enrollment, Lesson
+from courses.progress import enrollment_progress, pending_lessons
+
+
+class EnrollmentProgressTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('instructor')
+        cls.student = User.objects.create_user('student')
+        cls.course = Course.objects.create(title='Course', description='...', created_by=instructor)
+        cls.lessons = [Lesson.objects.create(title=f'Lesson {n}', content='...', course=cls.course) for n in range(3)]
+        cls.empty = Course.objects.create(title='Empty', description='...', created_by=instructor)
+        other = Course.objects.create(title='Other', description='...', created_by=instructor)
+        cls.other_lesson = Lesson.objects.create(title='Elsewhere', content='...', course=other)
+
+    def test_percentages(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.course)
+        Enrollment.objects.create(student=self.student, course=self.empty)
+        # A completion from another course does not count towards this one.
+        enrollment.completed_lessons.add(self.lessons[0], self.other_lesson)
+
+        with self.assertNumQueries(1):
+            progress = {e.course_id: e for e in enrollment_progress(self.student)}
+        course = progress[self.course.pk]
+        self.assertEqual((course.total_lessons, course.completed_count), (3, 1))
+        self.assertEqual(course.remaining_lessons, 2)
+        self.assertEqual(course.progress, 33)
+        empty = progress[self.empty.pk]
+        self.assertEqual((empty.total_lessons, empty.remaining_lessons, empty.progress), (0, 0, 0))
+
+        enrollment.completed_lessons.add(*self.lessons[1:])
+        progress = {e.course_id: e.progress for e in enrollment_progress(self.student)}
+        self.assertEqual(progress, {self.course.pk: 100, self.empty.pk: 0})
+
+    def test_pending_lessons(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.course)
+        enrollment.completed_lessons.add(self.lessons[1])
+        self.assertEqual(
+            [item['lesson'].pk for item in pending_lessons(self.student)], [self.lessons[0].pk, self.lessons[2].pk],
+        )
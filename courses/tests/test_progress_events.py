@@ -0,0 +1,85 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+
+from courses import progress_events
+from courses.models import Course, Enrollment, Lesson
+
+
+class ProgressEventTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        instructor = User.objects.create_user('instructor')
+        self.student = User.objects.create_user('student')
+        course = Course.objects.create(title='Course', description='...', created_by=instructor)
+        self.lessons = [Lesson.objects.create(title=f'Lesson {n}', content='...', course=course) for n in range(3)]
+        self.enrollment = Enrollment.objects.create(student=self.student, course=course)
+
+    def completed(self):
+        return set(self.enrollment.completed_lessons.values_list('pk', flat=True))
+
+
+@override_settings(PROGRESS_FLUSH_INTERVAL=0.05)
+class BackgroundFlushTests(ProgressEventTestCase):
+    def test_trailing_events_are_flushed(self):
+        # The last events of a burst are written without a later event to
+        # start another flush.
+        for lesson in self.lessons:
+            self.assertTrue(progress_events.record_completion(self.student.pk, lesson.pk))
+        deadline = time.monotonic() + 5
+        while progress_events.pending() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(progress_events.pending())
+        self.assertEqual(self.completed(), {lesson.pk for lesson in self.lessons})
+
+
+@mock.patch.object(progress_events, '_schedule_flush')
+class FlushTests(ProgressEventTestCase):
+    def test_duplicates_are_coalesced(self, schedule_flush):
+        self.assertTrue(progress_events.record_completion(self.student.pk, self.lessons[0].pk))
+        self.assertFalse(progress_events.record_completion(self.student.pk, self.lessons[0].pk))
+        self.assertEqual(progress_events.flush(), 1)
+        self.assertEqual(self.completed(), {self.lessons[0].pk})
+
+    def test_replayed_slots_are_written_once(self, schedule_flush):
+        progress_events.record_completion(self.student.pk, self.lessons[0].pk)
+        progress_events.record_completion(self.student.pk, self.lessons[1].pk)
+        slots = cache.get_many([progress_events.SLOT_KEY % n for n in (1, 2)])
+        self.assertEqual(progress_events.flush(), 2)
+
+        # A flusher that died after inserting, before moving the cursor.
+        cache.set(progress_events.CURSOR_KEY, 0, timeout=None)
+        cache.set_many(slots, timeout=None)
+        self.assertEqual(progress_events.flush(), 2)
+        self.assertEqual(self.completed(), {self.lessons[0].pk, self.lessons[1].pk})
+        self.assertFalse(progress_events.pending())
+
+    def test_failed_slot_write_can_be_posted_again(self, schedule_flush):
+        with mock.patch.object(progress_events, '_next_slot', side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                progress_events.record_completion(self.student.pk, self.lessons[0].pk)
+        self.assertTrue(progress_events.record_completion(self.student.pk, self.lessons[0].pk))
+        self.assertEqual(progress_events.flush(), 1)
+        self.assertEqual(self.completed(), {self.lessons[0].pk})
+
+    def test_events_for_other_courses_are_dropped(self, schedule_flush):
+        other = Lesson.objects.create(
+            title='Elsewhere', content='...',
+            course=Course.objects.create(title='Other', description='...', created_by=self.student),
+        )
+        progress_events.record_completion(self.student.pk, other.pk)
+        self.assertEqual(progress_events.flush(), 1)
+        self.assertEqual(self.completed(), set())
+
+    def test_flush_waits_for_the_lock(self, schedule_flush):
+        progress_events.record_completion(self.student.pk, self.lessons[0].pk)
+        cache.add(progress_events.FLUSH_LOCK_KEY, 1)
+        self.assertEqual(progress_events.flush(), 0)
+        self.assertTrue(progress_events.pending())
+        cache.delete(progress_events.FLUSH_LOCK_KEY)
+        self.assertEqual(progress_events.flush(), 1)
+        self.assertIsNone(cache.get(progress_events.FLUSH_LOCK_KEY))
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from courses import views
+from courses.models import Assignment, Category, Course, Enrollment, Lesson, Submission
+from courses.querybudget import assert_query_budget
+
+COURSES = 6
+STUDENTS = 8
+
+
+def make_user(username, is_instructor=False):
+    user = User.objects.create_user(username, password='pw')
+    user.profile.is_instructor = is_instructor
+    user.profile.save()
+    return user
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class ViewQueryBudgetTests(TestCase):
+    """Each page stays within its @query_budget, with enough rows that an N+1 would show."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = make_user('instructor', is_instructor=True)
+        cls.students = [make_user(f'student{n}') for n in range(STUDENTS)]
+        categories = [Category.objects.create(name=f'Category {n}') for n in range(2)]
+        due = timezone.now() + timedelta(days=7)
+        cls.courses = []
+        for n in range(COURSES):
+            course = Course.objects.create(
+                title=f'Course {n}', description='...', category=categories[n % 2], created_by=cls.instructor,
+            )
+            lessons = [Lesson.objects.create(title=f'Lesson {m}', content='...', course=course) for m in range(3)]
+            assignment = Assignment.objects.create(
+                course=course, title=f'Assignment {n}', description='...', due_date=due, created_by=cls.instructor,
+            )
+            for student in cls.students:
+                enrollment = Enrollment.objects.create(student=student, course=course)
+                enrollment.completed_lessons.add(lessons[0])
+                Submission.objects.create(
+                    assignment=assignment, student=student, submitted_file=f'submissions/{student.pk}-{n}.pdf',
+                    grade=80 if student.pk % 2 else None,
+                )
+            cls.courses.append(course)
+        cls.assignment = cls.courses[0].assignments.get()
+
+    def setUp(self):
+        # Page and dashboard caches would hide the queries being budgeted.
+        cache.clear()
+
+    def assertWithinBudget(self, view, url):
+        with assert_query_budget(view.query_budget):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_course_list(self):
+        self.assertWithinBudget(views.course_list, reverse('course_list'))
+        self.assertWithinBudget(views.course_list, reverse('course_list') + '?sort=newest&cursor=')
+
+    def test_course_list_logged_in(self):
+        self.client.force_login(self.students[0])
+        self.assertWithinBudget(views.course_list, reverse('course_list'))
+
+    def test_student_dashboard(self):
+        self.client.force_login(self.students[0])
+        response = self.assertWithinBudget(views.dashboard, reverse('dashboard'))
+        self.assertEqual(len(response.context['enrollments']), COURSES)
+
+    def test_instructor_dashboard(self):
+        self.client.force_login(self.instructor)
+        response = self.assertWithinBudget(views.dashboard, reverse('dashboard'))
+        self.assertEqual(response.context['student_count'], STUDENTS)
+
+    def test_roster(self):
+        self.client.force_login(self.instructor)
+        response = self.assertWithinBudget(views.instructor_roster, reverse('instructor_roster'))
+        self.assertEqual(len(response.context['page_obj']), STUDENTS)
+        url = f"{reverse('instructor_roster')}?course={self.courses[1].pk}&sort=grade"
+        self.assertWithinBudget(views.instructor_roster, url)
+
+    def test_grade_submissions(self):
+        self.client.force_login(self.instructor)
+        url = reverse('grade_submissions', args=[self.assignment.pk])
+        response = self.assertWithinBudget(views.grade_submissions, url)
+        self.assertEqual(len(response.context['rows']), STUDENTS)
+
+    def test_grade_submissions_post(self):
+        self.client.force_login(self.instructor)
+        submissions = list(self.assignment.submissions.order_by('pk'))
+        data = {'form-TOTAL_FORMS': len(submissions), 'form-INITIAL_FORMS': len(submissions)}
+        for n, submission in enumerate(submissions):
+            data.update({f'form-{n}-submission_id': submission.pk, f'form-{n}-grade': 90, f'form-{n}-feedback': ''})
+        url = reverse('grade_submissions', args=[self.assignment.pk])
+        with assert_query_budget(views.grade_submissions.query_budget):
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.assignment.submissions.filter(grade=90).count(), len(submissions))
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from django.db import router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase
+
+from courses.models import Course
+from courses.routing import ReadOnlyRoutingMiddleware, read_only_view
+
+
+@read_only_view
+def catalog(request):
+    return HttpResponse()
+
+
+def edit(request):
+    return HttpResponse()
+
+
+class ReadOnlyRouterTests(TransactionTestCase):
+    # Not TestCase: its transaction would keep every read on default.
+
+    def db_for_read(self, view, method='get', atomic=False):
+        routed = []
+
+        def get_response(request):
+            # What the handler does between the middleware and the view.
+            middleware.process_view(request, view, (), {})
+            if atomic:
+                with transaction.atomic():
+                    routed.append(router.db_for_read(Course))
+            else:
+                routed.append(router.db_for_read(Course))
+            return HttpResponse()
+
+        middleware = ReadOnlyRoutingMiddleware(get_response)
+        request = getattr(RequestFactory(), method)('/')
+        request.resolver_match = SimpleNamespace(url_name=view.__name__)
+        middleware(request)
+        return routed[0]
+
+    def test_read_only_view_reads_from_readonly(self):
+        self.assertEqual(self.db_for_read(catalog), 'readonly')
+
+    def test_inside_a_transaction_reads_from_default(self):
+        self.assertEqual(self.db_for_read(catalog, atomic=True), 'default')
+
+    def test_other_views_and_posts_read_from_default(self):
+        self.assertEqual(self.db_for_read(edit), 'default')
+        self.assertEqual(self.db_for_read(catalog, method='post'), 'default')
+
+    def test_not_routed_outside_a_request(self):
+        self.assertEqual(router.db_for_read(Course), 'default')
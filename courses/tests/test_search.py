@@ -0,0 +1,49 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from courses import search as search_module
+from courses.models import Course, Lesson
+from courses.search import search
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('instructor')
+        cls.title_match = Course.objects.create(title='Python basics', description='An introduction.', created_by=instructor)
+        cls.body_matches = [
+            Course.objects.create(title=f'Course {n}', description='Some python along the way.', created_by=instructor)
+            for n in range(4)
+        ]
+        cls.lesson = Lesson.objects.create(title='Setup', content='Installing python.', course=cls.body_matches[0])
+
+    def test_best_match_first(self):
+        page = search('python', limit=1)
+        self.assertEqual([result.object for result in page], [self.title_match])
+        self.assertTrue(page.has_next())
+
+    def test_pages_follow_the_ranking(self):
+        seen, ranks, cursor = [], [], None
+        while True:
+            page = search('python', limit=2, cursor=cursor)
+            seen.extend((result.kind, result.object.pk) for result in page)
+            ranks.extend(result.rank for result in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(ranks, sorted(ranks))
+
+    def test_invalid_cursor_gives_the_first_page(self):
+        self.assertEqual(
+            [result.object for result in search('python', limit=1, cursor='not-a-cursor')], [self.title_match],
+        )
+
+    def test_missing_index_table(self):
+        with mock.patch.object(search_module, 'SEARCH_TABLE', 'courses_missing'), \
+                mock.patch.object(search_module, '_indexed_databases', set()):
+            self.assertFalse(search_module.search_available())
+            self.assertEqual(len(search('python')), 0)
@@ -0,0 +1,57 @@
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from courses.sessions import SessionStore
+
+
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_logout_reaches_a_fresh_store(self):
+        store = SessionStore()
+        store[SESSION_KEY] = '1'
+        store.save()
+        self.assertEqual(SessionStore(store.session_key).load()[SESSION_KEY], '1')
+
+        session_key = store.session_key
+        store.flush()
+
+        fresh = SessionStore(session_key)
+        self.assertEqual(fresh.load(), {})
+        self.assertFalse(Session.objects.filter(session_key=session_key).exists())
+
+    def test_non_login_changes_skip_the_database_row(self):
+        store = SessionStore()
+        store[SESSION_KEY] = '1'
+        store.save()
+        store['theme'] = 'dark'
+        with self.assertNumQueries(0):
+            store.save()
+        self.assertEqual(SessionStore(store.session_key).load()['theme'], 'dark')
+
+    def test_login_changes_are_written_through(self):
+        store = SessionStore()
+        store['theme'] = 'dark'
+        store.save()
+        store[SESSION_KEY] = '1'
+        store.save()
+        # Even with the cache gone, the row carries the login.
+        cache.clear()
+        self.assertEqual(SessionStore(store.session_key).load()[SESSION_KEY], '1')
+
+
+class LogoutTests(TestCase):
+    def test_old_session_cookie_is_logged_out(self):
+        User.objects.create_user('student', password='pw')
+        self.client.login(username='student', password='pw')
+        session_key = self.client.cookies['sessionid'].value
+        self.client.post(reverse('logout'))
+
+        self.client.cookies['sessionid'] = session_key
+        response = self.client.get(reverse('dashboard'))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('dashboard')}", fetch_redirect_response=False)
@@ -0,0 +1,55 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from courses import pdf, tasks
+from courses.models import Assignment, Course, Submission
+
+
+class AnalyzeTests(TestCase):
+    def write(self, content):
+        handle, path = tempfile.mkstemp(suffix='.pdf')
+        with os.fdopen(handle, 'wb') as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_rejects_non_pdf(self):
+        with self.assertRaises(ValueError):
+            pdf.analyze(self.write(b'PK\x03\x04 not a pdf'))
+
+    def test_rejects_unreadable_pdf(self):
+        if pdf.PdfReader is None:
+            self.skipTest("pypdf is not installed.")
+        with self.assertRaises(ValueError):
+            pdf.analyze(self.write(b'%PDF-1.4\n' + b'\x00' * 64))
+
+    def test_skips_oversize_pdf(self):
+        path = self.write(b'%PDF-1.4\n' + b'\x00' * 64)
+        with mock.patch.object(pdf, 'MAX_PDF_SIZE', 16):
+            self.assertEqual(pdf.analyze(path), (None, ''))
+
+
+@override_settings(SITE_URL='https://moodle.example.com/')
+class NotifyInstructorTests(TestCase):
+    def test_link_is_absolute(self):
+        instructor = User.objects.create_user('instructor', email='instructor@example.com')
+        student = User.objects.create_user('student')
+        course = Course.objects.create(title='Course', description='...', created_by=instructor)
+        assignment = Assignment.objects.create(
+            course=course, title='Essay', description='...', due_date=timezone.now() + timedelta(days=1),
+            created_by=instructor,
+        )
+        submission = Submission.objects.create(assignment=assignment, student=student, submitted_file='essay.pdf')
+        tasks.notify_instructor(submission.pk)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(
+            'https://moodle.example.com' + reverse('view_submissions', args=[assignment.pk]), mail.outbox[0].body,
+        )
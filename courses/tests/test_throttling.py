@@ -0,0 +1,58 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from courses.throttling import client_ip
+
+
+@override_settings(TRUSTED_PROXIES=['10.0.0.1', '10.0.0.2'])
+class ClientIPTests(SimpleTestCase):
+    def ip(self, remote_addr, forwarded=None):
+        headers = {'REMOTE_ADDR': remote_addr}
+        if forwarded is not None:
+            headers['HTTP_X_FORWARDED_FOR'] = forwarded
+        return client_ip(RequestFactory().get('/', **headers))
+
+    def test_direct_client_cannot_forge_forwarded_for(self):
+        self.assertEqual(self.ip('203.0.113.9', '198.51.100.1'), '203.0.113.9')
+
+    def test_behind_trusted_proxies(self):
+        self.assertEqual(self.ip('10.0.0.1', '198.51.100.1'), '198.51.100.1')
+        # The client's own entries are left of the one the proxy appended.
+        self.assertEqual(self.ip('10.0.0.1', '1.2.3.4, 198.51.100.1, 10.0.0.2'), '198.51.100.1')
+
+    def test_proxy_without_forwarded_for(self):
+        self.assertEqual(self.ip('10.0.0.1'), '10.0.0.1')
+
+
+class AccountViewTests(TransactionTestCase):
+    # Password hashing runs on its own thread and connection, which cannot
+    # see a TestCase's uncommitted rows.
+
+    def setUp(self):
+        cache.clear()
+
+    def test_register_and_login(self):
+        response = self.client.post(reverse('register_instructor'), {
+            'username': 'newinstructor', 'password1': 'a-long-passphrase', 'password2': 'a-long-passphrase',
+        })
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        user = User.objects.get(username='newinstructor')
+        self.assertTrue(user.profile.is_instructor)
+        self.assertTrue(user.check_password('a-long-passphrase'))
+
+        self.client.logout()
+        response = self.client.post(
+            reverse('login_instructor'), {'username': 'newinstructor', 'password': 'a-long-passphrase'},
+        )
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+    @override_settings(LOGIN_THROTTLE_RATES={'register': (1, 60 * 60)})
+    def test_register_throttled(self):
+        data = {'username': 'first', 'password1': 'a-long-passphrase', 'password2': 'a-long-passphrase'}
+        self.client.post(reverse('register_student'), data)
+        self.client.logout()
+        response = self.client.post(reverse('register_student'), dict(data, username='second'))
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(User.objects.filter(username='second').exists())
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from courses.models import Assignment, Course, Enrollment, UploadSession
+
+
+class StartUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('instructor')
+        cls.student = User.objects.create_user('student')
+        course = Course.objects.create(title='Course', description='...', created_by=instructor)
+        cls.assignment = Assignment.objects.create(
+            course=course, title='Essay', description='...', due_date=timezone.now() + timedelta(days=1),
+            created_by=instructor,
+        )
+        cls.course = course
+
+    def start(self):
+        self.client.force_login(self.student)
+        return self.client.post(
+            reverse('start_submission_upload', args=[self.assignment.pk]), {'filename': 'essay.pdf', 'size': 1000},
+        )
+
+    def test_not_enrolled(self):
+        response = self.start()
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('error', response.json())
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_enrolled(self):
+        Enrollment.objects.create(student=self.student, course=self.course)
+        response = self.start()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['offset'], 0)
@@ -0,0 +1,186 @@
+"""
+Keeping password hashing from starving page views.
+
+Every login and registration hashes a password with PBKDF2. That is
+deliberately slow, tens of milliseconds of pure CPU, so a burst of
+credential stuffing could otherwise occupy every worker.
+
+``allow_attempt`` is checked before any hashing. It takes a token from a
+bucket per client IP and, for logins, per username, in two tiers:
+
+- A bucket in this process rejects a client that has already run dry
+  here without a cache round trip.
+- A bucket in the shared cache enforces the limit across processes.
+
+It is read and written without a lock, so a race can let a request or two
+too many through, but never lets a client run unthrottled.
+
+``client_ip`` takes the address a bucket is keyed on from
+X-Forwarded-For only behind a proxy listed in ``TRUSTED_PROXIES``; a
+client talking to Django directly could otherwise name any address it
+liked and never run dry.
+
+``run_hashing`` and ``arun_hashing`` run the hashing call on a small
+dedicated thread pool. At most ``PASSWORD_HASHING_WORKERS`` hashes run at
+once and at most ``PASSWORD_HASHING_QUEUE`` more wait; anything beyond that
+is turned away with ``HashingBusy`` instead of queueing without bound.
+The async form frees the event loop, and the thread shared by sync views
+under ASGI, while the hash runs. The call runs on a connection of its
+own, so it only sees committed rows: hash before saving what it returns.
+
+Throttled, queued and turned-away attempts are counted in
+``minimoodle_login_attempts_total``.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from .metrics import record_login
+
+# scope -> (burst, seconds for an empty bucket to refill completely)
+DEFAULT_RATES = {
+    'ip': (30, 60),
+    'username': (10, 5 * 60),
+    'register': (5, 60 * 60),
+}
+DEFAULT_HASHING_WORKERS = 2
+DEFAULT_HASHING_QUEUE = 32
+LOCAL_BUCKETS = 10_000
+THROTTLE_KEY = 'courses:throttle:%s:%s'
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class LocalBuckets:
+    """Token buckets for this process, forgetting the least recently used past ``max_keys``."""
+
+    def __init__(self, max_keys=LOCAL_BUCKETS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, refill_seconds, now):
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * burst / refill_seconds)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+
+_local = LocalBuckets()
+
+
+def _take_shared(key, burst, refill_seconds, now):
+    tokens, updated = cache.get(key) or (burst, now)
+    tokens = min(burst, tokens + (now - updated) * burst / refill_seconds)
+    if tokens < 1:
+        return False
+    # A full bucket is the same as none, so the entry need not outlive a refill.
+    cache.set(key, (tokens - 1, now), timeout=int(refill_seconds) + 1)
+    return True
+
+
+def allow_attempt(**identities):
+    """
+    Take a token for each ``scope=value`` given (``ip``, ``username``,
+    ``register``); return False, and count a throttled attempt, if any
+    bucket is empty.
+    """
+    rates = getattr(settings, 'LOGIN_THROTTLE_RATES', DEFAULT_RATES)
+    now = time.time()
+    for scope, value in identities.items():
+        if value is None or scope not in rates:
+            continue
+        key = THROTTLE_KEY % (scope, str(value).lower())
+        burst, refill_seconds = rates[scope]
+        if not (_local.take(key, burst, refill_seconds, now) and _take_shared(key, burst, refill_seconds, now)):
+            record_login('throttled')
+            return False
+    return True
+
+
+def client_ip(request):
+    """
+    The client's address: REMOTE_ADDR, or, when that is a trusted proxy, the
+    last address in X-Forwarded-For that is not. Anything left of that was
+    written by the client and cannot be trusted.
+    """
+    address = request.META.get('REMOTE_ADDR')
+    proxies = getattr(settings, 'TRUSTED_PROXIES', ())
+    if address not in proxies:
+        return address
+    for hop in reversed(request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')):
+        hop = hop.strip()
+        if not hop:
+            continue
+        address = hop
+        if hop not in proxies:
+            break
+    return address
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+
+
+def _workers():
+    return getattr(settings, 'PASSWORD_HASHING_WORKERS', DEFAULT_HASHING_WORKERS)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix='password-hashing')
+    return _executor
+
+
+def _release(future):
+    global _in_flight
+    with _executor_lock:
+        _in_flight -= 1
+
+
+def _run_in_worker(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def _submit(func, args, kwargs):
+    global _in_flight
+    executor = _get_executor()
+    with _executor_lock:
+        if _in_flight >= _workers() + getattr(settings, 'PASSWORD_HASHING_QUEUE', DEFAULT_HASHING_QUEUE):
+            record_login('rejected')
+            raise HashingBusy
+        _in_flight += 1
+        queued = _in_flight > _workers()
+    record_login('queued' if queued else 'hashed')
+    future = executor.submit(_run_in_worker, func, args, kwargs)
+    future.add_done_callback(_release)
+    return future
+
+
+def run_hashing(func, *args, **kwargs):
+    """Call ``func``, which hashes a password, on the hashing pool and wait for it; raise HashingBusy if full."""
+    return _submit(func, args, kwargs).result()
+
+
+async def arun_hashing(func, *args, **kwargs):
+    """run_hashing() for async views: the event loop stays free while the hash runs."""
+    return await asyncio.wrap_future(_submit(func, args, kwargs))
@@ -0,0 +1,198 @@
+"""
+Resumable chunked uploads for assignment submissions.
+
+A client starts an UploadSession with the file name and total size, PUTs
+the bytes in chunks at explicit offsets, then finalizes the session to
+create the Submission. Chunks are streamed from the request straight into
+a partial file next to the blob store, so memory use is constant however
+large the file is, and a dropped connection resumes from the last offset
+the server acknowledged.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .metrics import record_upload
+from .models import Enrollment, Submission, UploadSession
+from .storage import INCOMING_DIR, clean_extension
+from .tasks import enqueue_submission_processing
+
+CHUNK_SIZE = getattr(settings, 'SUBMISSION_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024)
+MAX_UPLOAD_SIZE = getattr(settings, 'SUBMISSION_MAX_UPLOAD_SIZE', 2 * 1024 ** 3)
+ALLOWED_EXTENSIONS = getattr(settings, 'SUBMISSION_ALLOWED_EXTENSIONS', (
+    '.pdf', '.doc', '.docx', '.odt', '.txt', '.zip', '.png', '.jpg', '.jpeg',
+))
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# Leading bytes a file of the given type must start with.
+FILE_SIGNATURES = {
+    '.pdf': (b'%PDF',),
+    '.docx': (b'PK\x03\x04',),
+    '.odt': (b'PK\x03\x04',),
+    '.zip': (b'PK\x03\x04', b'PK\x05\x06'),
+    '.png': (b'\x89PNG\r\n\x1a\n',),
+    '.jpg': (b'\xff\xd8\xff',),
+    '.jpeg': (b'\xff\xd8\xff',),
+    '.doc': (b'\xd0\xcf\x11\xe0',),
+}
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class PartialUpload(File):
+    """A fully received partial file, handed to storage to be moved into place."""
+
+    def __init__(self, path, name):
+        super().__init__(None, name=name)
+        self.path = path
+
+    @property
+    def size(self):
+        return os.path.getsize(self.path)
+
+    def temporary_file_path(self):
+        return self.path
+
+    def chunks(self, chunk_size=None):
+        with open(self.path, 'rb') as source:
+            yield from iter(lambda: source.read(chunk_size or self.DEFAULT_CHUNK_SIZE), b'')
+
+
+def partial_path(upload):
+    storage = Submission._meta.get_field('submitted_file').storage
+    return storage.path(f'submissions/{INCOMING_DIR}/{upload.pk}.part')
+
+
+def start_upload(student, assignment, filename, size):
+    filename = os.path.basename(filename or '').strip()
+    if not filename:
+        raise UploadError("A file name is required.")
+    extension = clean_extension(filename)
+    if extension not in ALLOWED_EXTENSIONS:
+        raise UploadError(f"Files of type '{extension or filename}' are not accepted.", status=415)
+    if assignment.closed_at is not None:
+        raise UploadError("The assignment is closed and no longer accepts submissions.", status=403)
+    if not Enrollment.objects.filter(student=student, course_id=assignment.course_id).exists():
+        raise UploadError("Only students enrolled in the course can submit.", status=403)
+    if size <= 0:
+        raise UploadError("The file is empty.")
+    if size > MAX_UPLOAD_SIZE:
+        raise UploadError(f"Files larger than {MAX_UPLOAD_SIZE} bytes are not accepted.", status=413)
+    return UploadSession.objects.create(
+        student=student, assignment=assignment, filename=filename, size=size,
+    )
+
+
+def write_chunk(upload, offset, stream, length, chunk_sha256=None):
+    """
+    Append ``length`` bytes read from ``stream`` at ``offset`` and return the
+    new number of bytes received.
+
+    Replaying a chunk the server already has is a no-op, a chunk overlapping
+    the received data only writes its new tail, and a chunk past the
+    received data is rejected with the offset to resume from. The chunk is
+    hashed as it streams and rolled back if it does not match
+    ``chunk_sha256``.
+    """
+    if upload.submission_id:
+        raise UploadError("This upload has already been finalized.", status=409)
+    if length is None:
+        raise UploadError("Content-Length is required.", status=411)
+    if length > CHUNK_SIZE:
+        raise UploadError(f"Chunks larger than {CHUNK_SIZE} bytes are not accepted.", status=413)
+    if offset < 0 or offset + length > upload.size:
+        raise UploadError("The chunk lies outside the declared file size.", status=416, offset=upload.received)
+
+    received = upload.received
+    if offset > received:
+        raise UploadError("The chunk starts past the received data.", status=409, offset=received)
+    if offset + length <= received:
+        return received
+
+    path = partial_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    signatures = FILE_SIGNATURES.get(clean_extension(upload.filename)) if offset == 0 else None
+    digest = hashlib.sha256()
+    skip = received - offset
+    position = offset
+    with open(path, 'r+b' if os.path.exists(path) else 'w+b') as partial:
+        partial.seek(received)
+        try:
+            remaining = length
+            while remaining:
+                block = stream.read(min(STREAM_BLOCK_SIZE, remaining))
+                if not block:
+                    raise UploadError("The request body ended before Content-Length bytes.", offset=received)
+                if signatures and position == 0 and not block.startswith(signatures):
+                    raise UploadError("The file content does not match its type.", status=415, offset=received)
+                digest.update(block)
+                if skip >= len(block):
+                    skip -= len(block)
+                else:
+                    partial.write(block[skip:])
+                    skip = 0
+                position += len(block)
+                remaining -= len(block)
+            if chunk_sha256 and digest.hexdigest() != chunk_sha256.lower():
+                raise UploadError("The chunk checksum does not match.", offset=received)
+        except BaseException:
+            partial.truncate(received)
+            raise
+        # Drop anything a crashed earlier attempt left past this chunk.
+        partial.truncate()
+
+    new_received = offset + length
+    updated = UploadSession.objects.filter(pk=upload.pk, received=received).update(
+        received=new_received, updated_at=timezone.now(),
+    )
+    if not updated:
+        upload.refresh_from_db(fields=['received'])
+        raise UploadError("Another chunk was written concurrently.", status=409, offset=upload.received)
+    upload.received = new_received
+    record_upload('chunked', new_received - received)
+    return new_received
+
+
+def finish_upload(upload):
+    """Turn a fully received upload into a Submission. Finalizing twice returns the same Submission."""
+    path = partial_path(upload)
+    with transaction.atomic():
+        upload = UploadSession.objects.select_for_update().select_related('submission', 'assignment').get(pk=upload.pk)
+        if upload.submission_id:
+            return upload.submission
+        if upload.assignment.closed_at is not None:
+            raise UploadError("The assignment closed before the upload finished.", status=403)
+        if upload.received != upload.size:
+            raise UploadError("The upload is incomplete.", status=409, offset=upload.received)
+
+        submission = Submission(
+            assignment_id=upload.assignment_id,
+            student_id=upload.student_id,
+            original_filename=upload.filename,
+        )
+        submission.submitted_file.save(upload.filename, PartialUpload(path, upload.filename), save=False)
+        submission.save()
+        upload.submission = submission
+        upload.save(update_fields=['submission', 'updated_at'])
+        enqueue_submission_processing(submission)
+
+    # The storage moved the file unless an identical blob already existed.
+    if os.path.exists(path):
+        os.unlink(path)
+    return submission
+
+
+def discard_upload(upload):
+    path = partial_path(upload)
+    if os.path.exists(path):
+        os.unlink(path)
+    upload.delete()
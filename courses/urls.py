@@ -13,6 +13,7 @@ urlpatterns = [
     path('courses/<int:course_id>/delete/', course_views.delete_course, name='delete_course'),
     path('courses/<int:course_id>/add_lesson/', course_views.create_lesson, name='create_lesson'),
     path('courses/<int:course_id>/enroll/', course_views.enroll_course, name='enroll_course'),
+    path('lessons/<int:lesson_id>/progress/', views.record_lesson_progress, name='record_lesson_progress'),
     path('register/', views.choose_registration, name='register'),
     path('register/student/', views.register_student, name='register_student'),
     path('register/instructor/', views.register_instructor, name='register_instructor'),
@@ -21,11 +22,18 @@ urlpatterns = [
     path('login/instructor/', views.login_instructor, name='login_instructor'),
     path('logout/', views.logout_view, name='logout'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('roster/', views.instructor_roster, name='instructor_roster'),
     path('courses/category/<int:category_id>/', views.courses_by_category, name='courses_by_category'),
+    path('search/', views.search_courses, name='search'),
     path('courses/<int:course_id>/assignments/', views.assignment_list, name='assignment_list'),
     path('courses/<int:course_id>/assignments/create/', views.create_assignment, name='create_assignment'),
     path('assignments/<int:assignment_id>/submit/', views.submit_assignment, name='submit_assignment'),
+    path('assignments/<int:assignment_id>/uploads/', views.start_submission_upload, name='start_submission_upload'),
+    path('uploads/<uuid:upload_id>/', views.submission_upload, name='submission_upload'),
+    path('uploads/<uuid:upload_id>/finalize/', views.finish_submission_upload, name='finish_submission_upload'),
     path('assignments/<int:assignment_id>/submissions/', views.view_submissions, name='view_submissions'),
+    path('assignments/<int:assignment_id>/grade/', views.grade_submissions, name='grade_submissions'),
+    path('assignments/<int:assignment_id>/submissions/export/', views.export_submissions, name='export_submissions'),
     path('assignments/', views.student_assignments, name='student_assignments'),
     path('pending-classes/', views.pending_classes, name='pending_classes'),
 
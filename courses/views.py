@@ -1,117 +1,190 @@
+import hmac
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from django.contrib.auth import login, authenticate, logout
+from django.contrib.auth import alogin, authenticate, logout
 from django.contrib import messages
-from django.http import HttpResponseForbidden
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods, require_POST
 from django.core.paginator import Paginator
-from django.db.models import Count
-from django.utils import timezone
-from .models import Course, Lesson, Enrollment, Profile, Category, Assignment, Submission
-from .forms import CourseForm, LessonForm, CustomUserCreationForm, AssignmentForm, SubmissionForm
-
-def register_student(request):
+from .models import Course, Lesson, Enrollment, Category, Assignment, Submission, UploadSession
+from .forms import (
+    CourseForm, LessonForm, CustomUserCreationForm, AssignmentForm, SubmissionForm,
+    GradeFormSet, GradeImportForm,
+)
+from .auth import instructor_required, student_required
+from .throttling import HashingBusy, allow_attempt, arun_hashing, client_ip
+from .progress import pending_lessons
+from .progress_events import is_completion, record_completion
+from .dashboards import adashboard_context
+from .roster import ROSTER_PER_PAGE, ROSTER_SORTS, roster
+from .caching import get_cached_category
+from .pagination import CursorPaginator, approximate_count
+from .querybudget import query_budget
+from .routing import read_only_view
+from .pagecache import anonymous_page_cache, catalog_dependencies, category_dependencies, course_dependencies
+from .metrics import record_upload, render_prometheus
+from .search import search
+from .exports import stream_submissions_zip
+from .grading import GradeImportError, apply_grades, import_grades_csv
+from .tasks import enqueue_submission_processing
+from .uploads import CHUNK_SIZE, UploadError, finish_upload, start_upload, write_chunk
+from .assignment_status import student_assignments_with_status, split_by_status
+
+THROTTLED = "Too many attempts. Please wait a few minutes and try again."
+BUSY = "The server is busy. Please try again in a moment."
+
+
+async def _register(request, is_instructor, template_name, page_title):
+    # Async like _login, so the hash waits on the hashing pool without
+    # holding the thread every sync view shares.
+    status = 200
     if request.method == 'POST':
         form = UserCreationForm(request.POST)
-        if form.is_valid():
-            user = form.save()
-            user.profile.is_instructor = False
-            user.profile.save()
-            login(request, user)
-            return redirect('dashboard')
+        # Throttle before validation: the similarity validator is cheap,
+        # but saving hashes the password.
+        if not allow_attempt(register=client_ip(request)):
+            # add_error() validates the form, which queries for the username.
+            await sync_to_async(form.add_error)(None, THROTTLED)
+            status = 429
+        elif await sync_to_async(form.is_valid)():
+            try:
+                user = await arun_hashing(form.save, commit=False)
+            except HashingBusy:
+                form.add_error(None, BUSY)
+                status = 503
+            else:
+                await sync_to_async(_create_account)(user, is_instructor)
+                await alogin(request, user)
+                return redirect('dashboard')
     else:
         form = UserCreationForm()
-    return render(request, 'auth/register_student.html', {'form': form, 'page_title': 'Student Registration'})
+    return await sync_to_async(render)(
+        request, template_name, {'form': form, 'page_title': page_title}, status=status,
+    )
 
 
-def register_instructor(request):
-    if request.method == 'POST':
-        form = UserCreationForm(request.POST)
-        if form.is_valid():
-            user = form.save()
-            user.profile.is_instructor = True
-            user.profile.save()
-            login(request, user)
-            return redirect('dashboard')
-    else:
-        form = UserCreationForm()
-    return render(request, 'auth/register_instructor.html', {'form': form, 'page_title': 'Instructor Registration'})
+def _create_account(user, is_instructor):
+    user.save()
+    user.profile.is_instructor = is_instructor
+    user.profile.save()
+
+
+async def register_student(request):
+    return await _register(request, False, 'auth/register_student.html', 'Student Registration')
+
+
+async def register_instructor(request):
+    return await _register(request, True, 'auth/register_instructor.html', 'Instructor Registration')
 
 def choose_registration(request):
     return render(request, 'auth/choose_registration.html', {
         'page_title': 'Register'
     })
 
-def login_student(request):
-    error = None
+async def _login(request, is_instructor, wrong_role, tab):
+    # Async, so under ASGI the password check waits on the hashing pool
+    # without holding the thread that every sync view shares.
+    error, status = None, 200
     if request.method == 'POST':
         username = request.POST['username']
         password = request.POST['password']
-        user = authenticate(request, username=username, password=password)
-        if user is not None:
-            if not user.profile.is_instructor:
-                login(request, user)
-                return redirect('dashboard')
-            else:
-                error = "⚠️ You are not a student. Use the instructor tab."
+        if not allow_attempt(ip=client_ip(request), username=username):
+            error, status = THROTTLED, 429
         else:
-            error = "Invalid username or password."
-    return render(request, 'auth/login.html', {'student_error': error, 'show_tab': 'student'})
+            try:
+                user = await arun_hashing(authenticate, request, username=username, password=password)
+            except HashingBusy:
+                error, status = BUSY, 503
+            else:
+                if user is None:
+                    error = "Invalid username or password."
+                elif user.profile.is_instructor == is_instructor:
+                    await alogin(request, user)
+                    return redirect('dashboard')
+                else:
+                    error = wrong_role
+    return await sync_to_async(render)(
+        request, 'auth/login.html', {f'{tab}_error': error, 'show_tab': tab}, status=status,
+    )
 
 
-def login_instructor(request):
-    error = None
-    if request.method == 'POST':
-        username = request.POST['username']
-        password = request.POST['password']
-        user = authenticate(request, username=username, password=password)
-        if user is not None:
-            if user.profile.is_instructor:
-                login(request, user)
-                return redirect('dashboard')
-            else:
-                error = "⚠️ You are not an instructor. Use the student tab."
-        else:
-            error = "Invalid username or password."
-    return render(request, 'auth/login.html', {'instructor_error': error, 'show_tab': 'instructor'})
+async def login_student(request):
+    return await _login(request, False, "⚠️ You are not a student. Use the instructor tab.", 'student')
+
+
+async def login_instructor(request):
+    return await _login(request, True, "⚠️ You are not an instructor. Use the student tab.", 'instructor')
 
 @login_required
 def logout_view(request):
     logout(request)
     return redirect('login_student')
 
+@read_only_view
+@query_budget(3)
+@anonymous_page_cache(catalog_dependencies)
 def home(request):
-    latest_courses = Course.objects.all()[:5]
+    latest_courses = Course.objects.select_related('category')[:5]
     return render(request, 'index.html', {'latest_courses': latest_courses})
 
 
-def course_list(request):
-    sort_by = request.GET.get('sort', 'popular')
-    courses = Course.objects.annotate(num_students=Count('enrollment')).all()
+COURSE_SORTS = {
+    'popular': ('-student_count', '-id'),
+    'newest': ('-created_at', '-id'),
+    'oldest': ('created_at', 'id'),
+}
+COURSES_PER_PAGE = 6
 
-    if sort_by == 'popular':
-        courses = courses.order_by('-num_students')
-    elif sort_by == 'newest':
-        courses = courses.order_by('-created_at')
-    elif sort_by == 'oldest':
-        courses = courses.order_by('created_at')
 
-    categories = Category.objects.all()
-    paginator = Paginator(courses, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+def _render_course_list(request, courses, count_key, extra_context):
+    """
+    Render a catalog page. Pages are numbered (COUNT + OFFSET) by default;
+    passing ``cursor`` in the query string (empty for the first page) opts
+    into keyset pagination, and ``total=1`` adds an approximate total.
+    """
+    sort_by = request.GET.get('sort', 'popular')
+    ordering = COURSE_SORTS.get(sort_by, COURSE_SORTS['popular'])
+    courses = courses.select_related('category', 'created_by')
 
-    return render(request, 'courses/course_list.html', {
-        'page_obj': page_obj,
-        'categories': categories,
+    context = {
         'show_sidebar': True,
         'full_page_center': False,
-    })
+        **extra_context,
+    }
+    if 'cursor' in request.GET:
+        paginator = CursorPaginator(courses, ordering, COURSES_PER_PAGE)
+        context['page_obj'] = paginator.get_page(request.GET['cursor'])
+        context['cursor_mode'] = True
+        if request.GET.get('total'):
+            context['total_count'] = approximate_count(courses, count_key)
+    else:
+        paginator = Paginator(courses.order_by(*ordering), COURSES_PER_PAGE)
+        context['page_obj'] = paginator.get_page(request.GET.get('page'))
+
+    return render(request, 'courses/course_list.html', context)
+
+
+@read_only_view
+@query_budget(4)
+@anonymous_page_cache(catalog_dependencies)
+def course_list(request):
+    return _render_course_list(request, Course.objects.all(), 'courses:count:all', {})
 
 
+@read_only_view
+@query_budget(7)
+@anonymous_page_cache(course_dependencies)
 def course_detail(request, course_id):
-    course = get_object_or_404(Course, id=course_id)
+    course = get_object_or_404(
+        Course.objects.select_related('category', 'created_by').prefetch_related('assignments'), id=course_id,
+    )
     lessons = course.lessons.all()
     enrolled = False
     if request.user.is_authenticated:
@@ -130,62 +203,55 @@ def enroll_course(request, course_id):
     return redirect('course_detail', course_id=course.id)
 
 
-from django.db.models import Q
-
-@login_required
-def dashboard(request):
-    user = request.user
-
-    if user.profile.is_instructor:
-        courses = Course.objects.filter(created_by=user)
-        enrollments = Enrollment.objects.filter(course__in=courses).select_related('student')
-        students = list({enrollment.student for enrollment in enrollments})  
-
-        return render(request, 'auth/dashboard.html', {
-            'is_instructor': True,
-            'courses': courses,
-            'students': students,
-        })
-
-    else:
-        enrollments = user.enrollments.select_related('course').distinct()
-
-
-        for enrollment in enrollments:
-            total = enrollment.course.lessons.count()
-            completed = enrollment.completed_lessons.count()
-            enrollment.progress = int((completed / total) * 100) if total > 0 else 0
-
-        now = timezone.now()
+async def _render_async(request, user, template_name, context):
+    # Templates read request.user and may load the session for messages,
+    # which has to happen on the request's sync thread; hand it the user
+    # the view already loaded.
+    request.user = user
+    return await sync_to_async(render)(request, template_name, context)
 
 
-        pending_assignments = Assignment.objects.filter(
-            course__in=[en.course for en in enrollments],
-            due_date__gte=now
-        ).filter(
-            Q(submissions__isnull=True) | ~Q(submissions__student=user)
-        ).distinct()
-
-        pending_count = pending_assignments.count()
-        remaining_classes = sum(
-            en.course.lessons.count() - en.completed_lessons.count()
-            for en in enrollments
-        )
+@login_required
+@read_only_view
+@query_budget(7)
+async def dashboard(request):
+    user = await request.auser()
+    return await _render_async(request, user, 'auth/dashboard.html', await adashboard_context(user))
 
-        return render(request, 'auth/dashboard.html', {
-            'is_instructor': False,
-            'enrollments': enrollments,
-            'pending_assignments': pending_assignments,
-            'pending_count': pending_count,       
-            'remaining_classes': remaining_classes  
-        })
 
+@login_required
+@instructor_required("Only instructors have a roster.")
+@read_only_view
+@query_budget(5)
+def instructor_roster(request):
+    # The filter dropdown needs every course anyway; pick the selected one
+    # out of it rather than querying for it again.
+    courses = list(Course.objects.filter(created_by=request.user).only('id', 'title').order_by('title'))
+    course = None
+    if request.GET.get('course'):
+        course = next((c for c in courses if str(c.pk) == request.GET['course']), None)
+        if course is None:
+            raise Http404("No such course.")
+    sort_by = request.GET.get('sort', 'name')
+    if sort_by not in ROSTER_SORTS:
+        sort_by = 'name'
+
+    paginator = Paginator(roster(request.user, course).order_by(*ROSTER_SORTS[sort_by]), ROSTER_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'courses/roster.html', {
+        'page_obj': page_obj,
+        'page_range': paginator.get_elided_page_range(page_obj.number),
+        'courses': courses,
+        'course': course,
+        'sort_by': sort_by,
+        'sorts': ROSTER_SORTS,
+        'page_title': 'Roster',
+    })
 
 
 @login_required
+@instructor_required()
 def create_course(request):
-    if not request.user.profile.is_instructor:
-        return HttpResponseForbidden("You are not an instructor.")
     if request.method == 'POST':
         form = CourseForm(request.POST)
         if form.is_valid():
@@ -239,21 +305,32 @@ def create_lesson(request, course_id):
     return render(request, 'courses/create_lesson.html', {'form': form, 'course': course, 'page_title': 'Add Lesson'})
 
 
+@read_only_view
+@query_budget(4)
+@anonymous_page_cache(category_dependencies)
 def courses_by_category(request, category_id):
-    category = get_object_or_404(Category, id=category_id)
-    courses = Course.objects.filter(category=category)
-    categories = Category.objects.all()
-
-    paginator = Paginator(courses, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    return render(request, 'courses/course_list.html', {
-        'page_obj': page_obj,
-        'categories': categories,
+    category = get_cached_category(category_id)
+    if category is None:
+        raise Http404("No Category matches the given query.")
+    return _render_course_list(
+        request,
+        Course.objects.filter(category=category),
+        f'courses:count:category:{category.id}',
+        {'selected_category': category},
+    )
+
+@read_only_view
+@query_budget(4)
+def search_courses(request):
+    query = request.GET.get('q', '').strip()
+    category_id = request.GET.get('category', '')
+    category = get_cached_category(int(category_id)) if category_id.isdigit() else None
+    results = search(query, category=category, cursor=request.GET.get('cursor')) if query else []
+    return render(request, 'courses/search.html', {
+        'query': query,
+        'results': results,
         'selected_category': category,
-        'show_sidebar': True,
-        'full_page_center': False,
+        'page_title': 'Search',
     })
 
 from django.shortcuts import render
@@ -263,9 +340,10 @@ def login_page(request):
 
 
 @login_required
+@instructor_required("Only the instructor of this course can create assignments.")
 def create_assignment(request, course_id):
     course = get_object_or_404(Course, id=course_id)
-    if not request.user.profile.is_instructor or course.created_by != request.user:
+    if course.created_by != request.user:
         return HttpResponseForbidden("Only the instructor of this course can create assignments.")
     
     if request.method == 'POST':
@@ -287,6 +365,7 @@ def create_assignment(request, course_id):
 
 
 @login_required
+@query_budget(6)
 def assignment_list(request, course_id):
     course = get_object_or_404(Course, id=course_id)
     assignments = course.assignments.all()
@@ -298,6 +377,9 @@ def assignment_list(request, course_id):
 
 def submit_assignment(request, assignment_id):
     assignment = get_object_or_404(Assignment, id=assignment_id)
+    if assignment.closed_at is not None:
+        messages.error(request, "❌ This assignment is closed and no longer accepts submissions.")
+        return redirect('course_detail', course_id=assignment.course_id)
 
     if request.method == 'POST':
         form = SubmissionForm(request.POST, request.FILES)
@@ -305,7 +387,13 @@ def submit_assignment(request, assignment_id):
             submission = form.save(commit=False)
             submission.assignment = assignment
             submission.student = request.user
-            submission.save()
+            submission.original_filename = request.FILES['submitted_file'].name
+            # Checksums, PDF extraction and the instructor's email happen
+            # in the task worker; only queue them here.
+            with transaction.atomic():
+                submission.save()
+                enqueue_submission_processing(submission)
+            record_upload('form', request.FILES['submitted_file'].size)
             messages.success(request, "✅ Assignment submitted successfully!")
             return redirect('course_detail', course_id=assignment.course.id)
         else:
@@ -319,52 +407,207 @@ def submit_assignment(request, assignment_id):
     })
 
 @login_required
+@instructor_required("Only the instructor can view submissions.")
+@query_budget(6)
 def view_submissions(request, assignment_id):
     assignment = get_object_or_404(Assignment, id=assignment_id)
-    if not request.user.profile.is_instructor or assignment.created_by != request.user:
+    if assignment.created_by != request.user:
         return HttpResponseForbidden("Only the instructor can view submissions.")
     
-    submissions = assignment.submissions.all()
+    submissions = assignment.submissions.select_related('student')
     return render(request, 'assignments/view_submissions.html', {
         'assignment': assignment,
         'submissions': submissions
     })
 
+GRADES_PER_PAGE = 50
+
+
+@login_required
+@instructor_required("Only the instructor can grade submissions.")
+@query_budget(11)
+def grade_submissions(request, assignment_id):
+    # With the course, saving grades finds the instructor's roster to
+    # invalidate without a query.
+    assignment = get_object_or_404(Assignment.objects.select_related('course'), id=assignment_id)
+    if assignment.created_by != request.user:
+        return HttpResponseForbidden("Only the instructor can grade submissions.")
+
+    submissions = assignment.submissions.select_related('student').order_by('student__username', 'pk')
+    page_obj = Paginator(submissions, GRADES_PER_PAGE).get_page(request.GET.get('page'))
+    import_form = GradeImportForm()
+    formset = None
+
+    if request.method == 'POST' and 'grades_file' in request.FILES:
+        import_form = GradeImportForm(request.POST, request.FILES)
+        if import_form.is_valid():
+            try:
+                updated = import_grades_csv(assignment, import_form.cleaned_data['grades_file'])
+            except GradeImportError as error:
+                for message in error.errors:
+                    messages.error(request, message)
+            else:
+                messages.success(request, f"Imported grades for {updated} submission(s).")
+                return redirect(request.get_full_path())
+    elif request.method == 'POST':
+        formset = GradeFormSet(request.POST)
+        if formset.is_valid():
+            changes = {
+                form.cleaned_data['submission_id']: (form.cleaned_data['grade'], form.cleaned_data['feedback'])
+                for form in formset
+            }
+            # Scoping in_bulk to the assignment drops ids from anywhere else.
+            updated = apply_grades(assignment.submissions.in_bulk(list(changes)).values(), changes)
+            messages.success(request, f"Saved grades for {updated} submission(s).")
+            return redirect(request.get_full_path())
+
+    if formset is None:
+        formset = GradeFormSet(initial=[
+            {'submission_id': sub.pk, 'grade': sub.grade, 'feedback': sub.feedback or ''}
+            for sub in page_obj
+        ])
+        page_submissions = list(page_obj)
+    else:
+        posted_ids = [form['submission_id'].value() for form in formset]
+        by_id = assignment.submissions.select_related('student').in_bulk(
+            [int(pk) for pk in posted_ids if str(pk).isdigit()]
+        )
+        page_submissions = [by_id.get(int(pk)) if str(pk).isdigit() else None for pk in posted_ids]
+
+    return render(request, 'assignments/grade_submissions.html', {
+        'assignment': assignment,
+        'page_obj': page_obj,
+        'formset': formset,
+        'rows': [(sub, form) for sub, form in zip(page_submissions, formset) if sub is not None],
+        'import_form': import_form,
+        'page_title': 'Grade Submissions',
+    })
+
+
 @login_required
-def student_assignments(request):
-    if request.user.profile.is_instructor:
-        return HttpResponseForbidden("Instructors cannot access student assignments.")
+@instructor_required("Only the instructor can export submissions.")
+def export_submissions(request, assignment_id):
+    assignment = get_object_or_404(Assignment, id=assignment_id)
+    if assignment.created_by != request.user:
+        return HttpResponseForbidden("Only the instructor can export submissions.")
 
-    enrolled_courses = Enrollment.objects.filter(student=request.user).values_list('course', flat=True)
-    assignments = Assignment.objects.filter(course__in=enrolled_courses).order_by('-due_date')
-    submitted_ids = Submission.objects.filter(student=request.user).values_list('assignment_id', flat=True)
-    pending_assignments = assignments.exclude(id__in=submitted_ids)
-    submitted_assignments = assignments.filter(id__in=submitted_ids)
+    response = StreamingHttpResponse(stream_submissions_zip(assignment), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="assignment-{assignment.id}-submissions.zip"'
+    return response
 
-    return render(request, 'assignments/student_assignments.html', {
+@login_required
+@student_required("Instructors cannot access student assignments.")
+@read_only_view
+@query_budget(4)
+async def student_assignments(request):
+    user = await request.auser()
+    assignments = [assignment async for assignment in student_assignments_with_status(user)]
+    pending_assignments, submitted_assignments = split_by_status(assignments)
+
+    return await _render_async(request, user, 'assignments/student_assignments.html', {
         'pending_assignments': pending_assignments,
         'submitted_assignments': submitted_assignments,
         'page_title': 'My Assignments',
     })
 
 @login_required
+@student_required("Instructors cannot access pending classes.")
+@read_only_view
+@query_budget(4)
 def pending_classes(request):
-    if request.user.profile.is_instructor:
-        return HttpResponseForbidden("Instructors cannot access pending classes.")
+    return render(request, 'courses/pending_classes.html', {
+        'pending_lessons': pending_lessons(request.user),
+        'page_title': 'Pending Classes',
+    })
 
-    enrollments = Enrollment.objects.filter(student=request.user).select_related('course')
-    pending_lessons = []
 
-    for enrollment in enrollments:
-        completed = enrollment.completed_lessons.values_list('id', flat=True)
-        lessons_left = enrollment.course.lessons.exclude(id__in=completed)
-        for lesson in lessons_left:
-            pending_lessons.append({
-                'course': enrollment.course,
-                'lesson': lesson,
-            })
+@login_required
+@require_POST
+def record_lesson_progress(request, lesson_id):
+    # Called every few seconds per student: the event goes to the cache
+    # (courses.progress_events) and whether the student is enrolled is
+    # checked when it is flushed, so this view runs no queries of its own.
+    if 'position' in request.POST:
+        try:
+            position = float(request.POST['position'])
+            duration = float(request.POST.get('duration', ''))
+        except ValueError:
+            return JsonResponse({'error': "Numeric position and duration are required."}, status=400)
+        if not is_completion(position, duration):
+            return JsonResponse({'completed': False}, status=202)
+    record_completion(request.user.pk, lesson_id)
+    return JsonResponse({'completed': True}, status=202)
+
+
+def _upload_state(upload):
+    return {
+        'upload_id': str(upload.pk),
+        'offset': upload.received,
+        'size': upload.size,
+        'chunk_size': CHUNK_SIZE,
+        'upload_url': reverse('submission_upload', args=[upload.pk]),
+        'finalize_url': reverse('finish_submission_upload', args=[upload.pk]),
+    }
+
+
+def _upload_error(error):
+    return JsonResponse({'error': str(error), 'offset': error.offset}, status=error.status)
 
-    return render(request, 'courses/pending_classes.html', {
-        'pending_lessons': pending_lessons,
-        'page_title': 'Pending Classes',
+
+@login_required
+@require_POST
+def start_submission_upload(request, assignment_id):
+    assignment = get_object_or_404(Assignment, id=assignment_id)
+    try:
+        size = int(request.POST.get('size', ''))
+    except ValueError:
+        return JsonResponse({'error': "A numeric file size is required."}, status=400)
+    try:
+        upload = start_upload(request.user, assignment, request.POST.get('filename'), size)
+    except UploadError as error:
+        return _upload_error(error)
+    return JsonResponse(_upload_state(upload), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'PUT'])
+def submission_upload(request, upload_id):
+    upload = get_object_or_404(UploadSession, pk=upload_id, student=request.user)
+    if request.method == 'PUT':
+        try:
+            offset = int(request.GET.get('offset', ''))
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return JsonResponse({'error': "Numeric offset and Content-Length are required."}, status=400)
+        try:
+            # request.read() streams the body; request.body would buffer it.
+            write_chunk(upload, offset, request, length, request.headers.get('X-Chunk-SHA256'))
+        except UploadError as error:
+            return _upload_error(error)
+    return JsonResponse(_upload_state(upload))
+
+
+@login_required
+@require_POST
+def finish_submission_upload(request, upload_id):
+    upload = get_object_or_404(UploadSession, pk=upload_id, student=request.user)
+    try:
+        submission = finish_upload(upload)
+    except UploadError as error:
+        return _upload_error(error)
+    messages.success(request, "✅ Assignment submitted successfully!")
+    return JsonResponse({
+        'submission_id': submission.pk,
+        'redirect_url': reverse('course_detail', args=[upload.assignment.course_id]),
     })
+
+
+def metrics(request):
+    # For Prometheus, a bearer token; a REMOTE_ADDR allowlist would also
+    # let in everything behind a local reverse proxy.
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    authorized = bool(token) and scheme.lower() == 'bearer' and hmac.compare_digest(credentials.encode(), token.encode())
+    if not authorized and not request.user.is_staff:
+        return HttpResponseForbidden("Metrics are only available to staff and with the metrics token.")
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
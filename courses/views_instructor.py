@@ -1,5 +1,5 @@
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseForbidden
+from .auth import instructor_required
 from .models import Course
 from django.shortcuts import render, redirect
 from django import forms
@@ -10,10 +10,8 @@ class CourseForm(forms.ModelForm):
         fields = ['title', 'description']
 
 @login_required
+@instructor_required()
 def create_course(request):
-    if not request.user.profile.is_instructor:
-        return HttpResponseForbidden("You are not an instructor.")
-    
     if request.method == 'POST':
         form = CourseForm(request.POST)
         if form.is_valid():
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,20 +43,23 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'courses.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'courses.routing.ReadOnlyRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'courses.querybudget.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'minimoodle.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'courses.metrics.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'], 
         'APP_DIRS': True,                   
         'OPTIONS': {
@@ -76,13 +80,101 @@ WSGI_APPLICATION = 'minimoodle.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite is run in WAL mode so readers never wait for the writer. The
+# pragmas are applied on every new connection; connections are kept open
+# between requests. busy_timeout comes from 'timeout' (seconds), and
+# IMMEDIATE transactions take the write lock up front instead of failing
+# with "database is locked" when a read transaction tries to upgrade.
+SQLITE_DATABASE = BASE_DIR / 'db.sqlite3'
+SQLITE_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA cache_size=-64000;'
+    'PRAGMA mmap_size=268435456;'
+    'PRAGMA temp_store=MEMORY;'
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'NAME': SQLITE_DATABASE,
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': 'PRAGMA journal_mode=WAL;' + SQLITE_PRAGMAS,
+        },
+    },
+    # The same file, opened read-only, for views marked as only reading
+    # (see courses.routing).
+    'readonly': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{SQLITE_DATABASE}?mode=ro',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'init_command': 'PRAGMA query_only=ON;' + SQLITE_PRAGMAS,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['courses.routing.ReadOnlyRouter']
+# Views that read through the read-only connection, by URL name, in
+# addition to those marked with @read_only_view.
+READ_ONLY_VIEWS = []
+
+# Whether async views run their independent queries on this many worker
+# threads, each with its own connection (courses.concurrency). It only
+# pays off when the queries spend their time in SQLite rather than
+# building model instances, which holds the GIL; turn it on only once
+# run_concurrency_benchmark shows a gain on your data.
+CONCURRENT_QUERIES = False
+CONCURRENT_QUERY_WORKERS = 8
+
+# Version keys (courses.caching), cached pages and dashboards, sessions,
+# login throttles and buffered progress events all live in this cache, so
+# every web process and management command has to share it. Set REDIS_URL
+# to use Redis. Without it the cache is local to each process, which is
+# only correct while SINGLE_PROCESS is on; `manage.py check` fails
+# otherwise (courses.checks).
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+else:
+    # Version keys are small but numerous, so the default 300-entry limit
+    # would keep culling them.
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 100_000,
+            },
+        },
+    }
+
+# Whether everything, requests and background commands alike, runs in one
+# process (runserver during development). Turn it off in any deployment
+# with more than one worker.
+SINGLE_PROCESS = DEBUG
+
+
+# Sessions are read from the cache and written to the database only on
+# login changes or every SESSION_DB_WRITE_INTERVAL seconds (courses.sessions).
+SESSION_ENGINE = 'courses.sessions'
+SESSION_DB_WRITE_INTERVAL = 60
+
+# Users are loaded with their Profile joined, so role checks cost no
+# query (courses.auth).
+AUTHENTICATION_BACKENDS = ['courses.auth.ProfileBackend']
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -127,7 +219,59 @@ STATICFILES_DIRS = [ BASE_DIR / "static" ]
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Chunked submission uploads (courses.uploads)
+SUBMISSION_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+SUBMISSION_MAX_UPLOAD_SIZE = 2 * 1024 ** 3
+
+# Per-request query budgets (courses.querybudget). Going over a view's
+# budget is logged; minimoodle.test_settings turns it into a failure.
+QUERY_BUDGET_STRICT = False
+QUERY_BUDGET_REPEAT_THRESHOLD = 5
+# Budgets for views that cannot be decorated, by URL name.
+QUERY_BUDGETS = {}
+
+# Runtime metrics (courses.metrics) are served at /metrics/ to staff users
+# and to requests with "Authorization: Bearer <METRICS_TOKEN>". Unset, only
+# staff can read them.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/'
 LOGIN_URL = '/login/'
 
+
+# Background tasks (courses.taskqueue), run by `manage.py run_task_worker`.
+# A claimed task that has not finished within the visibility timeout is
+# handed to another worker; failures are retried after TASK_RETRY_DELAY
+# seconds, doubling each attempt.
+TASK_VISIBILITY_TIMEOUT = 5 * 60
+TASK_RETRY_DELAY = 10
+
+# Instructor notifications are printed by the worker until a mail server
+# is configured. Links in emails start with SITE_URL, since tasks run
+# outside any request.
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'minimoodle@localhost'
+
+# Students who have not submitted are reminded this long before an
+# assignment is due (courses.deadlines, `manage.py run_deadline_scheduler`).
+ASSIGNMENT_REMINDER_HOURS = 24
+
+# Lesson progress events are buffered in the cache and written to the
+# database at most this many seconds apart (courses.progress_events).
+PROGRESS_FLUSH_INTERVAL = 5
+
+# Password hashing runs on its own small thread pool, so logins cannot
+# occupy every worker; attempts are throttled per IP and username before
+# any hashing (courses.throttling). Rates are (burst, seconds to refill).
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_QUEUE = 32
+LOGIN_THROTTLE_RATES = {
+    'ip': (30, 60),
+    'username': (10, 5 * 60),
+    'register': (5, 60 * 60),
+}
+# Reverse proxies whose X-Forwarded-For is believed when throttling by
+# client IP, e.g. TRUSTED_PROXIES=127.0.0.1 behind a local nginx.
+TRUSTED_PROXIES = [address for address in os.environ.get('TRUSTED_PROXIES', '').split(',') if address]
@@ -0,0 +1,12 @@
+"""
+Settings for the test suite:
+
+    python manage.py test --settings=minimoodle.test_settings
+"""
+from .settings import *  # noqa: F401,F403
+
+# Going over a view's query budget fails the request instead of being logged.
+QUERY_BUDGET_STRICT = True
+
+# Tests log users in by the dozen; the default hasher would dominate the run.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -3,10 +3,16 @@ from django.urls import path, include
 from django.shortcuts import render
 from courses import views as course_views
 from django.contrib.auth import views as auth_views
+from courses.querybudget import query_budget
+from courses.routing import read_only_view
+from courses.pagecache import anonymous_page_cache, catalog_dependencies
 
+@read_only_view
+@query_budget(3)
+@anonymous_page_cache(catalog_dependencies)
 def home(request):
     from courses.models import Course
-    latest_courses = Course.objects.all()[:6]
+    latest_courses = Course.objects.select_related('category')[:6]
     return render(request, 'index.html', {'latest_courses': latest_courses})
 
 urlpatterns = [
@@ -25,4 +31,7 @@ urlpatterns = [
 
     # Dashboard
     path('dashboard/', course_views.dashboard, name='dashboard'),
+
+    # Prometheus metrics
+    path('metrics/', course_views.metrics, name='metrics'),
 ]